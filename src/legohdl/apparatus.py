@@ -9,7 +9,7 @@
 #   as well as helper functions that are used throughout other scripts.
 # ------------------------------------------------------------------------------
 
-import os,shutil,stat,subprocess
+import os,sys,shutil,stat,subprocess,fnmatch,threading,time,tempfile,collections
 import platform
 import logging as log
 
@@ -60,7 +60,10 @@ class Apparatus:
                     'profiles' : '()',
                     'mixed-language' : 'off', 
                     'multi-develop' : 'off', 
-                    'refresh-rate' : '0'},
+                    'refresh-rate' : '0',
+                    'jobs' : '1',
+                    'stream-limit' : '0',
+                    'git-timeout' : '0'},
                 'label' : {
                     'local' : {}, 
                     'global' : {}},
@@ -96,6 +99,13 @@ class Apparatus:
     MAX_RATE = 1440
     MIN_RATE = -1
 
+    #number of worker processes requested with -j on the command-line
+    JOBS = None
+
+    #latest commands run by execute as (command, wall time in seconds, return code),
+    #bounded so a long-running process does not keep every one
+    CALLS = collections.deque(maxlen=1000)
+
     #types of accepted HDL files to parse and interpret
     VHDL_CODE = ["*.vhd", "*.vhdl"]
     VERILOG_CODE = ["*.v", "*.sv"]
@@ -251,26 +261,29 @@ class Apparatus:
     @classmethod
     def makeTmpDir(cls):
         '''
-        Create a hidden temporary directory within legoHDL.
+        Create a new private temporary directory within legoHDL, so operations
+        running at the same time never share one. It is kept in the hidden
+        folder to be on the same file system as the cache.
 
         Parameters:
             None
         Returns:
             (str): the path to the temporary directory
         '''
-        tmp_path = cls.fs(cls.HIDDEN+"tmp/")
-        #check if temporary directory already exists
-        cls.cleanTmpDir()
-        #create temporary directory
-        os.makedirs(tmp_path)
-        return tmp_path
+        os.makedirs(cls.TMP, exist_ok=True)
+        return cls.fs(tempfile.mkdtemp(dir=cls.TMP))
 
 
     @classmethod
-    def cleanTmpDir(cls):
-        '''Remove the tmporary directory within legoHDL.'''
+    def cleanTmpDir(cls, tmp_path):
+        '''
+        Remove a temporary directory made by makeTmpDir.
 
-        tmp_path = cls.fs(cls.HIDDEN+"tmp/")
+        Parameters:
+            tmp_path (str): the path to the temporary directory
+        Returns:
+            None
+        '''
         #check if temporary directory already exists
         if(os.path.exists(tmp_path)):
             shutil.rmtree(tmp_path, onerror=cls.rmReadOnly)
@@ -434,29 +447,34 @@ class Apparatus:
     def save(cls):
         '''
         Saves the current multi-level Section CFG object its legohdl.cfg file.
+        Skips writing if no setting was modified since it was read or written.
 
         Parameters:
             None
         Returns:
             None
         '''
-        cls.CFG.write()
+        if(cls.CFG._modified):
+            cls.CFG.write()
         pass
     
 
     @classmethod
-    def execute(cls, *code, subproc=False, quiet=True, returnoutput=False):
+    def execute(cls, *code, subproc=False, quiet=True, returnoutput=False, stream=False, timeout=None):
         '''
         Execute the command and runs it through the terminal. 
         
         Immediately exits the command if return code is non-zero and 
-        `returnoutput` is false.
+        `returnoutput` is false. Every command's wall time and return code is
+        recorded in CALLS.
 
         Parameters:
             code (*str): variable amount of arguments for execution
             subproc (bool): run in subprocess if true else use os.system()
             quiet (bool): display the command being executed
             returnoutput (bool): uses subprocess to retun stdout and stderr
+            stream (bool): also print the output line-by-line as it arrives when `returnoutput` is true
+            timeout (float): seconds to wait when `returnoutput` is true (None uses the git-timeout setting)
         Returns:
             stdout (str): standard output if `returnoutput` is true
             stderr (str): error output if `returnoutput` is true
@@ -468,27 +486,111 @@ class Apparatus:
         #print to console the command to be executed
         if(quiet == False):
             log.info(code_line)
+        start = time.perf_counter()
         #use subprocess to return stdout and stderr as strings
         if(returnoutput):
-            proc = subprocess.Popen([*code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE)
-            out = proc.stdout.read()
-            err = proc.stderr.read()
-            return out.decode().strip(), err.decode().strip()
+            out,err,rc = cls.capture(code, stream=stream, timeout=timeout)
+            cls.CALLS += [(code_line.strip(), time.perf_counter()-start, rc)]
+            log.debug("{:.3f} s (code {}): {}".format(*cls.CALLS[-1][1:], cls.CALLS[-1][0]))
+            return out, err
         #use subprocess
         if(subproc):
-            rc = subprocess.run([*code])
-            try:
-                rc.check_returncode()
-            except ChildProcessError:
-                rc = 1
+            rc = subprocess.run([*code]).returncode
         #use os.system()
         else:
             rc = os.system(code_line)
+            #unpack the exit status like a shell does (windows returns the exit code)
+            if(os.name != 'nt'):
+                rc = -os.WTERMSIG(rc) if(os.WIFSIGNALED(rc)) else os.WEXITSTATUS(rc)
+        #report being stopped by a signal like a shell does
+        if(rc < 0):
+            rc = 128-rc
+        cls.CALLS += [(code_line.strip(), time.perf_counter()-start, rc)]
         #immediately stop command upon a bad return code
         if(rc):
             exit(rc)
 
 
+    @classmethod
+    def capture(cls, code, stream=False, timeout=None):
+        '''
+        Runs the command in a subprocess and collects its output. Both pipes
+        are read at once so a command writing a lot to one of them never
+        blocks waiting on the other. A command taking longer than 'timeout' is
+        stopped and a 'fatal:' line is added to its error output.
+
+        Parameters:
+            code ([str]): the command and its arguments
+            stream (bool): also print the output line-by-line as it arrives
+            timeout (float): seconds to wait (None uses the git-timeout setting)
+        Returns:
+            stdout (str): standard output
+            stderr (str): error output
+            rc (int): the return code
+        '''
+        if(timeout == None):
+            timeout = cls.getTimeout()
+        proc = subprocess.Popen([*code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL)
+        out,err = [],[]
+        if(stream):
+            readers = [threading.Thread(target=cls.relay, args=(proc.stdout, out, sys.stdout), daemon=True), \
+                threading.Thread(target=cls.relay, args=(proc.stderr, err, sys.stderr), daemon=True)]
+            for r in readers:
+                r.start()
+
+        timed_out = False
+        try:
+            if(stream):
+                proc.wait(timeout=timeout)
+            else:
+                out,err = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            proc.kill()
+            if(stream):
+                proc.wait()
+            else:
+                out,err = proc.communicate()
+        
+        if(stream):
+            for r in readers:
+                r.join()
+            out,err = b''.join(out), b''.join(err)
+        out,err = out.decode(errors='replace').strip(), err.decode(errors='replace').strip()
+
+        if(timed_out):
+            err = err + ('\n' if(len(err)) else '') + 'fatal: stopped after '+str(timeout)+' seconds'
+            log.error("Stopped "+code[0]+" after "+str(timeout)+" seconds.")
+        return out, err, proc.returncode
+
+
+    @classmethod
+    def relay(cls, pipe, lines, dest):
+        '''Reads the subprocess's 'pipe' line-by-line into 'lines' while writing
+        each line to the stream 'dest'.'''
+        for line in iter(pipe.readline, b''):
+            lines += [line]
+            dest.write(line.decode(errors='replace'))
+            dest.flush()
+        pipe.close()
+        pass
+
+
+    @classmethod
+    def getTimeout(cls):
+        '''
+        Returns the seconds (float) to wait on a command whose output is
+        collected, or None to wait until it finishes.
+        '''
+        if(cls.CFG == None):
+            return None
+        try:
+            timeout = float(cls.CFG.get('general.git-timeout'))
+        except ValueError:
+            return None
+        return timeout if(timeout > 0) else None
+
+
     @classmethod
     def fs(cls, path):
         '''
@@ -556,6 +658,32 @@ class Apparatus:
         pass
 
 
+    @classmethod
+    def getJobs(cls):
+        '''
+        Returns the number of worker processes (int) to analyze HDL files with. A
+        value passed with -j on the command-line takes precedence over the jobs
+        setting. Any value less than 1 uses every available CPU.
+        '''
+        jobs = cls.JOBS
+        if(jobs == None):
+            jobs = cls.CFG.get('general.jobs', dtype=int)
+        jobs = Cfg.castInt(jobs)
+        if(jobs < 1):
+            jobs = os.cpu_count() or 1
+        return jobs
+
+
+    @classmethod
+    def getStreamLimit(cls):
+        '''
+        Returns the maximum number of tokens (int) to keep in memory across the
+        code streams of analyzed HDL files. A value of 0 keeps every stream.
+        '''
+        limit = Cfg.castInt(cls.CFG.get('general.stream-limit', dtype=int))
+        return max(limit, 0)
+
+
     @classmethod
     def getTemplatePath(cls):
         '''
@@ -678,8 +806,8 @@ class Apparatus:
     @classmethod
     def getPathSize(cls, path):
         '''
-        Recursively sums the file sizes within the 'path' parameter to get
-        the total size in bytes.
+        Sums the file sizes within the 'path' parameter to get the total size in
+        bytes. Hidden files are included.
         
         Parameters:
             path (str): the path to begin getting total size
@@ -692,21 +820,91 @@ class Apparatus:
         #base case: return the file's size in bytes
         elif(os.path.isfile(path) == True):
             return os.path.getsize(path)
-        #standardize the path's format
-        path = cls.fs(path)
-        #ensure the last character in path is '/' for concatenation purposes
-        if(path[-1] != '/'):
-            path = path + '/'
-        #recursively add each sub directory/file
-        dirs = os.listdir(path)
         total = 0
-        #iterate through all sub-paths
-        for d in dirs:
-            total += cls.getPathSize(path+d)
-
+        for f in cls.walk(cls.fs(path), hidden=True)[0]:
+            try:
+                total += os.path.getsize(f)
+            except OSError:
+                pass
         return total
 
 
+    @classmethod
+    def scanDir(cls, path, hidden=False):
+        '''
+        Lists a directory's files and subdirectories with a single os.scandir 
+        call. Both lists keep the order the entries were read in.
+
+        Parameters:
+            path (str): directory to list
+            hidden (bool): determine if to include names starting with '.'
+        Returns:
+            files ([str]): names of files within the directory
+            dirs ([str]): names of subdirectories within the directory
+        '''
+        files = []
+        dirs = []
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return files,dirs
+        try:
+            for e in entries:
+                if(hidden == False and e.name.startswith('.')):
+                    continue
+                if(e.is_dir()):
+                    dirs += [e.name]
+                elif(e.is_file()):
+                    files += [e.name]
+        except OSError:
+            pass
+        finally:
+            #release the directory handle now (older pythons cannot use 'with')
+            if(hasattr(entries, 'close')):
+                entries.close()
+        return files,dirs
+
+
+    @classmethod
+    def walk(cls, path, patterns=['*'], prune=[], stop=None, hidden=False, visited=None):
+        '''
+        Finds all files below 'path' matching any of the glob-style file name
+        patterns in a single traversal. 
+        
+        Hidden files and directories (such as .git/) are skipped unless 'hidden' 
+        is set. Files for each pattern are listed in the same order as a 
+        recursive glob would list them.
+
+        Parameters:
+            path (str): directory to begin searching from
+            patterns ([str]): glob-style file name patterns (ex: *.vhd)
+            prune ([str]): directory paths to not search within
+            stop (str): file name marking a subdirectory to not search below
+            hidden (bool): determine if to include hidden files and directories
+            visited ([str]): list to append every searched directory to
+        Returns:
+            ([[str]]): list of matching file paths for each pattern
+        '''
+        if(path[-1] != '/'):
+            path = path + '/'
+        found = [[] for _ in patterns]
+        #walk depth-first, visiting directories in the order they are read
+        stack = [path]
+        while len(stack):
+            d = stack.pop()
+            files,dirs = cls.scanDir(d, hidden)
+            if(visited != None):
+                visited += [d]
+            for i,pattern in enumerate(patterns):
+                found[i] += [d+f for f in files if(fnmatch.fnmatch(f, pattern))]
+            #stop searching below directories marked with the 'stop' file
+            if(stop != None and stop in files and d != path):
+                continue
+            stack += [d+sub+'/' for sub in reversed(dirs) if(d+sub+'/' not in prune)]
+            pass
+        return found
+
+
     @classmethod
     def computeLongestWord(cls, words):
         '''
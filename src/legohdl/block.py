@@ -8,7 +8,7 @@
 #   root folder.
 # ------------------------------------------------------------------------------
 
-import os, shutil, stat, glob
+import os, shutil, stat, glob, time
 import logging as log
 from datetime import date
 from enum import Enum
@@ -16,11 +16,13 @@ from enum import Enum
 from .apparatus import Apparatus as apt
 from .cfg import Cfg, Section, Key
 from .git import Git
-from .map import Map
+from .map import Map, FastMap
 from .graph import Graph
+from .language import Language
 from .vhdl import Vhdl
 from .verilog import Verilog
 from .unit import Unit
+from .lock import Lock
 
 
 #a Block is a package/module that is signified by having the marker file
@@ -58,7 +60,7 @@ class Block:
     _Current = None
 
     #class container listing storing all created blocks
-    Inventory = Map()
+    Inventory = FastMap()
 
     #class container storing the relationships between blocks
     Hierarchy = Graph()
@@ -150,9 +152,9 @@ class Block:
             return False
         #make sure appropriate scopes exists in inventory
         if(self.M().lower() not in Block.Inventory.keys()):
-            Block.Inventory[self.M()] = Map()
+            Block.Inventory[self.M()] = FastMap()
         if(self.L().lower() not in Block.Inventory[self.M()].keys()):
-            Block.Inventory[self.M()][self.L()] = Map()
+            Block.Inventory[self.M()][self.L()] = FastMap()
         #define empty tuple for all of a block's levels
         if(self.N().lower() not in Block.Inventory[self.M()][self.L()].keys()):
             Block.Inventory[self.M()][self.L()][self.N()] = [None, None, None]
@@ -204,6 +206,21 @@ class Block:
             return self._path
 
 
+    def getCacheDir(self):
+        '''Returns the folder (str) in the cache holding every installation of this block.'''
+        rail = self.M() if(self.M() != '') else '_'
+        return self.getWorkspace().getCachePath()+rail+'/'+self.L()+'/'+self.N()+'/'
+
+
+    def lockCache(self):
+        '''
+        Returns a Lock (Lock) over this block's folder in the cache. Held while
+        installing or uninstalling so legohdl processes running at the same
+        time do not change the same installations at once.
+        '''
+        return Lock(self.getCacheDir())
+
+
     def getInstalls(self, returnvers=False):
         '''
         Dynamically creates and returns map of block objects that are found
@@ -913,11 +930,8 @@ class Block:
         if(hasattr(self, '_repo') == False):
             return []
 
-        all_tags,_ = self._repo.git('tag','-l')
+        all_tags = self._repo.getTags()
 
-        #print(all_tags)
-        #split into list
-        all_tags = all_tags.split("\n")
         self._tags = []
 
         #only add any tags identified by legohdl
@@ -934,6 +948,26 @@ class Block:
         return self._tags
 
 
+    def getTaggedMeta(self, ver):
+        '''
+        Reads the metadata as it was released for version 'ver' straight from
+        the git repository, without checking out the version's tag.
+
+        Parameters:
+            ver (str): a tagged version in proper format (v0.0.0)
+        Returns:
+            (Cfg): the metadata at the version's tag or None if unreadable
+        '''
+        if(hasattr(self, '_repo') == False):
+            return None
+        txt = self._repo.catFile('refs/tags/'+ver+apt.TAG_ID, apt.MARKER)
+        if(txt == None):
+            return None
+        meta = Cfg(self.getMetaFile(), data=Section())
+        meta.read(text=txt)
+        return meta
+
+
     @classmethod
     def stdVer(cls, ver, add_v=False, rm_v=False, z_ext=False):
         '''
@@ -1378,7 +1412,8 @@ class Block:
                 success = False
 
         #remove temp directory
-        apt.cleanTmpDir()
+        if(is_valid):
+            apt.cleanTmpDir(tmp)
 
         #return None if block download failed
         if(success == False):
@@ -1456,12 +1491,13 @@ class Block:
 
                     #check to make sure a valid title was given (repo coverage)
                     if(exists == False and self.validTitle(title) == False):
+                            apt.cleanTmpDir(tmp)
                             return False
 
                     #move folder contents to metadata
                     self._repo = Git(self.getPath(), clone=tmp)
                     #clean up temporary spot
-                    apt.cleanTmpDir()
+                    apt.cleanTmpDir(tmp)
                     pass
 
             #check to make sure a valid title was given (non-remote coverage)
@@ -1745,7 +1781,12 @@ class Block:
 
     def installReqs(self, tracking=[]):
         '''
-        Recursive method to install all required blocks.
+        Installs all required blocks and the blocks they require.
+
+        Blocks are installed in order so a block's requirements are installed
+        before it. The repositories of blocks missing from the cache are cloned
+        ahead of time by up to apt.getJobs() workers at once. Prints the time
+        spent on each installed block.
 
         Parameters:
             tracking ([string]): list of already installed requirements
@@ -1755,7 +1796,132 @@ class Block:
         if(len(tracking) == 0):
             log.info("Collecting requirements...")
 
-        for title in self.getMeta('requires'):
+        queue = self.resolveReqs(tracking)
+        if(len(queue) == 0):
+            return
+
+        #only pay for importing the pool when it is used
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=apt.getJobs())
+        #the clone of each block's repository by its title
+        fetches = {}
+        #the seconds spent cloning and installing each block by its title
+        times = {}
+
+        def fetch(b):
+            start = time.perf_counter()
+            path = apt.makeTmpDir()
+            if(b.fetch(path) == None):
+                apt.cleanTmpDir(path)
+                path = None
+            return path, time.perf_counter()-start
+
+        def prefetch(entries):
+            for _,b,_,_ in entries:
+                if(b.getFull() not in fetches.keys() and b.getLvlBlock(Block.Level.INSTL) == None):
+                    fetches[b.getFull()] = pool.submit(fetch, b)
+            pass
+
+        prefetch(queue)
+        try:
+            while(len(queue)):
+                title,b,V,v_ref = queue.pop(0)
+                start = time.perf_counter()
+                clone_time = 0
+                installs = []
+
+                #check if an installation already exists
+                instllr = b.getLvlBlock(Block.Level.INSTL)
+                #install main cache block from its already cloned repository
+                if(instllr == None):
+                    path,clone_time = fetches[b.getFull()].result()
+                    #do not count the time spent waiting on the clone
+                    start = time.perf_counter()
+                    if(path != None):
+                        instllr = b.install(src=path, reqs=False)
+                        installs += [instllr]
+                    if(instllr == None):
+                        continue
+                #check what versions are already installed
+                ready_vers = instllr.getInstalls()
+
+                #cross-compare against what version constraints are required by the design to avoid unnecessary installs
+                all_here = True
+                for temp_ver in v_ref:
+                    #latest exists as it was installed if previously DNE
+                    if(temp_ver.lower() == 'latest'):
+                        log.info("Found "+b.getFull()+"(@"+temp_ver+") already satisfied as v"+instllr.getVersion()+".")
+                        continue
+                    #missing a used version and must fill the gap
+                    if(temp_ver not in ready_vers.keys()):
+                        all_here = False
+                        log.info("Missing "+b.getFull()+"(@"+temp_ver+"). Using "+V+" to satisfy constraint.")
+                    #the version constraint was found using a specific version
+                    else:
+                        log.info("Found "+b.getFull()+"(@"+temp_ver+") already satisfied as v"+ready_vers[temp_ver].getVersion()+".")
+                    pass
+
+                #install specific version block to cache if a constraint was missing
+                if(all_here == False):
+                    installs += [instllr.install(ver=V, reqs=False)]
+
+                installs = [i for i in installs if(i != None)]
+                if(len(installs)):
+                    if(b.getFull() not in times.keys()):
+                        times[b.getFull()] = [0, 0]
+                    times[b.getFull()][0] += clone_time
+                    times[b.getFull()][1] += time.perf_counter()-start
+
+                #install what the newly installed versions require next
+                for i in installs:
+                    reqs = i.resolveReqs(tracking)
+                    prefetch(reqs)
+                    queue = reqs + queue
+                pass
+        finally:
+            #stop clones that have not started yet
+            for f in fetches.values():
+                f.cancel()
+            pool.shutdown(wait=True)
+            #remove clones that were never installed from
+            for f in fetches.values():
+                if(f.cancelled() or f.exception() != None or f.result()[0] == None):
+                    continue
+                apt.cleanTmpDir(f.result()[0])
+
+        #summarize where the time went
+        if(len(times)):
+            print('{:<40}'.format("Block"),'{:>10}'.format("Clone"),'{:>10}'.format("Install"))
+            print("-"*40+" "+"-"*10+" "+"-"*10)
+            for title,(clone_time,instl_time) in times.items():
+                print('{:<40}'.format(title),'{:>8.2f} s'.format(clone_time),'{:>8.2f} s'.format(instl_time))
+        pass
+
+
+    def resolveReqs(self, tracking=[]):
+        '''
+        Collects the requirements of this block that are not in 'tracking'
+        and what they require, ordered so a block's requirements come before
+        it. Adds each collected title to 'tracking'.
+
+        Parameters:
+            tracking ([string]): list of already collected requirements
+        Returns:
+            ([(str, Block, str, [str])]): each requirement's title, its block,
+                the version to install, and the version constraints to meet
+        '''
+        order = []
+        #walk without recursion: a title is ordered after all of its requirements
+        stack = [(None, iter(self.getMeta('requires')))]
+        while(len(stack)):
+            entry,titles = stack[-1]
+            title = next(titles, None)
+            if(title == None):
+                stack.pop()
+                if(entry != None):
+                    order += [entry]
+                continue
             #skip blocks already identified for installation
             if(title.lower() in tracking):
                 continue
@@ -1763,14 +1929,11 @@ class Block:
             tracking += [title.lower()]
 
             #break titles into discrete sections
-            #print(title)
             M,L,N,V = Block.snapTitle(title)
             #snap version
             at_sym = V.find('@')
             spec_ver = V[at_sym+1:]
             v_ref = V[:at_sym-1].split('-')
-            V = spec_ver
-            #print(v_ref)
 
             #get the block associated with the title
             b = self.getWorkspace().shortcut(M+'.'+L+'.'+N, visibility=False)
@@ -1778,44 +1941,34 @@ class Block:
             if(b == None):
                 log.error("Missing block requirement "+title+".")
                 continue
+            stack += [((title, b, spec_ver, v_ref), iter(b.getMeta('requires')))]
+        return order
 
-            #recursively install requirements
-            b.installReqs(tracking)
-
-            #check if an installation already exists
-            instllr = b.getLvlBlock(Block.Level.INSTL)
-            #install main cache block
-            if(instllr == None):
-                instllr = b.install()
-            #check what versions are already installed
-            ready_vers = instllr.getInstalls()
-
-            #cross-compare against what version constraints are required by the design to avoid unnecessary installs
-            all_here = True
-            for temp_ver in v_ref:
-                #latest exists as it was installed if previously DNE
-                if(temp_ver.lower() == 'latest'):
-                    log.info("Found "+b.getFull()+"(@"+temp_ver+") already satisfied as v"+instllr.getVersion()+".")
-                    continue
-                #missing a used version and must fill the gap
-                if(temp_ver not in ready_vers.keys()):
-                    all_here = False
-                    log.info("Missing "+b.getFull()+"(@"+temp_ver+"). Using "+V+" to satisfy constraint.")
-                #the version constraint was found using a specific version
-                else:
-                    log.info("Found "+b.getFull()+"(@"+temp_ver+") already satisfied as v"+ready_vers[temp_ver].getVersion()+".")
-                pass
 
-            #install specific version block to cache if a constraint was missing
-            if(all_here == False):
-                instllr.install(ver=V)
-            else:
-                pass
-            pass
-        pass
+    def fetch(self, path):
+        '''
+        Clones the block's repository to 'path' to install its latest version
+        from. Clones the remote if it is reachable, else the downloaded block.
+
+        Parameters:
+            path (str): the directory to clone to
+        Returns:
+            (str): 'path' or None if the block's repository is not accessible
+        '''
+        #if a remote is available clone to tmp directory
+        rem = self.getMeta('remote')
+        if(Git.isValidRepo(rem, remote=True)):
+            Git(path, clone=rem)
+        #else clone the downloaded block to tmp directory
+        elif(self.getLvl() == Block.Level.DNLD):
+            Git(path, clone=self.getPath())
+        else:
+            log.error("Cannot access block's repository.")
+            return None
+        return path
 
 
-    def install(self, ver=None):
+    def install(self, ver=None, src=None, reqs=True):
         '''
         Installs this block to the cache. 
         
@@ -1829,6 +1982,8 @@ class Block:
 
         Parameters:
             ver (str): a valid version format
+            src (str): an already cloned repository to install the latest from (removed after)
+            reqs (bool): determine if to also install the block's requirements
         Returns:
             (Block): the newly installed block. 
         '''
@@ -1837,25 +1992,22 @@ class Block:
             self.getLvl() == Block.Level.AVAIL):
             log.info("Installing latest version v"+self.getVersion()+" for "+self.getFull()+" to cache...")
 
-            #if a remote is available clone to tmp directory
-            rem = self.getMeta('remote')
-            if(Git.isValidRepo(rem, remote=True)):
-                Git(apt.TMP, clone=rem)
-            #else clone the downloaded block to tmp directory
-            elif(self.getLvl() == Block.Level.DNLD):
-                Git(apt.TMP, clone=self.getPath())
-            else:
-                log.error("Cannot access block's repository.")
-                return None
+            #clone to tmp directory unless already cloned
+            tmp = src
+            if(tmp == None):
+                tmp = apt.makeTmpDir()
+                if(self.fetch(tmp) == None):
+                    apt.cleanTmpDir(tmp)
+                    return None
 
             #get block's latest release point
-            tmp_block = Block(apt.TMP, self.getWorkspace(), lvl=Block.Level.TMP)
+            tmp_block = Block(tmp, self.getWorkspace(), lvl=Block.Level.TMP)
             latest_ver = tmp_block.getHighestTaggedVersion()
 
             #ensure the block has release points (versions)
             if(latest_ver == Block.NULL_VER):
                 log.error("This block cannot be installed because it has no release points.")
-                apt.cleanTmpDir()
+                apt.cleanTmpDir(tmp)
                 return None
             
             #checkout from latest legohdl version tag (highest version number)
@@ -1863,27 +2015,39 @@ class Block:
 
             #make sure block's state is not corrupted
             if(tmp_block.isCorrupt(latest_ver)):
-                apt.cleanTmpDir()
+                apt.cleanTmpDir(tmp)
                 return None
 
-            #delete old installation if exists
-            if(self.getLvlBlock(Block.Level.INSTL) != None):
-                self.getLvlBlock(Block.Level.INSTL).delete()
-            
             #create new cache directory location
-            rail = self.M() if(self.M() != '') else '_'
-            block_cache_path = self.getWorkspace().getCachePath()+rail+'/'+self.L()+'/'+self.N()+'/'
+            block_cache_path = self.getCacheDir()
 
-            os.makedirs(block_cache_path, exist_ok=True)
+            with self.lockCache():
+                #pick up an installation made by another process since loading the workspace
+                found = False
+                if(self.getLvlBlock(Block.Level.INSTL) == None and \
+                    os.path.exists(block_cache_path+self.N()+'/'+apt.MARKER)):
+                    Block(block_cache_path+self.N(), ws=self.getWorkspace(), lvl=Block.Level.INSTL)
+                    found = (self.getLvlBlock(Block.Level.INSTL) != None)
+                instl_block = self.getLvlBlock(Block.Level.INSTL)
 
-            #clone git repository to new cache directory
-            Git(block_cache_path+self.N(), clone=apt.TMP)
+                #keep an installation picked up at the latest version
+                if(found == False or instl_block.getVersion() != latest_ver[1:]):
+                    #delete old installation if exists
+                    if(instl_block != None):
+                        instl_block.delete()
 
-            #clean up tmp directory
-            apt.cleanTmpDir()
+                    os.makedirs(block_cache_path, exist_ok=True)
 
-            #create new block installed block
-            instl_block = Block(block_cache_path+self.N(), ws=self.getWorkspace(), lvl=Block.Level.INSTL)
+                    #move the checked out repository into the new cache directory
+                    shutil.move(tmp, block_cache_path+self.N())
+                    #open up the private temporary directory's permissions
+                    shutil.copymode(block_cache_path, block_cache_path+self.N())
+
+                    #create new block installed block
+                    instl_block = Block(block_cache_path+self.N(), ws=self.getWorkspace(), lvl=Block.Level.INSTL)
+
+            #clean up tmp directory
+            apt.cleanTmpDir(tmp)
 
             #make files read-only
             instl_block.modWritePermissions(False)
@@ -1891,7 +2055,8 @@ class Block:
             log.info("Installation size: "+str(instl_block.getSize())+" KB.")
 
             #install requirements for this block
-            instl_block.installReqs()
+            if(reqs):
+                instl_block.installReqs()
 
             log.info("Success.")
             #return the installed block for potential future use
@@ -1908,52 +2073,76 @@ class Block:
         if(ver not in self.getTaggedVersions()):
             log.error("Version "+ver+" does not exist for "+self.getFull()+".")
             return None
-        #make sure the version is not already installed
-        if(ver in self.getInstalls(returnvers=True)):
-            log.info("Version "+ver+" is already installed for "+self.getFull()+".")
-            return None
 
-        log.info("Installing "+self.getFull()+'('+ver+')...')
+        with self.lockCache():
+            #look again at what is installed, as it may have changed since last read
+            if(hasattr(self, '_instls')):
+                delattr(self, '_instls')
+            #make sure the version is not already installed
+            if(ver in self.getInstalls(returnvers=True)):
+                log.info("Version "+ver+" is already installed for "+self.getFull()+".")
+                return None
+
+            log.info("Installing "+self.getFull()+'('+ver+')...')
 
-        #make files write-able
-        self.modWritePermissions(True)
+            #avoid exporting a version whose release does not match its metadata
+            meta = self.getTaggedMeta(ver)
+            if(meta != None and meta.get('block.version') != ver[1:]):
+                log.error("Block's version "+ver+" is corrupted and cannot be installed.")
+                return None
 
-        #install the specific version
-        b = self.installPartialVersion(ver, places=3)
+            #find the specific version's folder and the sub-versions it updates
+            slots = [(places, self.claimPartialVersion(ver, places)) for places in [3,1,2]]
+            slots = [(places, path) for places,path in slots if(path != None)]
 
-        #failed if block was corrupted
-        if(b == None):
-            return b
+            #export sub-versions aside to keep the standing ones if this install fails
+            tmp = apt.makeTmpDir()
+            dests = [slots[0]] + [(places, tmp+str(places)+'/') for places,_ in slots[1:]]
 
-        #try to update the sub-version associated with this specific version
-        self.installPartialVersion(ver, places=1)
+            #export the release once straight into every folder
+            if(self.exportVersion(ver, dests) == False):
+                shutil.rmtree(slots[0][1], ignore_errors=True)
+                apt.cleanTmpDir(tmp)
+                return None
 
-        self.installPartialVersion(ver, places=2)
+            #install the specific version
+            b = self.installPartialVersion(ver, *slots[0])
 
-        #re-disable write permissions for installation block
-        self.modWritePermissions(False)
+            #failed if block was corrupted
+            if(b == None):
+                apt.cleanTmpDir(tmp)
+                return b
+
+            #try to update the sub-version associated with this specific version
+            for (places,path),(_,staged) in zip(slots[1:], dests[1:]):
+                #delete old block in this place to install bigger version 'ver'
+                standing_block = self.getInstalls().get(apt.listToStr(ver.split('.')[:places], delim='.'))
+                if(standing_block != None):
+                    standing_block.delete()
+                shutil.move(staged, path)
+                self.installPartialVersion(ver, places, path)
+            apt.cleanTmpDir(tmp)
 
         #install requirements for this block
-        b.installReqs()
+        if(reqs):
+            b.installReqs()
 
         log.info("Success.")
         return b
 
 
-    def installPartialVersion(self, ver, places=1):
+    def claimPartialVersion(self, ver, places=1):
         '''
-        Updates the sub-version to the latest applicable version ver, if
-        it exceeds the existing version in sub-version.
+        Determines if the sub-version should hold version ver, which is when
+        it exceeds the existing version in sub-version. The existing
+        sub-version is left standing until ver is installed.
 
         Parameters:
             ver (str): proper version format under test (v0.0.0)
             places (int): number of version sections to evaluate
         Returns:
-            (Block): the specific version block installed
+            (str): the sub-version's cache path to install to, or None to keep it
         '''
-        #clear the jar to act on clean unit data structures for next install
-        Unit.resetJar()
-
         parts = ver.split('.')
         sub_ver = apt.listToStr(parts[:places], delim='.')
         #print(sub_ver)
@@ -1968,50 +2157,60 @@ class Block:
                 #do not overwrite the version here if 'cur_ver' is greater
                 return None
             log.info("Updating partial version "+sub_ver+" from "+cur_ver+" to "+ver+"...")
-            #delete old block in this place to install bigger version 'ver'
-            standing_block.delete()
         elif(places < 3):
             log.info("Installing partial version "+sub_ver+" as "+ver+"...")
 
-        #proceed to create sub version 
-
         #create cache directory based on this block's path
-        cache_path = self.getPath()+'../'+sub_ver+'/'
+        return self.getPath()+'../'+sub_ver+'/'
 
-        #checkout the correct version
-        self._repo.git('checkout','tags/'+ver+apt.TAG_ID)
 
-        #copy in all files from self
-        shutil.copytree(self.getPath(), cache_path)
+    def exportVersion(self, ver, slots):
+        '''
+        Writes the release ver from its tag directly into the cache path of
+        every slot, reading the release only once. Partial versions (places <
+        3) only receive supported source code files, the metadata file, and
+        hidden files.
 
-        #delete all files not ending in a supported source code extensions if
-        #its a partial version (places < 3)
-        if(places < 3):
-            all_files = glob.glob(cache_path+"**/*", recursive=True)
-            for f in all_files:
-                if(os.path.isfile(f) == False):
-                    continue
-                #get file extension
-                _,ext = os.path.splitext(f)
-                #get file name (+ extension)
-                _,fname = os.path.split(f)
-                #keep metadata file
-                if(fname == 'Block.cfg'):
-                    continue
-                #check if extension is one of supported HDL source codes
-                if('*'+ext.lower() not in apt.SRC_CODE):
-                    os.remove(f)
+        Parameters:
+            ver (str): proper version format under test (v0.0.0)
+            slots ([(int, str)]): number of version sections and cache path for each slot
+        Returns:
+            (bool): true if the release was written to every slot
+        '''
+        def keepPartial(f):
+            #keep metadata file and hidden files
+            if(os.path.basename(f) == apt.MARKER or '/.' in '/'+f):
+                return True
+            #check if extension is one of supported HDL source codes
+            _,ext = os.path.splitext(f)
+            return ('*'+ext.lower() in apt.SRC_CODE)
+
+        dests = [(path, None if(places == 3) else keepPartial) for places,path in slots]
+        return self._repo.archive('tags/'+ver+apt.TAG_ID, dests)
+
+
+    def installPartialVersion(self, ver, places, cache_path):
+        '''
+        Finishes installing the version ver exported to the cache path of a
+        sub-version (see exportVersion) by renaming its units to be specific
+        to the sub-version.
+
+        Parameters:
+            ver (str): proper version format under test (v0.0.0)
+            places (int): number of version sections to evaluate
+            cache_path (str): the sub-version's cache path
+        Returns:
+            (Block): the specific version block installed
+        '''
+        #clear the jar to act on clean unit data structures for next install
+        Unit.resetJar()
+
+        parts = ver.split('.')
+        sub_ver = apt.listToStr(parts[:places], delim='.')
 
-        #delete specific version's git repository data
-        repo = Git(cache_path)
-        repo.delete()
-        
         #create new block object as a specific version in the cache
         b = Block(cache_path, ws=self.getWorkspace(), lvl=Block.Level.VER)
 
-        #revert last checkout to latest version
-        self._repo.git('checkout','-')
-
         #make sure block's state is not corrupted
         if(b.isCorrupt(ver)):
             shutil.rmtree(cache_path, onerror=apt.rmReadOnly)
@@ -2122,19 +2321,20 @@ class Block:
             log.info("Cancelled.")
             return False
 
-        #iterate through every installation to uninstall
-        for i in uninstallations.values():
-            if(i == instl):
-                continue
-            print("Uninstalled "+i.getFull(inc_ver=True))
-            #delete specific version from cache
-            i.delete()
-            #:todo: make sure to see if a partial version needs updating (either removed or different version holds it)
-            pass
+        with self.lockCache():
+            #iterate through every installation to uninstall
+            for i in uninstallations.values():
+                if(i == instl):
+                    continue
+                print("Uninstalled "+i.getFull(inc_ver=True))
+                #delete specific version from cache
+                i.delete()
+                #:todo: make sure to see if a partial version needs updating (either removed or different version holds it)
+                pass
 
-        #remove this block's cache path name if uninstalling the main cache block
-        if(instl in uninstallations.values()):
-            instl.delete(squeeze=3)
+            #remove this block's cache path name if uninstalling the main cache block
+            if(instl in uninstallations.values()):
+                instl.delete(squeeze=3)
 
         return True
     
@@ -2176,7 +2376,7 @@ class Block:
         if(path == None):
             path = self.getPath()
         
-        all_files = glob.glob(path+"**/*.*", recursive=True)
+        all_files = apt.walk(path, ['*.*'])[0]
 
         for f in all_files:
             #get current file permissions
@@ -2286,7 +2486,7 @@ class Block:
         return list(block_ids.values())
 
 
-    def gatherSources(self, ext=apt.SRC_CODE, path=None):
+    def gatherSources(self, ext=apt.SRC_CODE, path=None, grouped=False, visited=None):
         '''
         Return all files associated with the given extensions from the specified
         path. Ignores the build/ directory directly within a block's path.
@@ -2294,22 +2494,25 @@ class Block:
         Parameters:
             ext  ([str]): a list of extensions (use * to signify all files of given ext)
             path (str) : where to begin searching for files. Defaults to block's path.
+            grouped (bool): determine if to return a separate list for each extension
+            visited ([str]): list to append every searched directory to
         Returns:
             srcs ([str]): a list of files matching the given ext's
         '''
         if(path == None):
             path = self.getPath()
+        if(path[-1] != '/'):
+            path = path + '/'
 
-        srcs = []
-        #ignores build folder with filter
+        #ignores build folder while searching
         bd = apt.getBuildDirectory()
-        #automatically does case insensitivity on glob for windows os
-        for e in ext:
-            srcs = srcs + glob.glob(path+"/**/"+e, recursive=True)
-            pass
+        found = apt.walk(path, ext, prune=[path+bd], visited=visited)
+        if(grouped):
+            return found
 
-        #omit build/ files
-        srcs = list(filter(lambda p : apt.fs(p).count(path+bd) == 0, srcs))
+        srcs = []
+        for files in found:
+            srcs += files
         #print(srcs)
 
         return srcs
@@ -2646,6 +2849,60 @@ class Block:
         return vhdl_cnt, vlog_cnt
 
 
+    def getHDLFiles(self):
+        '''
+        Returns every VHDL file followed by every VERILOG file within the block, 
+        paired with the Language class to analyze it with.
+
+        Dynamically creates attr _hdl_paths to be reused, and attr _hdl_dirs to
+        know which directories were searched (see Workspace.saveSnapshot).
+
+        Parameters:
+            None
+        Returns:
+            _hdl_paths ([(type, str)]): list of Language classes and file paths
+        '''
+        if(hasattr(self, "_hdl_paths")):
+            return self._hdl_paths
+
+        self._hdl_paths = []
+        self._hdl_dirs = []
+        #search for both languages' files in one pass
+        found = self.gatherSources(apt.VHDL_CODE+apt.VERILOG_CODE, path=self.getPath(), \
+            grouped=True, visited=self._hdl_dirs)
+        for files in found[:len(apt.VHDL_CODE)]:
+            self._hdl_paths += [(Vhdl, v) for v in files]
+        for files in found[len(apt.VHDL_CODE):]:
+            self._hdl_paths += [(Verilog, v) for v in files]
+        return self._hdl_paths
+
+
+    @classmethod
+    def preloadHDL(cls, blocks):
+        '''
+        Analyzes the HDL files of every block yet to load its HDL across worker
+        processes in one batch, according to the number of jobs. Each block's
+        designs are still registered in order once loadHDL() is called on it.
+
+        Parameters:
+            blocks ([Block]): blocks about to call loadHDL()
+        Returns:
+            None
+        '''
+        jobs = apt.getJobs()
+        if(jobs < 2):
+            return
+        files = []
+        for b in blocks:
+            if(hasattr(b, "_units")):
+                continue
+            for lang_cls,v in b.getHDLFiles():
+                files += [(lang_cls, v, b.getWorkspace())]
+            pass
+        Language.preload(files, jobs)
+        pass
+
+
     def loadHDL(self, returnnames=False, lang=''):
         '''
         Identify all HDL files within the block and all designs in each file.
@@ -2693,16 +2950,13 @@ class Block:
             return self._units
 
         self._hdl_files = []
-        #open each found source file and identify their units
-        #load all VHDL files
-        vhd_files = self.gatherSources(apt.VHDL_CODE, path=self.getPath())
-        for v in vhd_files:
-            self._hdl_files += [Vhdl(v, self)]
-
-        #load all VERILOG files
-        verilog_files = self.gatherSources(apt.VERILOG_CODE, path=self.getPath())
-        for v in verilog_files:
-            self._hdl_files += [Verilog(v, self)]
+        #open each found source file and identify their units (VHDL then VERILOG)
+        for lang_cls,v in self.getHDLFiles():
+            self._hdl_files += [lang_cls(v, self)]
+        #the new candidates may change previous ICR decisions and recorded decodes
+        if(len(self._hdl_files)):
+            Unit.clearChoices()
+            Unit.clearTraces()
 
         #check if the level exists in the Jar
         if(Unit.jarExists(self.M(), self.L(), self.N())):
@@ -3084,6 +3338,25 @@ class Block:
         return info_txt
 
 
+    def __getstate__(self):
+        '''
+        Returns the attributes to keep when pickled into a workspace snapshot.
+        
+        Leaves out the results of checks against the git repository (safety 
+        checks and tags) since they may change without touching the block's 
+        files.
+
+        Parameters:
+            None
+        Returns:
+            (dict): attributes to pickle
+        '''
+        state = self.__dict__.copy()
+        for attr in ('_is_secure', '_tags'):
+            state.pop(attr, None)
+        return state
+
+
     # uncomment to use for debugging
     # def __str__(self):
     #     return f'''
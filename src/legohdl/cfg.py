@@ -7,6 +7,8 @@
 #   files used for settings and blocks.
 # ------------------------------------------------------------------------------
 
+import os, io
+
 from .map import Map
 
 
@@ -98,20 +100,20 @@ class Cfg:
         pass
 
 
-    def read(self):
+    def read(self, text=None):
         '''
         Opens the specified file and reads its contents to a dictionary
         according to the spec. Loads the _data attribute
 
         Parameters:
-            filepath (str): path to the cfg file
-            data (dict): data dictionary object to fill
+            text (str): contents to read instead of opening the file
         Returns:
             success (bool): determine if the data was loaded successfully
         '''
         #make sure the file opens with no errors
         try:
-            open(self._filepath, 'r').close()
+            if(text == None):
+                open(self._filepath, 'r').close()
         except:
             #no file exists so say it can be written
             self._modified = True
@@ -123,7 +125,7 @@ class Cfg:
         cur_sect = self._data
         cur_key = None
         #open the file
-        with open(self._filepath, 'r') as ini:
+        with (open(self._filepath, 'r') if(text == None) else io.StringIO(text)) as ini:
             lines = ini.readlines()
             for l in lines:
                 in_str = next_in_str
@@ -280,9 +282,11 @@ class Cfg:
                 contents = contents + self.writeWithRollOver(T+c_mark+key_var+val, newline=(' '*spacer)+c_mark) + '\n'
                 pass
 
-        #write contents to file
-        with open(self._filepath, 'w') as ini:
+        #write to a temporary file first so readers never see a partial file
+        tmp_file = self._filepath+'.'+str(os.getpid())
+        with open(tmp_file, 'w') as ini:
             ini.write(contents)
+        os.replace(tmp_file, self._filepath)
 
         #return modified state to false
         self._modified = False
@@ -426,6 +430,9 @@ class Cfg:
             if(node[keys[-1]]._val != Cfg.castStr(val)):
                 action = 'ALTERED: '
                 self._modified = True
+            #a key renamed to a different case must also be written
+            elif(node[keys[-1]]._name != true_key):
+                self._modified = True
             #overwrite exsiting key
             node[keys[-1]] = Key(true_key, Cfg.castStr(val))
             if(verbose):
@@ -7,7 +7,8 @@
 #   repositories.
 # ------------------------------------------------------------------------------
 
-import os, shutil
+import os, re, shutil, subprocess, atexit, threading, time
+from collections import OrderedDict
 import logging as log
 
 from .apparatus import Apparatus as apt
@@ -21,6 +22,16 @@ class Git:
 
     QUIET = True
 
+    #every `git cat-file --batch` process left open to close at exit
+    _Batches = []
+
+    #repositories read from their .git/ folders, stamped by modification times
+    _Repos = {}
+
+    #config lines: a section header (with an optional subsection) or a key
+    _CFG_SECTION = re.compile(r'\[\s*([\w.-]+)(?:\s+"([^"\\]*)")?\s*\]$')
+    _CFG_KEY = re.compile(r'([A-Za-z][\w-]*)\s*(?:=\s*(.*))?$')
+
     def __init__(self, path, clone=None, ensure_exists=True):
         '''
         Create a Git instance. This is a repository-like object. Will `init`
@@ -51,14 +62,14 @@ class Git:
                 elif(self.isValidRepo(self.getPath(), remote=False) == False):
                     #clone from remote url
                     log.info("Cloning repository from "+clone+"...")
-                    apt.execute('git', 'clone', clone, self.getPath(), quiet=self.QUIET, returnoutput=True)
+                    apt.execute('git', 'clone', clone, self.getPath(), quiet=self.QUIET, returnoutput=True, stream=(self.QUIET == False))
                 else:
                     log.error("Cannot clone to an already initialized git repository.")
             #verify its a valid local repository and clone from local repository
             elif(self.isValidRepo(clone, remote=False) == True and self.isBlankRepo(clone) == False):
                 if(len(os.listdir(self.getPath()))):
                     exit(log.error("Cannot clone to a non-empty directory."))
-                apt.execute('git', 'clone', clone, self.getPath(), quiet=self.QUIET, returnoutput=True)
+                apt.execute('git', 'clone', clone, self.getPath(), quiet=self.QUIET, returnoutput=True, stream=(self.QUIET == False))
                 pass
         #check if git exists here for local repository
         elif(self.isValidRepo(self.getPath(), remote=False) == False and ensure_exists):
@@ -79,7 +90,11 @@ class Git:
         '''
         #filter out blank arguments
         args = tuple(filter(lambda a: len(a), args))
-        resp,err = apt.execute('git', '-C', self.getPath(), *args, quiet=self.QUIET, returnoutput=True)
+        resp,err = apt.execute('git', '-C', self.getPath(), *args, quiet=self.QUIET, returnoutput=True, \
+            stream=(self.QUIET == False))
+        #the command may have moved any of the refs read beforehand
+        if(hasattr(self, '_refs')):
+            delattr(self, '_refs')
         return resp,err
 
 
@@ -296,6 +311,10 @@ class Git:
         '''
         #check local path (only if repository is not remote
         if(cls.isValidRepo(path, remote=False)):
+            #blank when HEAD's branch has no commits
+            repo = cls.readRepo(path)
+            if(repo != None):
+                return repo['head'] != None and repo['head'] not in repo['refs'].keys()
             #check output from running log and seeing if error pops up
             _,err = apt.execute('git','-C',path,'log', quiet=cls.QUIET, returnoutput=True)
             is_blank = (len(err) > 0)
@@ -340,6 +359,12 @@ class Git:
         '''
         if(hasattr(self, '_branch') and force == False):
             return self._branch
+        #the branch marked as checked out (none if HEAD is detached or unborn)
+        refs = self.getRefs() if(self.getRefs() != None) else {}
+        for ref,(_,is_head) in refs.items():
+            if(is_head and ref.startswith('refs/heads/')):
+                self._branch = ref[len('refs/heads/'):]
+                return self._branch
         out,_ = self.git('status')
         txt = out.split()
         #create variable to know when to be ready for branch name
@@ -357,7 +382,7 @@ class Git:
 
     def getRemoteName(self):
         '''
-        Reads output from `git remote` to find what the remote name is called.
+        Reads the configured remotes to find what the remote name is called.
         Dynamically creates attribute for quick access the next time needed.
 
         Parameters:
@@ -367,7 +392,10 @@ class Git:
         '''
         if(hasattr(self, "_remote_name")):
             return self._remote_name
-        
+        #try to read the remote's name along with its url
+        if(self.readRemote()):
+            return self._remote_name
+
         out,_ = self.git('remote')
         if(len(out)):
             self._remote_name = out.split()[0]
@@ -388,12 +416,419 @@ class Git:
         '''
         if(hasattr(self, "_remote_url")):
             return self._remote_url
+        #try to read the remote's url along with its name
+        if(hasattr(self, "_remote_name") == False and self.readRemote()):
+            return self._remote_url
 
         self._remote_url = ''
         if(self.getRemoteName() != ''):
             self._remote_url,_ = self.git('remote','get-url',self.getRemoteName())
         
         return self._remote_url
+
+
+    def readRemote(self):
+        '''
+        Reads the remote's name and url together from the repository's
+        configured remote urls (`git config`), rather than calling `git remote`
+        and then `git remote get-url`.
+
+        Parameters:
+            None
+        Returns:
+            (bool): true if the _remote_name and _remote_url attrs were set
+        '''
+        repo = self.readRepo(self.getPath())
+        if(repo != None):
+            remotes = repo['remotes']
+            self._remote_name = min(remotes.keys()) if(len(remotes)) else ''
+            self._remote_url = remotes[self._remote_name] if(len(remotes)) else ''
+            return True
+
+        out,err = apt.execute('git', '-C', self.getPath(), 'config', '--get-regexp', \
+            '^remote\\..*\\.url$', quiet=self.QUIET, returnoutput=True)
+        if(len(err)):
+            return False
+        #`git remote` lists remotes by name and the first listed is used
+        remotes = {}
+        for line in out.splitlines():
+            key,_,url = line.partition(' ')
+            name = key[len('remote.'):-len('.url')]
+            if(name not in remotes.keys()):
+                remotes[name] = url
+        self._remote_name = min(remotes.keys()) if(len(remotes)) else ''
+        self._remote_url = remotes[self._remote_name] if(len(remotes)) else ''
+        return True
+
+
+    def getRefs(self):
+        '''
+        Reads every branch and tag of the repository with a single call to
+        `git for-each-ref`. Dynamically creates attribute for quick access the
+        next time needed, which is forgotten once another git command runs.
+
+        Parameters:
+            None
+        Returns:
+            self._refs (OrderedDict): full ref names, sorted like git lists
+                them, mapped to their object name (str) and if the ref is the
+                checked out branch (bool), or None if the refs could not be read
+        '''
+        repo = self.readRepo(self.getPath())
+        if(repo != None):
+            return OrderedDict([(ref, (obj, ref == repo['head'])) for ref,obj in repo['refs'].items()])
+        if(hasattr(self, '_refs')):
+            return self._refs
+
+        out,err = apt.execute('git', '-C', self.getPath(), 'for-each-ref', \
+            '--format=%(objectname) %(refname) %(HEAD)', 'refs/heads', 'refs/tags', \
+            quiet=self.QUIET, returnoutput=True)
+        self._refs = None
+        if(len(err) == 0):
+            self._refs = OrderedDict()
+            for line in out.splitlines():
+                #the last column is '*' for the checked out branch, else blank
+                cols = line.split(' ')
+                self._refs[cols[1]] = (cols[0], len(cols) > 2 and cols[2] == '*')
+        return self._refs
+
+
+    @classmethod
+    def readRepo(cls, path):
+        '''
+        Reads the checked out branch, the branches and tags, and the remote
+        urls of a local repository straight from its .git/ folder (HEAD, config,
+        refs/, and packed-refs) without calling git. The result is reused until
+        any of those files or the folders holding refs are modified.
+
+        Returns None for anything unusual, such as a worktree, a reftable, or
+        a config with includes, so git is called instead.
+
+        Parameters:
+            path (str): the local repository
+        Returns:
+            (dict): 'head' is the full ref name of the checked out branch (or
+                None if detached), 'refs' maps full ref names to object names,
+                and 'remotes' maps remote names to their urls
+        '''
+        #git would use a different repository when told to by the environment
+        if('GIT_DIR' in os.environ.keys() or 'GIT_COMMON_DIR' in os.environ.keys()):
+            return None
+        git_dir = apt.fs(path)+'.git/'
+        #a worktree keeps its refs in another repository
+        if(os.path.isdir(git_dir) == False or os.path.exists(git_dir+'commondir')):
+            return None
+        if(git_dir in cls._Repos.keys()):
+            stamp,repo = cls._Repos[git_dir]
+            if(cls.stampRepo(stamp.keys()) == stamp):
+                return repo
+        #files changed this recently may change again within the same mtime
+        racy = int(time.time()*10**9) - 2*(10**9)
+
+        #every folder holding refs is stamped, as a new ref only modifies its own folder
+        ref_dirs = []
+        repo = {'head' : None, 'refs' : {}, 'remotes' : {}}
+        try:
+            with open(git_dir+'HEAD', 'r') as f:
+                head = f.read().strip()
+            if(head.startswith('ref:')):
+                repo['head'] = head[len('ref:'):].strip()
+            
+            if(cls.readRepoConfig(git_dir+'config', repo['remotes']) == False):
+                return None
+
+            if(os.path.exists(git_dir+'packed-refs')):
+                with open(git_dir+'packed-refs', 'r') as f:
+                    for line in f:
+                        #skip the header and the objects peeled from tags
+                        if(line.startswith('#') or line.startswith('^')):
+                            continue
+                        obj,_,ref = line.strip().partition(' ')
+                        if(ref.startswith('refs/heads/') or ref.startswith('refs/tags/')):
+                            repo['refs'][ref] = obj
+            #loose refs take precedence over packed refs
+            for sub in ['refs/heads/', 'refs/tags/']:
+                for root,_,files in os.walk(git_dir+sub):
+                    ref_dirs += [root]
+                    for f in files:
+                        #skip refs being written by a running git command
+                        if(f.endswith('.lock')):
+                            continue
+                        with open(os.path.join(root, f), 'r') as ref_file:
+                            obj = ref_file.read().strip()
+                        #a symbolic ref or a file that is not a ref
+                        if(re.fullmatch('[0-9a-f]{40}([0-9a-f]{24})?', obj) == None):
+                            return None
+                        ref = os.path.relpath(os.path.join(root, f), git_dir).replace(os.sep, '/')
+                        repo['refs'][ref] = obj
+        except (OSError, UnicodeDecodeError):
+            return None
+        #list refs in the same order as git
+        repo['refs'] = OrderedDict(sorted(repo['refs'].items()))
+
+        stamp = cls.stampRepo([git_dir+p for p in ['HEAD', 'config', 'packed-refs', 'refs/']] + ref_dirs)
+        #only reuse the read once nothing could still change unnoticed
+        if(max([t for t in stamp.values() if(t != None)] + [0]) < racy):
+            cls._Repos[git_dir] = (stamp, repo)
+        return repo
+
+
+    @classmethod
+    def stampRepo(cls, paths):
+        '''
+        Returns the modification times (dict) of the files and folders 'paths'
+        read from a .git/ folder, with None for those that do not exist.
+        '''
+        stamp = {}
+        for p in paths:
+            try:
+                stamp[p] = os.stat(p).st_mtime_ns
+            except OSError:
+                stamp[p] = None
+        return stamp
+
+
+    @classmethod
+    def readRepoConfig(cls, cfg_path, remotes):
+        '''
+        Reads the remote urls of a repository's config file. Only the first
+        url of each remote is kept, like `git remote get-url`.
+
+        Parameters:
+            cfg_path (str): path to the repository's config file
+            remotes (dict): remote names to fill with their urls
+        Returns:
+            (bool): false if the config uses syntax that is not read here
+        '''
+        sect = subsect = None
+        with open(cfg_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if(len(line) == 0 or line[0] == '#' or line[0] == ';'):
+                    continue
+                match = cls._CFG_SECTION.match(line)
+                if(match != None):
+                    sect,subsect = match.group(1).lower(), match.group(2)
+                    #other files, extensions, or the old '[remote.name]' syntax
+                    if(sect.startswith('include') or sect == 'extensions' or sect.count('.')):
+                        return False
+                    continue
+                match = cls._CFG_KEY.match(line)
+                #quotes, escapes, and continued lines are left to git
+                if(sect == None or match == None or \
+                    (match.group(2) != None and len(re.findall(r'["\\]', match.group(2))))):
+                    return False
+                if(sect == 'remote' and subsect != None and match.group(1).lower() == 'url'):
+                    url = re.split('[#;]', match.group(2) or '')[0].strip()
+                    if(subsect not in remotes.keys()):
+                        remotes[subsect] = url
+                pass
+        return True
+
+
+    def getTags(self):
+        '''
+        Returns the names ([str]) of all tags in the repository, sorted like
+        `git tag -l`.
+        '''
+        if(self.getRefs() == None):
+            out,_ = self.git('tag','-l')
+            return out.split()
+        return [ref[len('refs/tags/'):] for ref in self.getRefs().keys() \
+            if(ref.startswith('refs/tags/'))]
+
+
+    def catFile(self, rev, path):
+        '''
+        Reads a file as it was at a revision, such as a tag, without checking
+        it out. Reads are sent to a `git cat-file --batch` process that is kept
+        open for the repository, and fall back to `git show` if unavailable.
+
+        Parameters:
+            rev (str): the commit, branch, or tag to read from
+            path (str): the file's path from the root of the repository
+        Returns:
+            (str): the file's contents or None if it does not exist at 'rev'
+        '''
+        obj = rev+':'+path
+        batch = self.getBatch()
+        if(batch != None):
+            try:
+                batch.stdin.write(obj.encode()+b'\n')
+                batch.stdin.flush()
+                header = batch.stdout.readline().split()
+                #a missing object only answers with its name and 'missing'
+                if(len(header) == 3):
+                    data = batch.stdout.read(int(header[2])+1)[:-1]
+                    return data.decode() if(header[1] == b'blob') else None
+                elif(len(header) > 0):
+                    return None
+            except (OSError, ValueError):
+                pass
+            #stop using a process that failed to answer
+            self.closeBatch()
+            self._batch = None
+        out,err = self.git('show', obj)
+        return out if(len(err) == 0) else None
+
+
+    def archive(self, rev, dests):
+        '''
+        Writes the files as they were at a revision, such as a tag, into every
+        directory in 'dests' without checking them out. The files are read once
+        from a `git archive` stream and written straight to each directory
+        whose filter takes them, so nothing is copied in between. Symbolic
+        links are written as copies of the files or folders they point to.
+
+        Parameters:
+            rev (str): the commit, branch, or tag to write out
+            dests ([(str, funct)]): directories paired with a filter returning (bool) if a file's path from the root belongs there (None takes every file)
+        Returns:
+            (bool): true if every file was written
+        '''
+        #only pay for importing tarfile when it is used
+        import tarfile
+
+        code = ['git', '-C', self.getPath(), 'archive', '--format=tar', rev]
+        if(self.QUIET == False):
+            log.info(' '.join(code))
+        start = time.perf_counter()
+        proc = subprocess.Popen(code, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL)
+        #read errors alongside the stream so a full error pipe never stalls git
+        errs = []
+        drain = threading.Thread(target=lambda: errs.append(proc.stderr.read()), daemon=True)
+        drain.start()
+        #stop the export after the git-timeout setting like any captured command
+        timer = None
+        if(apt.getTimeout() != None):
+            timer = threading.Timer(apt.getTimeout(), proc.kill)
+            timer.start()
+
+        success = True
+        links = []
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode='r|') as tar:
+                for m in tar:
+                    #never write outside of the directories
+                    if(os.path.isabs(m.name) or '..' in m.name.split('/')):
+                        continue
+                    paths = [d+m.name for d,keep in dests if(keep == None or keep(m.name))]
+                    #every directory keeps the same folders
+                    if(m.isdir()):
+                        for d,_ in dests:
+                            os.makedirs(d+m.name, exist_ok=True)
+                    elif(m.isfile()):
+                        data = tar.extractfile(m).read()
+                        for p in paths:
+                            os.makedirs(os.path.dirname(p), exist_ok=True)
+                            with open(p, 'wb') as f:
+                                f.write(data)
+                            #give executables the same permissions as a checkout
+                            if(m.mode & 0o100):
+                                mode = os.stat(p).st_mode
+                                os.chmod(p, mode | ((mode & 0o444) >> 2))
+                    elif(m.issym()):
+                        links += [(m.name, m.linkname, paths)]
+                    pass
+            #the files links point to are only all written once the stream ends
+            for name,link,paths in links:
+                target = os.path.normpath(os.path.join(os.path.dirname(name), link)).replace('\\', '/')
+                srcs = [d+target for d,_ in dests if(os.path.isfile(d+target))]
+                #never read from outside of the directories
+                if(os.path.isabs(target) or target.split('/')[0] == '..'):
+                    srcs = []
+                #copy a linked folder within each directory, as it only holds that directory's files
+                elif(len(srcs) == 0 and os.path.isdir(dests[0][0]+target)):
+                    if(target == '.' or (name+'/').startswith(target+'/')):
+                        log.warning("Skipping symbolic link "+name+" as it points into itself.")
+                        continue
+                    for d,_ in dests:
+                        if(os.path.isdir(d+target)):
+                            shutil.copytree(d+target, d+name)
+                    continue
+                if(len(srcs) == 0):
+                    log.warning("Skipping symbolic link "+name+" as "+link+" is not found within "+rev+".")
+                    continue
+                for p in paths:
+                    os.makedirs(os.path.dirname(p), exist_ok=True)
+                    shutil.copy(srcs[0], p)
+        except (tarfile.TarError, OSError):
+            success = False
+        finally:
+            if(timer != None):
+                timer.cancel()
+            #read the padding after the archive's end so git is not cut off
+            if(success):
+                proc.stdout.read()
+            proc.stdout.close()
+            rc = proc.wait()
+            drain.join()
+            proc.stderr.close()
+            err = b''.join(errs).decode(errors='replace').strip()
+
+        apt.CALLS += [(' '.join(code), time.perf_counter()-start, rc)]
+        log.debug("{:.3f} s (code {}): {}".format(*apt.CALLS[-1][1:], apt.CALLS[-1][0]))
+        if(rc != 0 or success == False):
+            log.error("Failed to export "+rev+" from "+self.getPath()+(": "+err if(len(err)) else "."))
+            return False
+        return True
+
+
+    def getBatch(self):
+        '''
+        Starts the repository's `git cat-file --batch` process if it is not
+        already running. A process started before this one forked is not
+        shared, since a read in one process would interleave with the other.
+
+        Parameters:
+            None
+        Returns:
+            self._batch (Popen): the process, or None if it cannot be started
+        '''
+        if(hasattr(self, '_batch') and (self._batch == None or self._batch_pid == os.getpid())):
+            return self._batch
+        self._batch_pid = os.getpid()
+        try:
+            self._batch = subprocess.Popen(['git', '-C', self.getPath(), 'cat-file', '--batch'], \
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError:
+            self._batch = None
+            return None
+        #close all batch processes together once finished
+        if(len(Git._Batches) == 0):
+            atexit.register(Git.closeBatches)
+        Git._Batches += [self._batch]
+        return self._batch
+
+
+    def closeBatch(self):
+        '''Stops the repository's `git cat-file --batch` process, if running.'''
+        if(hasattr(self, '_batch') and self._batch != None and self._batch_pid == os.getpid()):
+            Git._Batches.remove(self._batch)
+            Git.stopBatch(self._batch)
+            delattr(self, '_batch')
+        pass
+
+
+    @classmethod
+    def closeBatches(cls):
+        '''Stops every `git cat-file --batch` process this process started.'''
+        for batch in cls._Batches:
+            cls.stopBatch(batch)
+        cls._Batches = []
+        pass
+
+
+    @classmethod
+    def stopBatch(cls, batch):
+        '''Closes the input of the `git cat-file --batch` process 'batch' so it
+        exits, and waits on it.'''
+        try:
+            batch.stdin.close()
+            batch.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            batch.kill()
+        pass
         
 
     def getPath(self):
@@ -404,6 +839,12 @@ class Git:
         return self.getRemoteURL() != ''
 
 
+    def __getstate__(self):
+        '''Returns only the _path (str) attr to pickle into a workspace snapshot
+        since the repository's branch and remote are read again when needed.'''
+        return {'_path' : self._path}
+
+
     # uncomment to use for debugging
     # def __str__(self):
     #     return f'''
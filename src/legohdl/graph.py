@@ -7,9 +7,10 @@
 #   tree from the DAG generated by legohdl. Performs topological sort.
 # ------------------------------------------------------------------------------
 
+import heapq
 import logging as log
 
-from .map import Map
+from .map import Map, FastMap
 
 
 class Graph:
@@ -21,16 +22,21 @@ class Graph:
         representation.
         '''
         #store with adjacency list (list of vertices...sparse graph)
-        self._adj_list = Map()
+        self._adj_list = FastMap()
         #store the reverse connections in an adjacency list
-        self._rev_adj_list = Map()
+        self._rev_adj_list = FastMap()
+        #store the pairs within each adjacency list to check for edges in constant time
+        self._edges = set()
+        self._rev_edges = set()
         pass
 
 
     def clear(self):
         '''Empty the graph data structures.'''
-        self._adj_list = Map()
-        self._rev_adj_list = Map()
+        self._adj_list = FastMap()
+        self._rev_adj_list = FastMap()
+        self._edges = set()
+        self._rev_edges = set()
         pass
 
 
@@ -65,10 +71,12 @@ class Graph:
         self.addVertex(integral)
         self.addVertex(derivative)
         #add dependency relation between derivative and integral
-        if(derivative not in self._adj_list[integral]):
+        if((integral, derivative) not in self._edges):
+            self._edges.add((integral, derivative))
             self._adj_list[integral].append(derivative)
         #store up-stream variation
-        if(integral not in self._rev_adj_list[derivative]):
+        if((derivative, integral) not in self._rev_edges):
+            self._rev_edges.add((derivative, integral))
             self._rev_adj_list[derivative].append(integral)
         pass
 
@@ -83,9 +91,13 @@ class Graph:
             None
         '''
         if(u in self._adj_list.keys()):
+            for v in self._adj_list[u]:
+                self._edges.discard((u, v))
             del self._adj_list[u]
         #store up-stream variation
         if(u in self._rev_adj_list.keys()):
+            for v in self._rev_adj_list[u]:
+                self._rev_edges.discard((u, v))
             del self._rev_adj_list[u]
         pass
 
@@ -100,11 +112,13 @@ class Graph:
         Returns:
             None
         '''
+        self._edges.discard((integral, derivative))
         if(derivative in self._adj_list[integral]):
             self._adj_list[integral].remove(derivative)
         #remove from upstream variation
-        if(integral in self._adj_list[derivative]):
-            self._adj_list[derivative].remove(integral)
+        self._rev_edges.discard((derivative, integral))
+        if(integral in self._rev_adj_list[derivative]):
+            self._rev_adj_list[derivative].remove(integral)
         pass
 
 
@@ -126,31 +140,51 @@ class Graph:
         order = [] 
         #store list of blocks in their correct order
         block_order = [] 
+        #remember which blocks are already in the block order
+        added_blocks = set()
 
-        nghbr_cnt = Map()
+        vertices = list(self._adj_list.keys())
+        position = dict()
+        nghbr_cnt = dict()
         #determine number of dependencies a vertex has
-        for v in self._adj_list.keys():
+        for i,v in enumerate(vertices):
+            position[v] = i
             nghbr_cnt[v] = len(self._adj_list[v])
 
-        #continue until all are transferred
-        while len(order) < len(self._adj_list):
-            #if a vertex has zero dependencies, add it to the list
-            for unit in nghbr_cnt.keys():
-                if nghbr_cnt[unit] == 0:
-                    #add unit object to list
-                    order.append(unit)
-                    #add block name to list
-                    if(unit.getLanguageFile().getOwner() not in block_order):
-                        block_order += [unit.getLanguageFile().getOwner()]
-                    #will not be recounted
-                    nghbr_cnt[unit] = -1 
-                    #who all depends on this module?
-                    for k in self._adj_list.keys():
-                        if(unit in self._adj_list[k]):
-                            #decrement every vertex dep count that depended on recently added vertex
-                            nghbr_cnt[k] = nghbr_cnt[k] - 1
+        #vertices are added in passes over the vertex list, so a vertex freed up
+        #ahead of the current position joins this pass and one freed up behind it
+        #waits for the next pass (keeps a stable order between calls)
+        this_pass = [i for i in range(len(vertices)) if(nghbr_cnt[vertices[i]] == 0)]
+        next_pass = []
+        while len(this_pass):
+            pos = heapq.heappop(this_pass)
+            unit = vertices[pos]
+            #add unit object to list
+            order.append(unit)
+            #add block to list
+            owner = unit.getLanguageFile().getOwner()
+            if(owner not in added_blocks):
+                added_blocks.add(owner)
+                block_order += [owner]
+            #decrement every vertex dep count that depended on recently added vertex
+            for k in self._rev_adj_list[unit]:
+                if(k not in nghbr_cnt.keys()):
                     continue
+                nghbr_cnt[k] -= 1
+                if(nghbr_cnt[k] == 0):
+                    if(position[k] > pos):
+                        heapq.heappush(this_pass, position[k])
+                    else:
+                        heapq.heappush(next_pass, position[k])
                 pass
+            #begin the next pass
+            if(len(this_pass) == 0):
+                this_pass, next_pass = next_pass, []
+            pass
+
+        #units left unsorted are waiting on each other
+        if(len(order) < len(vertices)):
+            self.checkCycles()
 
         if(len(block_order) == 0):
             exit(log.error("Invalid current block, try adding an HDL file."))
@@ -162,111 +196,215 @@ class Graph:
         return order,block_order
 
 
+    def findCycle(self):
+        '''
+        Searches the graph for a circular dependency using Tarjan's strongly
+        connected components algorithm. Runs iteratively in linear time.
+
+        Parameters:
+            None
+        Returns:
+            cycle ([Unit]): units along a cycle (first unit repeated at end) or empty if none
+        '''
+        adj = {v : self._adj_list[v] for v in self._adj_list.keys()}
+        index = dict()
+        low = dict()
+        stack = []
+        on_stack = set()
+
+        for root in adj.keys():
+            if(root in index.keys()):
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            #track each visited vertex and the next neighbor to explore
+            work = [(root, 0)]
+            while len(work):
+                v,i = work[-1]
+                #explore the next neighbor
+                if(i < len(adj[v])):
+                    work[-1] = (v, i+1)
+                    w = adj[v][i]
+                    if(w not in adj.keys()):
+                        continue
+                    if(w not in index.keys()):
+                        index[w] = low[w] = len(index)
+                        stack.append(w)
+                        on_stack.add(w)
+                        work.append((w, 0))
+                    elif(w in on_stack):
+                        low[v] = min(low[v], index[w])
+                    continue
+                #all neighbors are explored
+                work.pop()
+                if(len(work)):
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if(low[v] != index[v]):
+                    continue
+                #pop off the strongly connected component rooted at v
+                scc = set()
+                while True:
+                    w = stack.pop()
+                    on_stack.remove(w)
+                    scc.add(w)
+                    if(w == v):
+                        break
+                if(len(scc) > 1 or v in adj[v]):
+                    #walk within the component until a unit repeats
+                    path = [v]
+                    visited = {v : 0}
+                    while True:
+                        nxt = [w for w in adj[path[-1]] if(w in scc)][0]
+                        if(nxt in visited.keys()):
+                            return path[visited[nxt]:] + [nxt]
+                        visited[nxt] = len(path)
+                        path.append(nxt)
+                pass
+            pass
+
+        return []
+
+
+    def checkCycles(self):
+        '''
+        Exits with error if the graph contains a circular dependency, printing
+        the units along the cycle.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        cycle = self.findCycle()
+        if(len(cycle)):
+            exit(log.error("Circular dependency detected: "+' -> '.join([u.getTitle() for u in cycle])))
+        pass
+
+
     #only display entities in the tree (no package units)
-    def output(self, top, leaf='+-', disp_full=False, ref_points=Map(), compress=False):
+    def output(self, top, leaf='+-', disp_full=False, ref_points=Map(), compress=False, depth=None):
         '''
         Formats and prints the current entity's dependency graph.
 
-        Recursive method.
+        Walks the tree depth-first with an explicit stack of units left to 
+        display, so deep hierarchies do not reach python's recursion limit.
+        Lines are collected in a list while the uses of each reference point
+        are counted, then references are lettered in one final pass.
 
         Parameters:
             top (Unit): top-level unit to start graph from
-            leaf (str): inner-recursive parameter to see what parent leaf was
+            leaf (str): leaf to display the top-level unit with
             disp_full (bool): determine how to display entity (with full block title?)
             ref_points (Map): mapping for unit names/branchs to letters
             compress (bool): determine if to compress graph using reference points
+            depth (int): number of levels to display below the top-level unit (None for all)
         Returns:  
-            None
+            (str): the formatted dependency tree
         '''
-        edge_branch = '\-'
+        edge_branch = '\\-'
         reg_branch = '+-'
         twig = '|'
         spaces = 2
         first = (leaf == reg_branch)
-        txt = ''
+        #graph-lines as (text before the reference point, reference point)
+        lines = []
+        #number of lines each reference point appears on
+        uses = dict()
 
-        #print title if method is on top-level entity
-        if(first):
-            txt = '--- DEPENDENCY TREE ---' + '\n'
-        
         #make sure a unit is passed as top
         if(top == None):
             return 'N/A'
 
-        #start with top level
-        if(top not in self._adj_list.keys()):
-            exit(log.error('Entity '+top.E()+' may be missing an architecture.'))
+        #references are left as is when the top-level unit was already referenced
+        cleanup = (compress and first and top not in ref_points.keys())
 
-        #skip reference point if compress is not set
-        ref = ''
-        if(compress == False):
-            pass
-        #add to reference points
-        elif(top in ref_points.keys()):
-            ref = str(ref_points[top])
-        #do not use reference if lowest-level entity
-        elif(len(self._adj_list[top]) == 0):
-            ref = ''
-        #create new reference point
-        else:
-            ref = '['+str(len(ref_points))+']'
-
-        #only display units
-        if(not top.isPkg()):
-            temp_leaf = leaf
-            #skip first bar because everything is under top-level entity
-            if(not first):
-                temp_leaf = ' '+leaf[1:]
-            else:
-                temp_leaf = temp_leaf.replace(reg_branch, edge_branch)
-            #print to console
-            node = top.getFull()
-            if(disp_full):
-                node = top.getTitle()
-            #add this graph-line to the text
-            txt = txt + temp_leaf+' '+node+' '+ref+'\n'
-            pass
+        #units left to display paired with their leaf and level (next unit on top)
+        stack = [(top, leaf, 0)]
+        while len(stack):
+            unit, leaf, level = stack.pop()
+            #start with top level
+            if(unit not in self._adj_list.keys()):
+                exit(log.error('Entity '+unit.E()+' may be missing an architecture.'))
 
-        #return if no children exist or already referenced in compression
-        if(len(self._adj_list) == 0 or (compress and top in ref_points.keys())):
-            return txt
+            #children below the depth limit are not displayed
+            cutoff = (depth != None and level >= depth)
 
-        #add the point to the reference mapping
-        if(top not in ref_points.keys()):
-            ref_points[top] = ref
-
-        #go through all entity's children
-        for sub_entity in self._adj_list[top]:
-            #add twig if the parent was not an edge branch
-            if(leaf.count(reg_branch)):
-                next_leaf = leaf[0:len(leaf)-2] + twig
-            else:
-                next_leaf = leaf[0:len(leaf)-2] + ' '
-
-            #add extra spacing between parent and its children levels
-            next_leaf = next_leaf + ' '*spaces
-                
-            #add \ if its an edge branch
-            if(sub_entity == self._adj_list[top][-1]): 
-                next_leaf = next_leaf + edge_branch
-            #use + if a regular branch
+            #skip reference point if compress is not set
+            ref = ''
+            if(compress == False):
+                pass
+            #add to reference points
+            elif(unit in ref_points.keys()):
+                ref = str(ref_points[unit])
+            #do not use reference if lowest-level entity or its children are cut off
+            elif(len(self._adj_list[unit]) == 0 or cutoff):
+                ref = ''
+            #create new reference point
             else:
-                next_leaf = next_leaf + reg_branch
+                ref = '['+str(len(ref_points))+']'
+
+            #only display units
+            if(not unit.isPkg()):
+                temp_leaf = leaf
+                #skip first bar because everything is under top-level entity
+                if(leaf != reg_branch):
+                    temp_leaf = ' '+leaf[1:]
+                else:
+                    temp_leaf = temp_leaf.replace(reg_branch, edge_branch)
+                #print to console
+                node = unit.getFull()
+                if(disp_full):
+                    node = unit.getTitle()
+                #add this graph-line to the text
+                lines += [(temp_leaf+' '+node+' ', ref)]
+                uses[ref] = uses.get(ref, 0) + 1
+                pass
 
-            #recursive call
-            txt = txt + self.output(sub_entity, next_leaf, ref_points=ref_points, compress=compress, disp_full=disp_full)
+            #skip children if none exist, already referenced in compression, or past the depth
+            if(len(self._adj_list) == 0 or (compress and unit in ref_points.keys()) or cutoff):
+                continue
+
+            #add the point to the reference mapping
+            if(unit not in ref_points.keys()):
+                ref_points[unit] = ref
+
+            #go through all entity's children
+            children = []
+            for sub_entity in self._adj_list[unit]:
+                #add twig if the parent was not an edge branch
+                if(leaf.count(reg_branch)):
+                    next_leaf = leaf[0:len(leaf)-2] + twig
+                else:
+                    next_leaf = leaf[0:len(leaf)-2] + ' '
+
+                #add extra spacing between parent and its children levels
+                next_leaf = next_leaf + ' '*spaces
+                    
+                #add \ if its an edge branch
+                if(sub_entity == self._adj_list[unit][-1]): 
+                    next_leaf = next_leaf + edge_branch
+                #use + if a regular branch
+                else:
+                    next_leaf = next_leaf + reg_branch
+
+                children += [(sub_entity, next_leaf, level+1)]
+                pass
+            #display the first child next
+            stack += reversed(children)
             pass
 
         #clean up the graph during compression
-        if(compress and first):
+        remap = dict()
+        if(cleanup):
             #remove all reference points that only appear once
             remap_cnt = 0
             for i in range(0,len(ref_points)):
                 rp = '['+str(i)+']'
-                rp_cnt = txt.count(rp)
                 #delete the reference point if was unused (not appear >1)
-                if(rp_cnt <= 1):
-                    txt = txt.replace(rp, '')
+                if(uses.get(rp, 0) <= 1):
+                    remap[rp] = ''
                     continue
                 #compute reference point into string of characters
                 ascii_len = remap_cnt
@@ -276,12 +414,16 @@ class Graph:
                     ascii_len = int(int(ascii_len)/26)-1
                     new_rp = str(chr((ascii_len%26)+65)) + new_rp
                 #replace old reference with new reference point
-                txt = txt.replace(rp, '['+str(new_rp)+']')
+                remap[rp] = '['+str(new_rp)+']'
                 #increment the number of reference remaps
                 remap_cnt += 1
                 pass
-            
-        return txt
+
+        txt = [line+remap.get(ref, ref)+'\n' for line,ref in lines]
+        #print title if method is on top-level entity
+        if(first):
+            txt = ['--- DEPENDENCY TREE ---' + '\n'] + txt
+        return ''.join(txt)
 
 
     def getNeighbors(self, vertex, upstream=False):
@@ -71,6 +71,9 @@ class GUI:
         'general.mixed-language' : WIDGET.SWITCH,
         'general.multi-develop' : WIDGET.SWITCH,
         'general.refresh-rate' : WIDGET.NUMBER,
+        'general.jobs' : WIDGET.NUMBER,
+        'general.stream-limit' : WIDGET.NUMBER,
+        'general.git-timeout' : WIDGET.NUMBER,
         #---label section keys---
         'label.local' : WIDGET.TABLE,
         'label.global' : WIDGET.TABLE,
@@ -97,6 +100,17 @@ class GUI:
 Max value is 1440 (every minute). Evenly divides the refresh points throughout the 24-hour day. \
 This automates the 'refresh' command.",
 
+        'jobs' :
+"How many worker processes to use when analyzing HDL files. Set to 0 to use every available CPU.",
+
+        'stream-limit' :
+"The most tokens to keep in memory across analyzed HDL files. A file's tokens are dropped once its units \
+are decoded and are read again from the parse cache when needed. Set to 0 to keep every file's tokens.",
+
+        'git-timeout' :
+"How many seconds to wait on a command whose output legoHDL reads before stopping it. This covers \
+every git command, from a local status check to a clone or a push. Set to 0 to wait until every command finishes.",
+
         'template' : 
 "The path to copy a template folder when making a new block. If an empty assignment, \
 it will use the built-in template folder.",
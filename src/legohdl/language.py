@@ -10,16 +10,47 @@
 #   A file (language) has entities. A file object's role is to create the 
 #   entities/design units from its code, depending on if its 1 of the 2 
 #   supported languages: VHDL or verilog.
+#
+#   The results of analyzing a file are stored in the workspace's parse cache
+#   so unchanged files are not tokenized again on the next run.
 # ------------------------------------------------------------------------------
 
-import re
+import os, re, io, json, hashlib, bisect, time, contextlib
+import logging as log
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 from .apparatus import Apparatus as apt
+from .unit import Unit
+from .map import FastMap
 
 
 class Language(ABC):
 
+    #increment when the tokenizer or design identification changes to drop stale entries
+    CACHE_VERSION = 1
+
+    #compiled regular expressions shared by every file of the same language
+    _Scanners = {}
+
+    #separates tokens while a file's code is analyzed as a single string
+    TOKEN_DELIM = '\x00'
+
+    #entries prepared ahead of time by preload() (keyed by file path)
+    _Preloaded = dict()
+
+    #total number of tokens held by the entries in _Preloaded while bounded
+    _PreloadedTokens = 0
+
+    #most tokens to keep in memory across all code streams (0 keeps every stream)
+    StreamLimit = 0
+
+    #files holding a code stream while bounded, mapped to their token counts (least recently used first)
+    _Resident = OrderedDict()
+
+    #total number of tokens held by the files in _Resident
+    _ResidentTokens = 0
+
 
     def __init__(self, fpath, block):
         '''
@@ -39,6 +70,11 @@ class Language(ABC):
 
         self._multi = ('/*', '*/')
         self._preprocessor = None
+        #statement keywords to index for jumping through the code stream
+        self._keywords = []
+
+        #ordered record of design data identified in this file (written to parse cache)
+        self._events = []
         pass
     
     
@@ -58,17 +94,97 @@ class Language(ABC):
         pass
     
 
-    @abstractmethod
     def decode(self, u, recursive=True):
         '''
         Decipher and collect data on a unit's instantiated lower-level entities.
 
+        Lower-level units are decoded depth-first as soon as they are found, 
+        exactly like nested calls would, but with an explicit stack of paused
+        decodes so deep hierarchies do not reach python's recursion limit. A
+        unit already being decoded further up the stack is not entered again 
+        (circular dependency).
+
         Parameters:
             u (Unit): the unit file who's interface to update
             recursive (bool): determine if to tunnel through entities
         Returns:
             None
         '''
+        stack = [(u, self.trace(u, recursive))]
+        visiting = {u}
+        while len(stack):
+            sub = next(stack[-1][1], None)
+            #the unit on top of the stack is finished
+            if(sub == None):
+                visiting.remove(stack.pop()[0])
+            #pause the current decode to decode the lower-level unit first
+            elif(sub.isChecked() == False and recursive and sub not in visiting):
+                visiting.add(sub)
+                stack.append((sub, sub.getLanguageFile().trace(sub, recursive)))
+            pass
+        pass
+
+
+    def trace(self, u, recursive):
+        '''
+        Decodes a single unit while recording every operation it performs on
+        the hierarchy into Unit.Traces. If the unit's operations are already 
+        recorded, they are replayed instead without reading any code.
+
+        Parameters:
+            u (Unit): the unit file who's interface to update
+            recursive (bool): determine if to tunnel through entities
+        Returns:
+            (generator): yields every lower-level unit found (Unit)
+        '''
+        #do not decode unit again if already decoded
+        if(u.isChecked()):
+            return
+
+        if(u in Unit.Traces.keys()):
+            for op,arg in Unit.Traces[u]:
+                if(op == 'r'):
+                    u.addReq(arg)
+                elif(op == 'y'):
+                    yield arg
+                elif(op == 'c'):
+                    u.setChecked(True)
+                elif(op == 'l'):
+                    u.linkLibs(arg[0], arg[1])
+                #lookups ('i') are only kept to check if the trace is still valid
+                pass
+            return
+
+        Unit.Tracing[u] = []
+        decoding = self._decode(u, recursive)
+        while True:
+            #lookups made while this unit's decoding runs belong to it
+            prev = Unit.Tracing_Now
+            Unit.Tracing_Now = u
+            try:
+                sub = next(decoding)
+            except StopIteration:
+                break
+            finally:
+                Unit.Tracing_Now = prev
+            Unit.Tracing[u] += [('y', sub)]
+            yield sub
+        Unit.Traces[u] = Unit.Tracing.pop(u)
+        pass
+
+
+    @abstractmethod
+    def _decode(self, u, recursive):
+        '''
+        Decodes a single unit, yielding each lower-level unit found that may 
+        need to be decoded before continuing (see decode).
+
+        Parameters:
+            u (Unit): the unit file who's interface to update
+            recursive (bool): determine if to tunnel through entities
+        Returns:
+            (generator): yields lower-level units (Unit) to decode
+        '''
         pass
 
 
@@ -135,6 +251,8 @@ class Language(ABC):
         Uses _join_dots (bool) to determine if to join left and right side of dots together
         
         Dynamically creates attr _code_stream so the operation can be reused.
+        When a StreamLimit is set, the stream may later be dropped and is then
+        re-materialized here from the parse cache or the file.
 
         Parameters:
             None
@@ -143,141 +261,308 @@ class Language(ABC):
         '''
         #dynamic return once operation has been performed
         if(hasattr(self, "_code_stream")):
+            if(Language.StreamLimit > 0):
+                self.holdStream()
+            return self._code_stream
+
+        #try to reuse the statements from a previous run
+        if(self.loadCache()):
+            if(Language.StreamLimit > 0):
+                self.holdStream()
             return self._code_stream
 
         self._code_stream = []
 
-        #current statement
-        statement = []
-        in_multi = False
+        scanner, merger, atomizer = self.getScanners()
+        Z = self.TOKEN_DELIM
+        #break all remaining code into tokens each preceded by a null character
+        tokens = Z+Z.join(scanner.findall(self._stripComments()))+Z
+        #combine dual characters together and join LHS and RHS of dots
+        if(merger['fast'] and not any([c in tokens for c in merger['conflicts']])):
+            if(merger['dots'] != None):
+                tokens = merger['dots'].sub('.', tokens)
+            for dual,repl in merger['duals']:
+                tokens = dual.sub(repl, tokens)
+        else:
+            tokens = merger['exact'].sub(self._mergeTokens, tokens)
+        #separate special keywords into their own statements
+        tokens = atomizer.sub(Z+';\\1;', tokens)
+
+        #split into statements and only add non empty statement lists
+        for statement in tokens.split(';'):
+            statement = statement.strip(self.TOKEN_DELIM)
+            if(len(statement)):
+                self._code_stream.append(statement.split(self.TOKEN_DELIM))
+            pass
 
-        #read the HDL file to break into words
-        with open(self.getPath(), 'r') as file:
-            #transform lines into statements
-            code = file.readlines()
-            line_cnt = 0
-            for line in code:
-                line_cnt += 1
-                #strip off an excessive whitespace
-                line = line.strip()
+        if(Language.StreamLimit > 0):
+            self.holdStream()
+        return self._code_stream
 
-                # :todo: determine if inside a string to use '--' inside a string
 
-                #skip preprocessor directives
-                if(self._preprocessor != None):
-                    preproc_index = line.find(self._preprocessor)
-                    if(preproc_index > -1):
-                        line = line[:preproc_index]
+    def holdStream(self):
+        '''
+        Marks this file's code stream as the most recently used one and drops 
+        the least recently used streams of other files until the tokens held 
+        fit within the StreamLimit. Only called when a StreamLimit is set.
 
-                #reduce down to valid code (non-comments)
-                c_index = line.find(self._comment)
-                if(c_index > -1):
-                    line = line[:c_index]
-                #find a beginning to a multi-line comment section
-                m0_index = line.find(self._multi[0])
-                if(m0_index > -1):
-                    line_l = line[:m0_index]
-                #find an end to a multi-line comment section
-                m1_index = line.find(self._multi[1])
-                if(m1_index > -1):
-                    in_multi = False
-                    #trim everything within the comment section
-                    line_r = line[m1_index+len(self._multi[1]):]
-                #reset line if a multi-line comment was detected
-                if(m0_index > -1 or m1_index > -1):
-                    line = ''
-                #add lhs of multi-line comment
-                if(m0_index > -1):
-                    line = line_l
-                #add rhs of multi-line comment
-                if(m1_index > -1):
-                    line = line + line_r
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        resident = Language._Resident
+        if(self in resident.keys()):
+            #move to the back of the line
+            resident.move_to_end(self)
+            return
+        #files tokenized by a parallel worker are not tracked
+        if(self.getOwner() == None):
+            return
+        resident[self] = sum([len(cseg) for cseg in self._code_stream])
+        Language._ResidentTokens += resident[self]
+        #drop the least recently used streams (never the one being handed out)
+        for hdl in list(resident.keys()):
+            if(Language._ResidentTokens + Language._PreloadedTokens <= Language.StreamLimit):
+                break
+            if(hdl == self):
+                continue
+            hdl.dropStream()
+        pass
 
-                #skip if line is blank or within a multi-line comment section
-                if(((len(line) == 0 and m0_index <= -1) or in_multi) and line_cnt < len(code)):
-                    continue
-                #enter the mult-line comment section for next line
-                if(m0_index > -1 and m1_index <= -1):
-                    in_multi = True
-                
-                #make sure certain characters will be their own items in the statement
-                for sep in self._seps:
-                    line = line.replace(sep, ' '+sep+' ')
-
-                #find the ';' and create new statements if found
-                sc_index = -1
-                while line.count(';') or line_cnt == len(code):
-                    sc_index = line.find(';')
-                    #no ';' was found but the rest of the code must be collected
-                    if(sc_index == -1 and len(code) == line_cnt):
-                        sc_index = len(line)
-                        line_cnt += 1
-
-                    #split the statement into a list of its words
-                    statement += line[:sc_index].split()
-
-                    #skip any empty statements
-                    if(len(statement) == 0):
-                        continue
-
-                    #combine dual characters together
-                    statement_final = []
-                    for i in range(len(statement)-1):
-                        for dc in self._dual_chars:
-                            if(statement[i] == dc[0] and statement[i+1] == dc[1]):
-                                statement_final.append(dc)
-                                #make empty so these indices don't get added
-                                statement[i] = ''
-                                statement[i+1] = '' 
-                                continue
-                        #join LHS and RHS of dots
-                        if(self._join_dots and statement[i+1] == '.' and i < len(statement)-1):
-                            statement[i+2] = statement[i] + statement[i+1] + statement[i+2]
-                            #make empty so these indices don't get added
-                            statement[i+1] = ''
-                            statement[i] = ''
-                            pass
-                        #add all non-blank tokens
-                        if(statement[i] != ''):
-                            statement_final.append(statement[i])
-                        pass
-
-                    #make sure to add last item
-                    if(statement[-1] != ''):
-                            statement_final.append(statement[-1])
-
-                    #separate special keywords into their own statement lists
-                    for word in statement_final:
-                        if(word.lower() in self._atomics):
-                            #find index where the atomic word is in the statement
-                            a_i = statement_final.index(word)
-                            #split the statement
-                            if(len(statement_final[:a_i])):
-                                self._code_stream += [statement_final[:a_i]]
-                            self._code_stream += [[word]]
-                            #update remaining pieces of the statement
-                            statement_final = statement_final[a_i+1:]
-                        pass
-                    #only add non empty statement lists
-                    if(len(statement_final) > 0):
-                        self._code_stream += [statement_final]
-                    statement = []
-                    #update remaining line string
-                    line = line[sc_index+1:]
-                    #reset semi-colon index
-                    sc_index = -1
-                    pass
-
-                #add any code after ';'
-                statement += line[sc_index+1:].split()
+
+    def dropStream(self):
+        '''
+        Releases this file's code stream and statement index from memory. Both
+        are created again on their next use.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        if(self in Language._Resident.keys()):
+            Language._ResidentTokens -= Language._Resident.pop(self)
+        if(hasattr(self, "_code_stream")):
+            delattr(self, "_code_stream")
+        #offsets could go stale if the file changes before the stream is read again
+        if(hasattr(self, "_index")):
+            delattr(self, "_index")
+        pass
+
+
+    def releaseStream(self):
+        '''
+        Drops the code stream once every design unit in this file is decoded, 
+        when a StreamLimit is set.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        if(Language.StreamLimit == 0 or hasattr(self, "_designs") == False):
+            return
+        for u in self._designs:
+            if(u.isChecked() == False):
+                return
+        self.dropStream()
+        pass
+
+
+    def getIndex(self, keyword):
+        '''
+        Returns the offsets of every statement in the code stream that begins
+        with `keyword` (case-insensitive). Only keywords listed in _keywords
+        are indexed.
+
+        Dynamically creates attr _index so the code stream is only walked once.
+
+        Parameters:
+            keyword (str): the first word of the statements to find
+        Returns:
+            ([int]): ascending offsets into the code stream
+        '''
+        if(hasattr(self, "_index") == False):
+            self._index = FastMap()
+            for k in self._keywords:
+                self._index[k] = []
+            for i,cseg in enumerate(self.spinCode()):
+                if(cseg[0].lower() in self._index.keys()):
+                    self._index[cseg[0]] += [i]
                 pass
-            pass
 
-        for cs in self._code_stream:
-            #if(self.getPath().endswith('adder.vhd')):
-                #print(cs)
+        if(keyword.lower() in self._index.keys()):
+            return self._index[keyword]
+        return []
+
+
+    def findStatement(self, keyword, start=0):
+        '''
+        Returns the offset of the first statement at or after `start` that
+        begins with `keyword` (case-insensitive).
+
+        Parameters:
+            keyword (str): an indexed keyword from _keywords
+            start (int): offset in the code stream to begin searching from
+        Returns:
+            (int): statement offset, or the code stream's length if not found
+        '''
+        offsets = self.getIndex(keyword)
+        i = bisect.bisect_left(offsets, start)
+        if(i < len(offsets)):
+            return offsets[i]
+        return len(self.spinCode())
+
+
+    def getScanners(self):
+        '''
+        Returns the compiled regular expressions used to analyze code for this
+        language. They are compiled once per language and shared across all of
+        its files.
+
+        The scanner breaks code into tokens where ';' and every character in 
+        _seps is its own token, and all other characters are grouped into words 
+        split by whitespace. The merger finds dual characters and dots to join
+        between tokens (separated by TOKEN_DELIM). It holds the 'exact' pattern
+        that resolves every token left-to-right, along with quicker 'dots' and
+        'duals' passes that are only used when none of the 'conflicts' appear
+        in the tokens. The atomizer finds any _atomics tokens.
+
+        Assumes every item in _seps is a single character.
+
+        Parameters:
+            None
+        Returns:
+            scanner (re.Pattern): splits code into tokens
+            merger (dict): patterns that find tokens to combine
+            atomizer (re.Pattern): finds tokens that deserve their own statement
+        '''
+        key = (type(self), tuple(self._seps), tuple(self._dual_chars), tuple(self._atomics), self._join_dots)
+        if(key in Language._Scanners.keys()):
+            return Language._Scanners[key]
+
+        Z = self.TOKEN_DELIM
+        seps = re.escape(''.join(self._seps))
+        scanner = re.compile(';|['+seps+']|[^\\s;'+Z+seps+']+')
+
+        #a token must be surrounded by delimiters
+        tail = '(?='+Z+')'
+        duals = '|'.join([re.escape(dc[0])+Z+re.escape(dc[1]) for dc in self._dual_chars])
+        chain = '(?:'+Z+'\\.'+Z+'[^'+Z+';]+)'
+        merger = dict()
+        if(self._join_dots):
+            #a dot directly after a dual character has an empty LHS
+            merger['exact'] = re.compile(Z+'(?:('+duals+')'+tail+'('+chain+'*)|([^'+Z+';]+)('+chain+'+))')
+            #a dot needs a LHS and RHS within the same statement
+            merger['dots'] = re.compile(Z+'(?<=[^'+Z+';]'+Z+')\\.'+Z+'(?=[^'+Z+';])')
+        else:
+            merger['exact'] = re.compile(Z+'('+duals+')'+tail)
+            merger['dots'] = None
+        #each dual character can be combined on its own in a quicker pass
+        merger['duals'] = []
+        for dc in self._dual_chars:
+            merger['duals'] += [(re.compile(Z+re.escape(dc[0])+Z+re.escape(dc[1])+tail), Z+dc.replace('\\', '\\\\'))]
+        #the quicker passes only agree with the exact merger when no dual
+        #character precedes a dot and no two dual characters overlap
+        merger['conflicts'] = []
+        for dc in self._dual_chars:
+            if(self._join_dots and Z+dc[1]+Z+'.'+Z not in merger['conflicts']):
+                merger['conflicts'] += [Z+dc[1]+Z+'.'+Z]
+            for other in self._dual_chars:
+                if(dc != other and dc[1] == other[0]):
+                    merger['conflicts'] += [Z+dc[0]+Z+dc[1]+Z+other[1]+Z]
+        merger['fast'] = all([len(dc) == 2 for dc in self._dual_chars])
+
+        atomics = '|'.join([re.escape(a) for a in self._atomics])
+        atomizer = re.compile(Z+'('+atomics+')'+tail, re.IGNORECASE)
+
+        Language._Scanners[key] = (scanner, merger, atomizer)
+        return Language._Scanners[key]
+
+
+    def _mergeTokens(self, match):
+        '''
+        Returns the combined text for a dual character and/or a series of tokens
+        joined by dots found by the merger.
+
+        Parameters:
+            match (re.Match): a match from the merger
+        Returns:
+            (str): the combined token(s)
+        '''
+        Z = self.TOKEN_DELIM
+        #combine dual characters
+        if(match.group(1) != None):
+            merged = Z + match.group(1).replace(Z, '')
+            #dots following the dual character start a new token
+            if(self._join_dots and len(match.group(2))):
+                merged = merged + Z + match.group(2).replace(Z, '')
+            return merged
+        #join LHS and RHS of dots
+        return Z + (match.group(3) + match.group(4)).replace(Z, '')
+
+
+    def _stripComments(self):
+        '''
+        Reads the HDL file and removes all comments and preprocessor directives.
+        
+        Comments are detected line-by-line using _comment, _multi, and
+        _preprocessor.
+
+        Parameters:
+            None
+        Returns:
+            (str): remaining code with lines joined by newlines
+        '''
+        code_lines = []
+        in_multi = False
+
+        with open(self.getPath(), 'r') as file:
+            code = file.readlines()
+
+        last_line = len(code)
+        line_cnt = 0
+        for line in code:
+            line_cnt += 1
+            #strip off an excessive whitespace
+            line = line.strip()
+
+            # :todo: determine if inside a string to use '--' inside a string
+
+            #skip preprocessor directives
+            if(self._preprocessor != None):
+                preproc_index = line.find(self._preprocessor)
+                if(preproc_index > -1):
+                    line = line[:preproc_index]
+
+            #reduce down to valid code (non-comments)
+            c_index = line.find(self._comment)
+            if(c_index > -1):
+                line = line[:c_index]
+            #find a beginning to a multi-line comment section
+            m0_index = line.find(self._multi[0])
+            #find an end to a multi-line comment section
+            m1_index = line.find(self._multi[1])
+            if(m1_index > -1):
+                in_multi = False
+            #keep only the code outside of the multi-line comment section
+            if(m0_index > -1 or m1_index > -1):
+                line_l = line[:m0_index] if(m0_index > -1) else ''
+                line_r = line[m1_index+len(self._multi[1]):] if(m1_index > -1) else ''
+                line = line_l + line_r
+
+            #skip if line is blank or within a multi-line comment section
+            if(((len(line) == 0 and m0_index <= -1) or in_multi) and line_cnt < last_line):
+                continue
+            #enter the mult-line comment section for next line
+            if(m0_index > -1 and m1_index <= -1):
+                in_multi = True
+
+            code_lines += [line]
             pass
-        return self._code_stream
+
+        return '\n'.join(code_lines)
 
 
     def getAbout(self):
@@ -430,6 +715,381 @@ class Language(ABC):
         pass
 
 
+    def getCacheFile(self):
+        '''
+        Returns the path to this file's entry in the workspace's parse cache. 
+        
+        Returns None if the file is not owned by a block linked to a workspace.
+
+        Parameters:
+            None
+        Returns:
+            (str): path to the json file storing the cached analysis
+        '''
+        if(self.getOwner() == None):
+            return None
+        return Language.locateCache(self.getOwner().getWorkspace(), self.getPath())
+
+
+    @classmethod
+    def locateCache(cls, ws, path):
+        '''
+        Returns the path to a file's entry in a workspace's parse cache. Returns
+        None if there is no workspace.
+
+        Parameters:
+            ws (Workspace): the workspace holding the parse cache
+            path (str): HDL file path
+        Returns:
+            (str): path to the json file storing the cached analysis
+        '''
+        if(ws == None):
+            return None
+        #name the entry after the file's full path to avoid collisions
+        key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        return ws.getParseCachePath()+key+'.json'
+
+
+    @classmethod
+    def getFingerprint(cls, path):
+        '''
+        Returns the (size, mtime) pair used to detect if a file changed since
+        it was last cached.
+
+        Parameters:
+            path (str): HDL file path
+        Returns:
+            ([int, int]): file size in bytes and modification time in nanoseconds
+        '''
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+
+
+    @classmethod
+    def readCache(cls, cache_file, path):
+        '''
+        Reads a file's entry from the parse cache. Entries are only valid if the 
+        file's path, size, and modification time are unchanged.
+
+        Parameters:
+            cache_file (str): path to the json file storing the cached analysis
+            path (str): HDL file path
+        Returns:
+            (dict): the cache entry, or None if it is missing or invalid
+        '''
+        if(cache_file == None or os.path.isfile(cache_file) == False):
+            return None
+        #treat unreadable or malformed entries as a miss
+        try:
+            with open(cache_file, 'r') as f:
+                entry = json.load(f)
+            valid = (entry['version'] == cls.CACHE_VERSION and \
+                entry['path'] == os.path.abspath(path) and \
+                entry['fingerprint'] == cls.getFingerprint(path))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if(valid == False):
+            return None
+        return entry
+
+
+    def loadCache(self):
+        '''
+        Attempts to load the code stream, about text, and identified design data
+        from the parse cache. An entry already prepared by preload() is claimed
+        first.
+
+        Dynamically creates attrs _code_stream and _about on a hit, and 
+        _cached_events if the entry also holds the identified design data and
+        the designs are yet to be identified.
+
+        Parameters:
+            None
+        Returns:
+            (bool): true if a valid entry was found
+        '''
+        entry = Language._Preloaded.pop(self.getPath(), None)
+        if(entry != None and Language._PreloadedTokens > 0):
+            Language._PreloadedTokens -= sum([len(cseg) for cseg in entry['stream']])
+        if(entry == None):
+            entry = Language.readCache(self.getCacheFile(), self.getPath())
+        if(entry == None):
+            return False
+
+        self._code_stream = entry['stream']
+        self._about = entry['about']
+        #entries tokenized by a parallel worker may still need their designs identified
+        if(entry['events'] != None and hasattr(self, "_designs") == False):
+            self._cached_events = entry['events']
+            #designs identified by a parallel worker are yet to be written to the parse cache
+            self._events = None if('fingerprint' in entry.keys()) else entry['events']
+        return True
+
+
+    @classmethod
+    def preload(cls, files, jobs):
+        '''
+        Tokenizes HDL files and identifies their designs and interfaces across 
+        a pool of worker processes before their Language objects are created.
+        Files with a valid parse cache entry are read instead of tokenized. Each
+        entry is kept in _Preloaded until the file's Language object claims it.
+
+        Workers write their entries to the parse cache themselves. When a
+        StreamLimit is set, they do not send back the entries they wrote, and
+        the entries kept count against the limit along with the resident code
+        streams. Entries past the limit are not kept, as they are read again 
+        when claimed.
+
+        Design units are still registered by the Language objects replaying the
+        workers' events in the order they are created, so duplicate detection 
+        and ICR are unaffected. Files are left for the Language object to 
+        analyze itself if the pool is unavailable.
+
+        Parameters:
+            files ([(type, str, Workspace)]): Language subclass, file path, and workspace of each file
+            jobs (int): number of worker processes
+        Returns:
+            None
+        '''
+        if(jobs < 2):
+            return
+        misses = []
+        for lang_cls,path,ws in files:
+            path = apt.fs(path)
+            if(path in cls._Preloaded.keys()):
+                continue
+            entry = cls.readCache(cls.locateCache(ws, path), path)
+            if(entry != None):
+                cls.holdPreloaded(path, entry)
+            else:
+                misses += [(lang_cls, path, cls.locateCache(ws, path), cls.StreamLimit == 0)]
+            pass
+        #not worth starting workers for a single file
+        if(len(misses) < 2):
+            return
+        #only pay for importing the pool when it is used
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(misses))) as pool:
+                futures = [pool.submit(_spinFile, *miss) for miss in misses]
+                for (_,path,_,_),future in zip(misses, futures):
+                    #errors are raised again when the file is analyzed in order
+                    if(future.exception() == None and future.result() != None):
+                        cls.holdPreloaded(path, future.result())
+                pass
+        except (OSError, BrokenProcessPool):
+            pass
+        pass
+
+
+    @classmethod
+    def holdPreloaded(cls, path, entry):
+        '''
+        Keeps a prepared entry in _Preloaded for a file's Language object to 
+        claim. While a StreamLimit is set, the entry is only kept if its tokens
+        still fit within the limit.
+
+        Parameters:
+            path (str): HDL file path
+            entry (dict): the file's code stream, about text, and events
+        Returns:
+            None
+        '''
+        if(cls.StreamLimit > 0):
+            tokens = sum([len(cseg) for cseg in entry['stream']])
+            if(cls._ResidentTokens + cls._PreloadedTokens + tokens > cls.StreamLimit):
+                return
+            cls._PreloadedTokens += tokens
+        cls._Preloaded[path] = entry
+        pass
+
+
+    def saveCache(self):
+        '''
+        Writes the code stream, about text, and the recorded design events to
+        the parse cache. Silently skips if the cache cannot be written or if
+        the file was modified too recently to be told apart from a later edit.
+
+        The recorded events are released afterward since the units already 
+        hold the same data.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        cache_file = self.getCacheFile()
+        if(cache_file == None or self._events == None):
+            self._events = None
+            return
+        entry = {
+            'about' : self.getAbout(),
+            'stream' : self.spinCode(),
+            'events' : self._events
+        }
+        Language.writeCache(cache_file, self.getPath(), entry)
+        self._events = None
+        pass
+
+
+    @classmethod
+    def writeCache(cls, cache_file, path, entry):
+        '''
+        Writes a file's entry to the parse cache, stamped (in place) with the
+        file's current fingerprint. Skips a file modified within the last 2 
+        seconds, as it could change again without changing its fingerprint.
+
+        Parameters:
+            cache_file (str): path to the json file storing the cached analysis
+            path (str): HDL file path
+            entry (dict): the file's about text, code stream, and events
+        Returns:
+            (bool): true if the entry was written
+        '''
+        try:
+            fingerprint = cls.getFingerprint(path)
+            if(fingerprint[1] >= int(time.time()*10**9) - 2*(10**9)):
+                return False
+            entry.update(version=cls.CACHE_VERSION, path=os.path.abspath(path), fingerprint=fingerprint)
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            #write to a temporary file first so readers never see a partial entry
+            tmp_file = cache_file+'.'+str(os.getpid())
+            #encode in one call to use the faster C encoder
+            with open(tmp_file, 'w') as f:
+                f.write(json.dumps(entry))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            return False
+        return True
+
+
+    def recordUnit(self, u, libs=[], pkgs=[]):
+        '''
+        Records a newly identified design unit and its interface so it can be 
+        recreated from the parse cache.
+
+        Parameters:
+            u (Unit): the unit identified in this file
+            libs ([str]): library names linked to the unit during identification
+            pkgs ([str]): package names linked to the unit during identification
+        Returns:
+            None
+        '''
+        ports = []
+        for p in u.getInterface().getPorts().values():
+            ports += [[p.getName(), p.getMode(), p.getDatatype(), p.getValueTokens(), p.getBusWidth()]]
+        gens = []
+        for g in u.getInterface().getGenerics().values():
+            gens += [[g.getName(), g.getDatatype(), g.getValueTokens()]]
+
+        self._events += [['unit', {
+            'name' : u.E(),
+            'dsgn' : u.getDesign().name,
+            'libs' : list(libs),
+            'pkgs' : list(pkgs),
+            'ports' : ports,
+            'generics' : gens
+        }]]
+        pass
+
+
+    def recordDesigns(self):
+        '''
+        Identifies the design units of a file without a block, as done within a
+        worker process, and returns the events recorded for them so the file's
+        Language object can replay them in order (see replayCache). The units
+        made along the way are discarded.
+
+        Parameters:
+            None
+        Returns:
+            ([list]): the recorded events, or None if the designs depend on other files
+        '''
+        events = self._events = []
+        self._block = _Detached()
+        Unit.resetJar()
+        try:
+            #errors are reported once the file is analyzed in order
+            with contextlib.redirect_stdout(io.StringIO()):
+                log.disable(log.CRITICAL)
+                self.identifyDesigns()
+        except (KeyError, SystemExit):
+            events = None
+        finally:
+            log.disable(log.NOTSET)
+            self._block = None
+            Unit.resetJar()
+        return events
+
+
+    def recordEvent(self, *evt):
+        '''Records a link (architecture/configuration) made to a unit by name.'''
+        self._events += [list(evt)]
+        pass
+
+
+    def replayCache(self):
+        '''
+        Recreates the design units identified in this file from the events loaded
+        from the parse cache, in the same order they were originally identified.
+
+        Dynamically creates attr _designs on success.
+
+        Parameters:
+            None
+        Returns:
+            (bool): true if the designs were restored from the cache (or a worker)
+        '''
+        if(hasattr(self, "_cached_events") == False):
+            return False
+
+        self._designs = []
+        M, L, N = self.getOwner().M(), self.getOwner().L(), self.getOwner().N()
+        for evt in self._cached_events:
+            #recreate the design unit and its interface
+            if(evt[0] == 'unit'):
+                info = evt[1]
+                u = Unit(info['name'], self.getPath(), Unit.Design[info['dsgn']], self)
+                for p in info['ports']:
+                    u.getInterface().addConnection(p[0], p[1], p[2], p[3], True, bounds=tuple(p[4]))
+                for g in info['generics']:
+                    u.getInterface().addConnection(g[0], None, g[1], g[2], False)
+                u.linkLibs(info['libs'], info['pkgs'])
+                self._designs += [u]
+            #link an architecture to its entity
+            elif(evt[0] == 'arch'):
+                Unit.Jar[M][L][N][evt[1]].linkArch(evt[2])
+            #link a configuration to its entity
+            elif(evt[0] == 'config'):
+                u = Unit.Jar[M][L][N][evt[1]]
+                u.setConfig(evt[2])
+                self._getConfigurations(u, evt[2])
+            pass
+
+        delattr(self, "_cached_events")
+        #store designs identified by a parallel worker for the next run
+        self.saveCache()
+        return True
+
+
+    def __getstate__(self):
+        '''
+        Returns the attributes to keep when pickled into a workspace snapshot.
+        The code stream and its indexes are left out since they are restored
+        from the parse cache on their next use.
+
+        Parameters:
+            None
+        Returns:
+            (dict): attributes to pickle
+        '''
+        state = self.__dict__.copy()
+        for attr in ('_code_stream', '_index', '_arch_index', '_cached_events'):
+            state.pop(attr, None)
+        return state
+
+
     def getPath(self):
         '''Returns this _file_path (str) for this Language object.'''
         return self._file_path
@@ -448,4 +1108,49 @@ class Language(ABC):
     #     '''
     
 
-    pass
\ No newline at end of file
+    pass
+
+
+def _spinFile(lang_cls, path, cache_file=None, send=True):
+    '''
+    Tokenizes a single HDL file and identifies its designs within a worker 
+    process for Language.preload().
+
+    Parameters:
+        lang_cls (type): the Language subclass to analyze the file with
+        path (str): HDL file path
+        cache_file (str): parse cache entry to write the result to
+        send (bool): determine if to return a result written to cache_file
+    Returns:
+        (dict): the file's code stream, about text, and events, or None if only written to cache_file
+    '''
+    hdl = lang_cls(path, None)
+    entry = {'stream' : hdl.spinCode(), 'about' : hdl.getAbout(), 'events' : hdl.recordDesigns()}
+    #an entry written to the parse cache is stamped with the file's fingerprint
+    if(cache_file != None and Language.writeCache(cache_file, path, entry) and send == False):
+        return None
+    return entry
+
+
+class _Detached:
+    '''Stands in for the block of a file analyzed within a worker process.'''
+
+    def M(self):
+        return ''
+
+    def L(self):
+        return ''
+
+    def N(self):
+        return ''
+
+    def V(self):
+        return ''
+
+    def getFull(self):
+        return ''
+
+    def getWorkspace(self):
+        return None
+
+    pass
@@ -28,10 +28,37 @@ from .label import Label
 from .git import Git
 from .map import Map
 from .unit import Unit
+from .language import Language
+from .server import Server
 
 
 class legoHDL:
 
+    #what each command needs initialized from the settings before it runs
+    NEEDS = {
+        ''          : [],
+        'help'      : [],
+        'new'       : ['workspace'],
+        'init'      : ['workspace'],
+        'open'      : ['workspace', 'profile'],
+        'get'       : ['workspace'],
+        'graph'     : ['workspace'],
+        'export'    : ['workspace'],
+        'build'     : ['workspace'],
+        'release'   : ['workspace'],
+        'del'       : ['workspace'],
+        'list'      : ['workspace', 'profile'],
+        'refresh'   : ['workspace', 'profile'],
+        'install'   : ['workspace'],
+        'uninstall' : ['workspace'],
+        'download'  : ['workspace'],
+        'update'    : ['workspace'],
+        'info'      : ['workspace', 'profile'],
+        'config'    : ['workspace', 'profile'],
+        #answers forwarded 'list' and 'info' commands
+        'serve'     : ['workspace', 'profile'],
+    }
+
     
     def __init__(self):
         '''
@@ -52,26 +79,18 @@ class legoHDL:
         os.environ["LEGOHDL"] = apt.fs(apt.HIDDEN[:len(apt.HIDDEN)-1])
 
         #parse arguments
-        self._command = self._entry = ""
-        #store args accordingly from command-line
-        for i, arg in enumerate(sys.argv[1:]):
-            #first is the command
-            if(i == 0):
-                self._command = arg.lower()
-            #first arg without a starting '-' is the "entry" (may not be used for all commands)
-            elif(arg[0] != '-'):
-                self._entry = arg
-
-            if(self._entry != ""):
-                break
+        self.readArgs(sys.argv[1:])
 
         #only display the program's version and exit
         if(self._command == '--version'):
             print(__version__)
             exit()
 
-        #parse any remaining arguments
-        self.parseArgs(sys.argv[1:])
+        #let a running server answer from its already loaded workspace
+        if(self._command in Server.COMMANDS):
+            code = Server.forward(sys.argv[1:])
+            if(code != None):
+                exit(code)
 
         #load legohdl.cfg
         #ensure all necessary hidden folder structures exist
@@ -80,37 +99,107 @@ class legoHDL:
             self.runSetup()
 
         apt.load()
-        #initialize all Vendors
-        Vendor.load()
-        Vendor.tidy()
-        #initialize all Workspaces
-        Workspace.load()
-        Workspace.setActiveWorkspace(apt.CFG.get('general.active-workspace'))
-        Workspace.tidy()
+        #allow the number of jobs to be overridden for this call only
+        if(self.getVar('j') != None):
+            apt.JOBS = self.getVar('j')
+        #bound the memory held by the code of analyzed HDL files
+        Language.StreamLimit = apt.getStreamLimit()
+
+        #only initialize what the command uses
+        needs = self.getNeeds()
+        if('workspace' in needs):
+            #initialize all Vendors before the workspaces linking them
+            Vendor.load()
+            Vendor.tidy()
+            #initialize all Workspaces
+            Workspace.load()
+            Workspace.setActiveWorkspace(apt.CFG.get('general.active-workspace'))
+            Workspace.tidy()
         #initialize all Profiles
-        Profile.load()
-        Profile.tidy()
+        if('profile' in needs):
+            Profile.load()
+            Profile.tidy()
 
         #save all legohdl.cfg changes
+        if('workspace' in needs):
+            Workspace.save()
+            Vendor.save()
         apt.save()
-        Workspace.save()
-        Vendor.save()
 
         #limit functionality if not in a workspace
-        if(not Workspace.inWorkspace()):
-            if(self._command == '' or \
-                self._command == 'config' or \
-                self._command == 'help' or \
+        if('workspace' in needs and not Workspace.inWorkspace()):
+            if(self._command == 'config' or \
                 self._command == 'open' and (self.hasFlag('settings') or self.hasFlag('template'))):
                 pass
             else:
                 exit(log.error("Failed to run command because active workspace is not set."))
-        else:
+        elif('workspace' in needs):
             self.WS().autoRefresh(rate=apt.getRefreshRate())
 
         #print(self)
         
         self.runCommand()
+
+        #keep the loaded workspace model for a quicker start next time
+        if(Workspace.inWorkspace()):
+            self.WS().saveSnapshot()
+        pass
+
+
+    def getNeeds(self):
+        '''
+        Returns what the command needs initialized before it runs from the
+        NEEDS class attr. A command given the help flag only needs what 'help'
+        needs. Unknown commands need everything.
+
+        Parameters:
+            None
+        Returns:
+            ([str]): the subsystems to initialize
+        '''
+        cmd = self._command
+        #a plugin can be called directly as the 'build' command
+        if(len(cmd) and cmd[0] == '+'):
+            cmd = 'build'
+        if(cmd != 'build' and (self.hasFlag('h') or self.hasFlag('help'))):
+            cmd = 'help'
+        #plugins and labels are listed straight from the settings
+        if(cmd == 'list' and (self.hasFlag('plugin') or self.hasFlag('label'))):
+            return []
+        if(cmd in self.NEEDS.keys()):
+            return self.NEEDS[cmd]
+        return ['workspace', 'profile']
+
+
+    def readArgs(self, args):
+        '''
+        Stores the command and entry from the command-line arguments, and then
+        parses the remaining flags and vars (see parseArgs).
+
+        Parameters:
+            args ([str]): list of command-line arguments
+        Returns:
+            None
+        '''
+        self._command = self._entry = ""
+        #store args accordingly from command-line
+        for i, arg in enumerate(args):
+            #first is the command
+            if(i == 0):
+                self._command = arg.lower()
+            #first arg without a starting '-' is the "entry" (may not be used for all commands)
+            elif(arg[0] != '-'):
+                self._entry = arg
+
+            if(self._entry != ""):
+                break
+
+        #forget the version found from any previous arguments
+        if(hasattr(self, '_ver')):
+            delattr(self, '_ver')
+
+        #parse any remaining arguments
+        self.parseArgs(args)
         pass
 
 
@@ -380,6 +469,14 @@ Enter:
         disp_full = self.hasFlag('disp-full')
         compress = (self.hasFlag('expand') == False)
 
+        #limit how many levels are displayed below the top-level unit
+        depth = None
+        if(self.hasFlag('depth')):
+            depth = self.getVar('depth')
+            if(depth == None or str(depth).isdigit() == False):
+                exit(log.error("Depth must be a non-negative integer, as in -depth=<n>."))
+            depth = int(depth)
+
         self.WS().loadBlocks(id_dsgns=True)
         block = Block.getCurrent()
 
@@ -396,9 +493,16 @@ Enter:
         block.getUnits(top_dog)
 
         hierarchy = Unit.Hierarchy
+
+        #stop before printing a tree that never ends
+        hierarchy.checkCycles()
+        #only check the hierarchy for circular dependencies
+        if(self.hasFlag('check')):
+            log.info("No circular dependencies found.")
+            return
         
         #print the dependency tree
-        print(hierarchy.output(top_dog, compress=compress, disp_full=disp_full))
+        print(hierarchy.output(top_dog, compress=compress, disp_full=disp_full, depth=depth))
         print()
         
         unit_order,block_order = hierarchy.topologicalSort()
@@ -855,6 +959,44 @@ Enter:
         pass
 
     
+    def _serve(self):
+        '''Run 'serve' command.'''
+        if(Server.isSupported() == False):
+            exit(log.error("Serving commands requires Unix domain sockets on this platform."))
+
+        def load():
+            #decode every unit once so forwarded commands only read the model
+            self.WS().loadBlocks(id_dsgns=True)
+            self.WS().decodeUnits()
+            self.WS().saveSnapshot()
+            pass
+
+        #load every setting again when legohdl.cfg changed
+        if(Server(self.WS()).run(load, self.answer)):
+            log.info("Restarting server to load new settings...")
+            os.execv(sys.executable, [sys.executable, '-m', 'legohdl.legohdl'] + sys.argv[1:])
+        pass
+
+
+    def answer(self, args):
+        '''
+        Runs a command forwarded to a server against the workspace it already
+        loaded. Called within the server's child process for the command.
+
+        Parameters:
+            args ([str]): the forwarded command-line arguments
+        Returns:
+            None
+        '''
+        self.readArgs(args)
+        #allow the number of jobs to be overridden for this call only
+        if(self.getVar('j') != None):
+            apt.JOBS = self.getVar('j')
+        self.runCommand()
+        self.WS().saveSnapshot()
+        pass
+
+
     def _info(self):
         '''Run the 'info' command.'''
         
@@ -1550,6 +1692,7 @@ Enter:
         formatHelp("download","bring a block to the workspace path for development")
         formatHelp("update","update an installed block to be its latest version")
         formatHelp("info","read further detail about a block")
+        formatHelp("serve","answer commands from a loaded workspace")
         formatHelp("config","modify legohdl settings")
         print("\nType \'legohdl help <command>\' to read about that command.")
         pass
@@ -1640,6 +1783,10 @@ Enter:
             self._info()
             pass
 
+        elif('serve' == cmd):
+            self._serve()
+            pass
+
         elif('config' == cmd):
             self._config()
             pass
@@ -0,0 +1,123 @@
+# ------------------------------------------------------------------------------
+# Project: legohdl
+# Script: lock.py
+# Author: Chase Ruskin
+# Description:
+#   The Lock class. A lock guards a path while it is modified, so legohdl
+#   processes (and threads) running at the same time take turns changing it.
+# ------------------------------------------------------------------------------
+
+import os, hashlib, threading, time
+import logging as log
+
+from .apparatus import Apparatus as apt
+
+try:
+    import fcntl
+except ImportError:
+    import msvcrt
+    fcntl = None
+
+
+class Lock:
+
+    #folder within the hidden folder keeping a lock file for each locked path
+    DIR = "locks/"
+
+    #locks held by this process: lock file -> [thread lock, depth, open file]
+    _Held = {}
+    _Guard = threading.Lock()
+
+
+    def __init__(self, path):
+        '''
+        Create a Lock object for a path. The lock is taken when entering a
+        'with' statement and released when leaving it, and can be taken again
+        by the same thread while it holds it.
+
+        Parameters:
+            path (str): the file or directory to guard
+        Returns:
+            None
+        '''
+        self._path = path
+        key = hashlib.sha1(os.path.normcase(os.path.realpath(path)).encode()).hexdigest()
+        self._file = apt.HIDDEN+self.DIR+key+'.lock'
+        pass
+
+
+    def __enter__(self):
+        with Lock._Guard:
+            if(self._file not in Lock._Held.keys()):
+                Lock._Held[self._file] = [threading.RLock(), 0, None]
+            held = Lock._Held[self._file]
+        held[0].acquire()
+        #only the first entry for this process locks the file
+        if(held[1] == 0):
+            try:
+                os.makedirs(apt.HIDDEN+self.DIR, exist_ok=True)
+                held[2] = open(self._file, 'a+')
+                self.lockFile(held[2])
+            except BaseException:
+                if(held[2] != None):
+                    held[2].close()
+                    held[2] = None
+                held[0].release()
+                raise
+        held[1] += 1
+        return self
+
+
+    def __exit__(self, *exc):
+        held = Lock._Held[self._file]
+        held[1] -= 1
+        if(held[1] == 0):
+            self.unlockFile(held[2])
+            held[2].close()
+            held[2] = None
+        held[0].release()
+        return False
+
+
+    def lockFile(self, f):
+        '''
+        Waits until no other process holds the lock file 'f', then holds it.
+
+        Parameters:
+            f (file): the opened lock file
+        Returns:
+            None
+        '''
+        waiting = False
+        while True:
+            try:
+                if(fcntl != None):
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                pass
+            if(waiting == False):
+                log.info("Waiting on another legohdl process using "+self._path+"...")
+                waiting = True
+            #block until released where the platform can
+            if(fcntl != None):
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                return
+            time.sleep(0.1)
+        pass
+
+
+    def unlockFile(self, f):
+        '''Releases the held lock file 'f'.'''
+        if(fcntl != None):
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        pass
+
+
+    pass
@@ -6,8 +6,12 @@
 #   The Map class. A map object is a special modification of a python dictionary
 #   where keys are converted to lower case. Inspired by: 
 #   https://stackoverflow.com/questions/3387691/how-to-perfectly-override-a-dict
+#
+#   The FastMap class behaves the same as a Map but is built directly on a 
+#   python dictionary for the containers accessed most during HDL analysis.
 # ------------------------------------------------------------------------------
 
+import copyreg
 from collections.abc import MutableMapping
 
 
@@ -71,4 +75,111 @@ class Map(MutableMapping):
     def values(self):
         return self._inventory.values()
 
-    pass
\ No newline at end of file
+    pass
+
+
+#original-case string keys mapped to their lower-case form (shared by FastMaps)
+_LOWER = dict()
+
+#limit on the number of remembered original-case keys
+_LOWER_LIMIT = 1 << 16
+
+#bypass the attribute lookup on every access
+_getitem = dict.__getitem__
+
+
+class FastMap(dict):
+
+    #no per-instance attributes beyond the dictionary itself
+    __slots__ = ()
+
+
+    def __init__(self, *args, **kwargs):
+        '''
+        Creates a FastMap object. 
+        
+        Keys are converted to lower-case once when stored. The lower-case form
+        of each original-case key is remembered across all FastMaps, so 
+        repeated lookups with the same names skip converting them again.
+        '''
+        super().__init__()
+        self.update(*args, **kwargs)
+        pass
+
+    
+    def _keytransform(self, k):
+        '''
+        Converts key to lower-case if it is type string.
+        '''
+        if(k.__class__ is str):
+            low = _LOWER.get(k)
+            if(low == None):
+                if(len(_LOWER) >= _LOWER_LIMIT):
+                    _LOWER.clear()
+                low = _LOWER[k] = k.lower()
+            return low
+        elif(isinstance(k, str)):
+            return k.lower()
+        return k
+
+
+    def __getitem__(self, k):
+        #resolve previously seen names without any extra calls
+        if(k.__class__ is str):
+            try:
+                k = _LOWER[k]
+            except KeyError:
+                k = self._keytransform(k)
+        return _getitem(self, k)
+
+
+    def __missing__(self, k):
+        #only reached on a failed lookup, such as with a subclass of str
+        if(isinstance(k, str) and k.lower() != k):
+            return _getitem(self, k.lower())
+        raise KeyError(k)
+
+
+    def __setitem__(self, k, v):
+        dict.__setitem__(self, self._keytransform(k), v)
+
+
+    def __delitem__(self, k):
+        dict.__delitem__(self, self._keytransform(k))
+
+
+    def __contains__(self, k):
+        return dict.__contains__(self, self._keytransform(k))
+
+
+    def get(self, k, default=None):
+        return dict.get(self, self._keytransform(k), default)
+
+
+    def pop(self, k, *default):
+        return dict.pop(self, self._keytransform(k), *default)
+
+
+    def setdefault(self, k, default=None):
+        return dict.setdefault(self, self._keytransform(k), default)
+
+
+    def update(self, *args, **kwargs):
+        for k,v in dict(*args, **kwargs).items():
+            self[k] = v
+        pass
+
+
+    def copy(self):
+        return FastMap(self)
+
+
+    def __reduce__(self):
+        #keys are already lower-case; unpickle without converting them again
+        return (copyreg.__newobj__, (FastMap,), dict(self))
+
+
+    def __setstate__(self, state):
+        dict.update(self, state)
+
+    pass
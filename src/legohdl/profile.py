@@ -99,15 +99,15 @@ class Profile:
             return False
 
         #create temp dir
-        os.makedirs(apt.TMP)
+        tmp = apt.makeTmpDir()
 
         #clone from repository
         if(Git.isBlankRepo(url) == False):
-            tmp_repo = Git(apt.TMP, clone=url)
+            tmp_repo = Git(tmp, clone=url)
 
             #determine if a .prfl file exists
             log.info("Locating .prfl file... ")
-            files = os.listdir(apt.TMP)
+            files = os.listdir(tmp)
             for f in files:
                 prfl_i = f.find(self.EXT)
                 if(prfl_i > -1):
@@ -128,7 +128,7 @@ class Profile:
                 #add to profiles folder
                 else:
                     log.info("Adding profile "+self.getName()+"...")
-                    self._repo = Git(self.getProfileDir(), clone=apt.TMP)
+                    self._repo = Git(self.getProfileDir(), clone=tmp)
                     #assign the correct remote url to the profile
                     self._repo.setRemoteURL(tmp_repo.getRemoteURL())
         else:
@@ -136,7 +136,7 @@ class Profile:
             success = False
 
         #clean up temp dir
-        shutil.rmtree(apt.TMP, onerror=apt.rmReadOnly)
+        apt.cleanTmpDir(tmp)
         return success
 
 
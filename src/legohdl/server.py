@@ -0,0 +1,286 @@
+# ------------------------------------------------------------------------------
+# Project: legohdl
+# Script: server.py
+# Author: Chase Ruskin
+# Description:
+#   The Server class. A Server keeps the active workspace's model of blocks
+#   and units in memory and answers forwarded commands over a Unix domain
+#   socket, so editor integrations calling legohdl repeatedly skip loading the
+#   settings and the workspace on every call.
+# ------------------------------------------------------------------------------
+
+import os, sys, socket, signal, json, traceback
+import logging as log
+
+from .__version__ import __version__
+from .apparatus import Apparatus as apt
+
+
+class Server:
+
+    #the socket the running server listens on within the hidden folder
+    SOCKET_FILE = "legohdl.sock"
+
+    #commands that only read the workspace and can be answered by a server
+    COMMANDS = ['get', 'graph', 'list', 'export', 'info']
+
+
+    def __init__(self, ws):
+        '''
+        Create a Server object for the active workspace.
+
+        Parameters:
+            ws (Workspace): the active workspace to keep loaded
+        Returns:
+            None
+        '''
+        self._ws = ws
+        self._settings = self.readSettings()
+        pass
+
+
+    @classmethod
+    def isSupported(cls):
+        '''Returns (bool) if the platform can pass file descriptors over Unix domain sockets.'''
+        return hasattr(socket, 'AF_UNIX') and hasattr(socket, 'send_fds') and hasattr(os, 'fork')
+
+
+    @classmethod
+    def getSocketPath(cls):
+        '''Returns the path (str) to the socket a running server listens on.'''
+        return apt.HIDDEN+cls.SOCKET_FILE
+
+
+    def readSettings(self):
+        '''Returns the contents (bytes) of legohdl.cfg, or None if unreadable.'''
+        try:
+            with open(apt.HIDDEN+apt.SETTINGS_FILE, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+    @classmethod
+    def forward(cls, args):
+        '''
+        Forwards a command to a running server. The server answers with this
+        process's standard streams, working directory, and environment, so
+        the output is the same as running the command directly.
+
+        Returns None if no server took the command, in which case the command
+        must be run directly.
+
+        Parameters:
+            args ([str]): the command-line arguments
+        Returns:
+            (int): the command's exit code, or None if not answered
+        '''
+        path = cls.getSocketPath()
+        if(cls.isSupported() == False or os.path.exists(path) == False):
+            return None
+        pid = None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+                #pass the standard streams first, then the request on its own line
+                socket.send_fds(sock, [b'\0'], [0, 1, 2])
+                req = {
+                    'version' : __version__,
+                    'args' : args,
+                    'cwd' : os.getcwd(),
+                    'env' : dict(os.environ)
+                }
+                sock.sendall(json.dumps(req).encode()+b'\n')
+                replies = sock.makefile('rb')
+                while True:
+                    try:
+                        line = replies.readline()
+                    except KeyboardInterrupt:
+                        #interrupt the command running on the client's behalf
+                        if(pid != None):
+                            os.kill(pid, signal.SIGINT)
+                        continue
+                    if(len(line) == 0):
+                        break
+                    reply = json.loads(line)
+                    if('pid' in reply.keys()):
+                        pid = reply['pid']
+                    elif('code' in reply.keys()):
+                        return reply['code']
+                    pass
+        except (OSError, ValueError):
+            pass
+        #the command may have already written output once it started
+        return None if(pid == None) else 1
+
+
+    def run(self, load, answer):
+        '''
+        Listens on the socket and answers one forwarded command at a time, each
+        in a forked child process sharing the loaded model. Returns once
+        interrupted or if legohdl.cfg changes, since every setting would need
+        to be loaded again.
+
+        Parameters:
+            load (funct): loads the workspace's model
+            answer (funct): runs a command given its arguments in a child process
+        Returns:
+            (bool): true if legohdl.cfg changed
+        '''
+        path = self.getSocketPath()
+        #a socket nobody answers on is left behind from a stopped server
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(path)
+            exit(log.error("A server is already running at "+path+"."))
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if(os.path.exists(path)):
+                os.remove(path)
+            #only the user may have commands run on their behalf, even before listening
+            umask = os.umask(0o077)
+            try:
+                sock.bind(path)
+            finally:
+                os.umask(umask)
+            sock.listen()
+        except OSError as e:
+            sock.close()
+            exit(log.error("Failed to listen at "+path+": "+str(e)))
+
+        #remove the socket when stopped
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        restart = False
+        try:
+            load()
+            log.info("Serving workspace "+self._ws.getName()+" at "+path+"...")
+            while(restart == False):
+                conn,_ = sock.accept()
+                with conn:
+                    restart = self.respond(conn, sock, load, answer)
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock.close()
+            if(os.path.exists(path)):
+                os.remove(path)
+        return restart
+
+
+    def respond(self, conn, sock, load, answer):
+        '''
+        Answers a single forwarded command. The model is updated first if 
+        anything it was built from changed (see Workspace.isModelCurrent); only
+        the changed HDL files are analyzed again unless the model must be loaded
+        again (see Workspace.refreshModel). The command is declined if the 
+        settings changed or the model failed to load.
+
+        Parameters:
+            conn (socket): the connection to the client
+            sock (socket): the listening socket
+            load (funct): loads the workspace's model
+            answer (funct): runs a command given its arguments in a child process
+        Returns:
+            (bool): true if legohdl.cfg changed
+        '''
+        fds = []
+        try:
+            _,fds,_,_ = socket.recv_fds(conn, 1, 3)
+            req = json.loads(conn.makefile('rb').readline())
+            if(req['version'] != __version__ or len(fds) != 3):
+                conn.sendall(json.dumps({'code' : None}).encode()+b'\n')
+                return False
+            #decline so the client runs the command with the new settings
+            if(self.readSettings() != self._settings):
+                conn.sendall(json.dumps({'code' : None}).encode()+b'\n')
+                return True
+
+            #the current block depends on the working directory
+            os.chdir(req['cwd'])
+            self._ws.autoRefresh(rate=apt.getRefreshRate())
+            if(self._ws.isModelCurrent() == False):
+                try:
+                    #only analyze again what changed when possible
+                    if(self._ws.refreshModel() == False):
+                        log.info("Reloading workspace "+self._ws.getName()+"...")
+                        self._ws.unloadBlocks()
+                    load()
+                except SystemExit:
+                    #keep serving; the client runs the command itself to report the error
+                    self._ws.unloadBlocks()
+                    conn.sendall(json.dumps({'code' : None}).encode()+b'\n')
+                    return False
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if(pid == 0):
+                sock.close()
+                conn.close()
+                self.serveChild(fds, req, answer)
+            conn.sendall(json.dumps({'pid' : pid}).encode()+b'\n')
+            _,status = os.waitpid(pid, 0)
+            code = os.waitstatus_to_exitcode(status)
+            #report being stopped by a signal like a shell does
+            if(code < 0):
+                code = 128-code
+            conn.sendall(json.dumps({'code' : code}).encode()+b'\n')
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            for fd in fds:
+                os.close(fd)
+        return False
+
+
+    def serveChild(self, fds, req, answer):
+        '''
+        Runs the forwarded command within the forked child process and exits
+        with its exit code. Never returns.
+
+        Parameters:
+            fds ([int]): the client's standard input, output, and error
+            req (dict): the forwarded request
+            answer (funct): runs a command given its arguments
+        Returns:
+            None
+        '''
+        code = 1
+        try:
+            for i,fd in enumerate(fds):
+                os.dup2(fd, i)
+                os.close(fd)
+            #buffer the output as if the client's streams were opened here
+            sys.stdout.reconfigure(line_buffering=os.isatty(1))
+            sys.stderr.reconfigure(line_buffering=True)
+            os.environ.clear()
+            os.environ.update(req['env'])
+            #the client interrupts the command as if it were running there
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                answer(req['args'])
+                code = 0
+            except SystemExit as ec:
+                code = ec.code
+                if(code == None):
+                    code = 0
+                elif(isinstance(code, int) == False):
+                    print(code, file=sys.stderr)
+                    code = 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code)
+        pass
+
+
+    pass
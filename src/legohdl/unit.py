@@ -12,13 +12,13 @@
 #   dependency tree that will be generated for the current design.
 # ------------------------------------------------------------------------------
 
-import os, re
+import os, re, sys
 import logging as log
 from enum import Enum
 
 from .apparatus import Apparatus as apt
 from .graph import Graph
-from .map import Map
+from .map import Map, FastMap
 
 
 class Unit:
@@ -36,14 +36,38 @@ class Unit:
         pass
 
 
+    #only these attributes are stored per unit (no per-object dictionary)
+    __slots__ = ('_filepath', '_lang_obj', '_libs', '_pkgs', '_language', '_dsgn', \
+        '_M', '_L', '_N', '_V', '_E', '_checked', '_config', '_config_modes', \
+        '_interface', '_about_txt', '_archs', '_dsgn_pkgs')
+
     #class variable storing the dependency tree
     Hierarchy = Graph()
 
     #multi-level class container to store all entities
-    Jar = Map()
+    Jar = FastMap()
 
     #2-level class container
-    Bottle = Map()
+    Bottle = FastMap()
+
+    #2-level class container to find units by name across all libraries
+    Shelf = FastMap()
+
+    #class container to remember ICR decisions by instantiation signature
+    Choices = dict()
+
+    #number of ICR decisions reused from/added to Choices
+    ChoiceHits = 0
+    ChoiceMisses = 0
+
+    #class container storing the operations each unit performed while decoded (see Language.trace)
+    Traces = dict()
+
+    #class container storing the operations recorded so far for units being decoded
+    Tracing = dict()
+
+    #the unit being decoded whose lookups are recorded
+    Tracing_Now = None
 
 
     def __init__(self, name, filepath, dsgn, lang_obj):
@@ -58,9 +82,9 @@ class Unit:
         Returns:
             None   
         '''
-        self._filepath = apt.fs(filepath)
+        #units from the same file share one path string
+        self._filepath = sys.intern(apt.fs(filepath))
         self._lang_obj = lang_obj
-        self.setAbout(lang_obj.getAbout())
 
         self._libs = []
         self._pkgs = []
@@ -82,11 +106,10 @@ class Unit:
         self._L = lang_obj.getOwner().L()
         self._N = lang_obj.getOwner().N()
         self._V = lang_obj.getOwner().V()
-        self._E = name
+        self._E = sys.intern(name)
 
         self._checked = False
         self._config = None
-        self._config_modes = Map()
 
         #create an empty interface
         self._interface = Interface(name=self.E(), library=self.L(), def_lang=self.getLang())
@@ -96,16 +119,31 @@ class Unit:
         # by default, look at the entities available in download section? or look at entities
         # in installation section.
 
+        self.addToJar()
+        pass
+
+
+    def addToJar(self):
+        '''
+        Stores the unit in the Jar under its block, and in the Bottle and Shelf 
+        to be found by name. Exits if its block already has a unit by the same
+        name.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
         # add to Jar
         #create new vendor level if vendor DNE
         if(self.M().lower() not in self.Jar.keys()):
-            self.Jar[self.M()] = Map()
+            self.Jar[self.M()] = FastMap()
         #create new library level if libray DNE
         if(self.L().lower() not in self.Jar[self.M()].keys()):
-             self.Jar[self.M()][self.L()] = Map()
+             self.Jar[self.M()][self.L()] = FastMap()
         #create new block name level if name DNE
         if(self.N().lower() not in self.Jar[self.M()][self.L()].keys()):
-             self.Jar[self.M()][self.L()][self.N()] = Map()
+             self.Jar[self.M()][self.L()][self.N()] = FastMap()
 
         #store entity at this nested level
         if(self.E().lower() not in self.Jar[self.M()][self.L()][self.N()].keys()):
@@ -121,12 +159,18 @@ class Unit:
         # add to Bottle - a 2-level Map with values as lists effectively binning units together
         #create new library level if libray DNE
         if(self.L().lower() not in self.Bottle.keys()):
-             self.Bottle[self.L()] = Map()
+             self.Bottle[self.L()] = FastMap()
         #create new unit level if unit DNE
         if(self.E().lower() not in self.Bottle[self.L()].keys()):
              self.Bottle[self.L()][self.E()] = []
         #add entity to a list
         self.Bottle[self.L()][self.E()] += [self]
+
+        # add to Shelf - share the Bottle's list under the unit name
+        if(self.E().lower() not in self.Shelf.keys()):
+            self.Shelf[self.E()] = FastMap()
+        if(self.L().lower() not in self.Shelf[self.E()].keys()):
+            self.Shelf[self.E()][self.L()] = self.Bottle[self.L()][self.E()]
         pass
 
 
@@ -147,6 +191,9 @@ class Unit:
         '''
         self._libs += libs
         self._pkgs += pkgs
+        #remember the link for replaying the unit's decode
+        if(self in Unit.Tracing):
+            Unit.Tracing[self] += [('l', (list(libs), list(pkgs)))]
         pass
 
 
@@ -237,6 +284,8 @@ class Unit:
         Returns:
             None
         '''
+        if(hasattr(self, '_config_modes') == False):
+            self._config_modes = Map()
         #make the architecture map
         if(arch.lower() not in self._config_modes.keys()):
             self._config_modes[arch] = Map()
@@ -254,7 +303,8 @@ class Unit:
         '''
         Sets _checked attr to `c`. 
         
-        If True, then the unit object self will be added to the graph as a vertex. 
+        If True, then the unit object self will be added to the graph as a vertex
+        and its file may release its code stream (see Language.releaseStream). 
         If False, then the unit object self will be removed from the graph.
 
         Parameters:
@@ -269,6 +319,11 @@ class Unit:
         if(c == False and self.isChecked()):
             self.Hierarchy.removeVertex(self)
         self._checked = c
+        if(c == True):
+            #remember when the unit was completed for replaying its decode
+            if(self in Unit.Tracing):
+                Unit.Tracing[self] += [('c', None)]
+            self._lang_obj.releaseStream()
         pass
 
 
@@ -295,14 +350,46 @@ class Unit:
 
     @classmethod
     def resetJar(cls):
-        '''Clears Jar (Map) and Bottle (Map) class attrs.'''
-        cls.Jar = Map()
-        cls.Bottle = Map()
+        '''Clears Jar (Map), Bottle (Map), Shelf (Map), Choices (dict), and Traces (dict) class attrs.'''
+        cls.Jar = FastMap()
+        cls.Bottle = FastMap()
+        cls.Shelf = FastMap()
+        cls.clearChoices()
+        cls.clearTraces()
+        pass
+
+
+    @classmethod
+    def clearChoices(cls):
+        '''Forgets all remembered ICR decisions (Choices).'''
+        if(len(Unit.Choices)):
+            Unit.Choices = dict()
         pass
 
+
+    @classmethod
+    def clearTraces(cls):
+        '''Forgets all recorded decodes (Traces). Always creates a new container
+        so holders of the previous one know it went stale.'''
+        Unit.Traces = dict()
+        pass
+
+
+    @classmethod
+    def getChoiceStats(cls):
+        '''
+        Returns diagnostics on how often ICR decisions were reused.
+
+        Parameters:
+            None
+        Returns:
+            (dict): number of 'hits', 'misses', and remembered 'choices'
+        '''
+        return {'hits' : Unit.ChoiceHits, 'misses' : Unit.ChoiceMisses, 'choices' : len(Unit.Choices)}
+
     
     def setAbout(self, a_txt):
-        '''Sets the _about_txt (str) attr.'''
+        '''Sets the _about_txt (str) attr to use instead of the file's about text.'''
         self._about_txt = a_txt
     
 
@@ -351,8 +438,11 @@ class Unit:
 
 
     def readAbout(self):
-        '''Returns the already formatted _about_txt (str) attr to be printed.'''
-        return self._about_txt
+        '''Returns the already formatted _about_txt (str) attr to be printed. Units
+        share their file's about text unless one is set.'''
+        if(hasattr(self, '_about_txt')):
+            return self._about_txt
+        return self.getLanguageFile().getAbout()
 
 
     def getLang(self):
@@ -412,10 +502,9 @@ class Unit:
     def ICR(cls, dsgn_name, lang, lib=None, ports=[], gens=[]):
         '''
         Intelligently select the entity given the unit name and library (if exists). 
-        
-        Also uses intelligent component recognition to try and decide between 
-        what entity is trying to be used. Updating the _reqs for a unit must be
-        done outside the scope of this method.
+
+        Decisions are remembered by the instantiation's signature so identical
+        instantiations are only scored once. See selectUnit().
 
         Returns None if the unit is not able to be identified.
 
@@ -427,17 +516,49 @@ class Unit:
         Returns:
             (Unit): unit object from the Jar
         '''
-        #toggle 'verbose' to print scores to console
-        verbose = False
-        #[1.] create a list of all potential design units
+        if(lib == None):
+            lib = ''
+        key = (dsgn_name.lower(), lang, lib.lower(), tuple(sorted(ports)), \
+            tuple(sorted(gens)), apt.getMixedLanguage())
+        #remember the lookup for the unit being decoded to know when its candidates change
+        if(Unit.Tracing_Now != None):
+            Unit.Tracing[Unit.Tracing_Now] += [('i', key[:3])]
+        if(key in Unit.Choices):
+            Unit.ChoiceHits += 1
+            return Unit.Choices[key]
+
+        Unit.ChoiceMisses += 1
+        dsgn_unit = cls.selectUnit(dsgn_name, lang, lib, ports, gens)
+        Unit.Choices[key] = dsgn_unit
+        return dsgn_unit
+
+
+    @classmethod
+    def getCandidates(cls, dsgn_name, lang, lib=None):
+        '''
+        Returns every unit that could be the design for the given unit name and
+        library (if exists), in the order ICR considers them.
+
+        Parameters:
+            dsgn_name (str): entity name
+            lang (Unit.Language): language of the unit instantiating the design
+            lib (str): library name
+        Returns:
+            potentials ([Unit]): list of potential design units
+        '''
         potentials = []
         #if no library, get list of all units
         if(lib == '' or lib == None):
-            for ul in list(cls.Bottle.values()):
-                #print("searching for:",dsgn_name,"/ units:",list(ul.keys()))
-                #could be any design that falls under this unit name
-                if(dsgn_name.lower() in list(ul.keys())):
-                    potentials += ul[dsgn_name]
+            #could be any design that falls under this unit name
+            if(dsgn_name.lower() in cls.Shelf.keys()):
+                bins = cls.Shelf[dsgn_name]
+                libs = list(bins.keys())
+                #keep libraries in the order they were first found
+                if(len(libs) > 1):
+                    order = list(cls.Bottle.keys())
+                    libs.sort(key=order.index)
+                for ul in libs:
+                    potentials += bins[ul]
 
         #a library was given, only pull list from that specific library.unit slot
         elif(lib.lower() in cls.Bottle.keys() and dsgn_name.lower() in cls.Bottle[lib].keys()):
@@ -446,6 +567,32 @@ class Unit:
         #filter the units to only include original language units if mixed language is OFF
         if(apt.getMixedLanguage() == False):
             potentials = list(filter(lambda a: a.getLang() == lang, potentials))
+        return potentials
+
+
+    @classmethod
+    def selectUnit(cls, dsgn_name, lang, lib=None, ports=[], gens=[]):
+        '''
+        Intelligently select the entity given the unit name and library (if exists). 
+        
+        Also uses intelligent component recognition to try and decide between 
+        what entity is trying to be used. Updating the _reqs for a unit must be
+        done outside the scope of this method.
+
+        Returns None if the unit is not able to be identified.
+
+        Parameters:
+            u (str): entity name
+            l (str): library name
+            ports ([str]): list of ports that were instantiated (all lower-case)
+            gens ([str]): list of generics that were instantiated (all lower-case)
+        Returns:
+            (Unit): unit object from the Jar
+        '''
+        #toggle 'verbose' to print scores to console
+        verbose = False
+        #[1.] create a list of all potential design units
+        potentials = cls.getCandidates(dsgn_name, lang, lib)
 
         #[2.] determine if ICR needs to be performed or unit is obviously only one
         dsgn_unit = None
@@ -462,50 +609,35 @@ class Unit:
             log.info("Performing Intelligent Component Recognition for "+dsgn_name+"...")
         #initialize scores for each potential component
         scores = [0]*len(potentials)
+        port_set = set(ports)
+        gen_set = set(gens)
 
         #iterate through every potential component
         for i in range(len(potentials)):
+            intf = potentials[i].getInterface()
+            p_names,g_names,p_reqs,g_reqs = intf.getNameSets()
 
-            #[3a.] get the real ports for this challenging/potential component
-            challenged_ports = list(potentials[i].getInterface().getPorts().values())
+            #[3a.] compare the instance ports with the real ports
             #can only compare lengths if positional arguments were used
-            if(len(ports) and ports.count('?')):
-                scores[i] = len(ports) - abs(len(challenged_ports) - len(ports))
-            #compare the instance ports with the real ports
+            if(len(ports) and '?' in port_set):
+                scores[i] = len(ports) - abs(len(intf.getPorts()) - len(ports))
+            #an input port without a default value MUST be instantiated (DQ'ed)
+            elif(p_reqs.issubset(port_set) == False):
+                scores[i] = 0
+            #count every true port that is instantiated
             else:
-                for c_port in challenged_ports:
-                    #check if the true port is instantiated
-                    if(c_port.getName().lower() in ports):
-                        scores[i] += 1
-                    #this port was already previously initialized and can be ignored
-                    elif(c_port.isInitialized()):
-                        continue
-                    #this port was not instantiated, yet it MUST since its an input
-                    elif(c_port.getRoute() == Port.Route.IN):
-                        #automatically set score to 0 (DQ'ed)
-                        scores[i] = 0
-                        break
-                pass
+                scores[i] = len(p_names & port_set)
 
-            #[3b.] get the real generics for this challenging/potential component
-            challenged_gens = list(potentials[i].getInterface().getGenerics().values())
+            #[3b.] compare the instance generics with the real generics
             #can only compare lengths if positional arguments were used
-            if(len(gens) and gens.count('?')):
-                scores[i] = len(gens) - abs(len(challenged_gens) - len(gens))
-            #compare the instance generics with the real generics
+            if(len(gens) and '?' in gen_set):
+                scores[i] = len(gens) - abs(len(intf.getGenerics()) - len(gens))
+            #a generic without a default value MUST be initialized (DQ'ed)
+            elif(g_reqs.issubset(gen_set) == False):
+                scores[i] = 0
+            #count every true generic that is instantiated
             else:
-                for c_gen in challenged_gens:
-                    #check if the true generic is instantiated
-                    if(c_gen.getName().lower() in gens):
-                        scores[i] += 1
-                    #this generic was already previously initialized and can be ignored
-                    elif(c_gen.isInitialized()):
-                        continue
-                    #this generic was not initialized, yet it MUST be so its DQ'ed (score to 0)
-                    else:
-                        scores[i] = 0
-                        break
-                pass
+                scores[i] += len(g_names & gen_set)
 
             pass
 
@@ -550,7 +682,7 @@ class Unit:
         specified, return the 2-level (Map) for that architecture's configuration.'''
         if(arch == None):
             return self._config
-        elif(arch.lower() in self._config_modes.keys()):
+        elif(hasattr(self, '_config_modes') and arch.lower() in self._config_modes.keys()):
             return self._config_modes[arch]
         else:
             return Map()
@@ -580,6 +712,9 @@ class Unit:
             return
         #add new edge
         self.Hierarchy.addEdge(self, req)
+        #remember the edge for replaying the unit's decode
+        if(self in Unit.Tracing):
+            Unit.Tracing[self] += [('r', req)]
         pass
     
 
@@ -628,6 +763,9 @@ class Unit:
 
 class Signal:
 
+    #only these attributes are stored per signal (no per-object dictionary)
+    __slots__ = ('_lang', '_name', '_dtype', '_value')
+
 
     def __init__(self, lang, name, dtype, value):
         '''
@@ -642,9 +780,10 @@ class Signal:
             None
         '''
         self._lang = lang
-        self._name = name
-        self._dtype = dtype
-        self._value = value
+        #share identifier and token strings between all signals
+        self._name = sys.intern(name)
+        self._dtype = [sys.intern(t) for t in dtype]
+        self._value = [sys.intern(t) for t in value]
         pass
 
     def writeConnection(self, lang, spaces=1, end=';', name='*'):
@@ -814,11 +953,18 @@ class Signal:
         return apt.listToStr(self._value, delim='')
 
 
+    def getValueTokens(self):
+        '''Returns the list of tokens that make up the initial value ([str]).'''
+        return self._value
+
+
     pass
 
 
 class Generic(Signal):
 
+    __slots__ = ()
+
 
     def __init__(self, lang, name, dtype, value):
         super().__init__(lang, name, dtype, value)
@@ -849,6 +995,8 @@ class Generic(Signal):
 
 class Port(Signal):
 
+    __slots__ = ('_mode', '_route', '_bus_width')
+
 
     class Route(Enum):
         IN = 1,
@@ -877,7 +1025,7 @@ class Port(Signal):
         super().__init__(lang, name, dtype, value)
 
         #store the port's direction word
-        self._mode = mode
+        self._mode = sys.intern(mode)
 
         #store the port's direction data (works for both verilog and vhdl)
         mode = mode.lower()
@@ -936,6 +1084,13 @@ class Port(Signal):
         return self._mode
 
 
+    def getBusWidth(self):
+        '''Returns the bounds of the port's bus ((str, str)), or ('','') if it is not a bus.'''
+        if(hasattr(self, "_bus_width")):
+            return self._bus_width
+        return ('','')
+
+
     def castRoute(self, lang, even=True):
         '''Converts _route (Port.Route) to (str). `even` will ensure even spaces for
         all directions.'''
@@ -961,6 +1116,9 @@ class Port(Signal):
 class Interface:
     'An interface has generics and port signals. An entity will have an interface.'
 
+    #only these attributes are stored per interface (no per-object dictionary)
+    __slots__ = ('_name', '_library', '_default_lang', '_ports', '_generics', '_name_sets')
+
 
     def __init__(self, name, library, def_lang):
         self._name = name
@@ -990,10 +1148,42 @@ class Interface:
             self._ports[name] = Port(self._default_lang, name, mode, dtype, value, bus_width=bounds)
         else:
             self._generics[name] = Generic(self._default_lang, name, dtype, value)
-        
+        #name sets must be computed again
+        if(hasattr(self, "_name_sets")):
+            delattr(self, "_name_sets")
         pass
 
 
+    def getNameSets(self):
+        '''
+        Returns the lower-case connection names used to score this interface
+        during intelligent component recognition.
+
+        Dynamically creates _name_sets attr to be reused until another 
+        connection is added.
+
+        Parameters:
+            None
+        Returns:
+            p_names (set): names of all ports
+            g_names (set): names of all generics
+            p_reqs (set): names of input ports without a default value
+            g_reqs (set): names of generics without a default value
+        '''
+        if(hasattr(self, "_name_sets")):
+            return self._name_sets
+
+        p_names = set([p.getName().lower() for p in self.getPorts().values()])
+        g_names = set([g.getName().lower() for g in self.getGenerics().values()])
+        p_reqs = set([p.getName().lower() for p in self.getPorts().values() \
+            if(p.isInitialized() == False and p.getRoute() == Port.Route.IN)])
+        g_reqs = set([g.getName().lower() for g in self.getGenerics().values() \
+            if(g.isInitialized() == False)])
+
+        self._name_sets = (p_names, g_names, p_reqs, g_reqs)
+        return self._name_sets
+
+
     def writeConnections(self, form=None, align=True, g_name=None, p_name=None):
         '''
         Write the necessary constants (from generics) and signals (from ports)
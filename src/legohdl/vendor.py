@@ -15,6 +15,7 @@ from .apparatus import Apparatus as apt
 from .cfg import Cfg, Section, Key
 from .map import Map
 from .git import Git
+from .lock import Lock
 
 
 class Vendor:
@@ -99,15 +100,15 @@ class Vendor:
             return False
 
         #create temp dir
-        apt.makeTmpDir()
+        tmp = apt.makeTmpDir()
 
         #clone from repository
         if(Git.isBlankRepo(url) == False):
-            tmp_repo = Git(apt.TMP, clone=url)
+            tmp_repo = Git(tmp, clone=url)
 
             #determine if a .prfl file exists
             log.info("Locating .vndr file... ")
-            files = os.listdir(apt.TMP)
+            files = os.listdir(tmp)
             for f in files:
                 vndr_i = f.find(self.EXT)
                 if(vndr_i > -1):
@@ -128,14 +129,14 @@ class Vendor:
                 #add to profiles folder
                 else:
                     log.info("Adding vendor "+self.getName()+"...")
-                    self._repo = Git(self.getVendorDir(), clone=apt.TMP)
+                    self._repo = Git(self.getVendorDir(), clone=tmp)
                     #assign the correct url to the vendor
                     self._repo.setRemoteURL(tmp_repo.getRemoteURL())
         else:
             success = False
 
         #clean up temp dir
-        apt.cleanTmpDir()
+        apt.cleanTmpDir(tmp)
         return success
 
 
@@ -151,56 +152,57 @@ class Vendor:
         '''
         log.info("Publishing "+block.getFull(inc_ver=True)+" to vendor "+self.getName()+"...")
         
-        #make sure the vendor is up-to-date
-        self.refresh(quiet=True, try_set=False)
+        with Lock(self.getVendorDir()):
+            #make sure the vendor is up-to-date
+            self.refresh(quiet=True, try_set=False)
 
-        #make sure the path exists in vendor
-        path = self.getVendorDir()+block.L()+'/'+block.N()+'/'
-        os.makedirs(path, exist_ok=True)
+            #make sure the path exists in vendor
+            path = self.getVendorDir()+block.L()+'/'+block.N()+'/'
+            os.makedirs(path, exist_ok=True)
 
-        meta_path = path+apt.MARKER
+            meta_path = path+apt.MARKER
 
-        #unfreeze files to write data
-        block.modWritePermissions(enable=True, path=path)
-        
-        #add more information to the metadata before publishing to vendor
-        c = Cfg(meta_path, data=Section(block._meta._data))
-        
-        #add what versions are available
-        c.set('block.versions', Cfg.castStr(block.sortVersions(block.getTaggedVersions())))
+            #unfreeze files to write data
+            block.modWritePermissions(enable=True, path=path)
+
+            #add more information to the metadata before publishing to vendor
+            c = Cfg(meta_path, data=Section(block._meta._data))
 
-        #add the size of latest project (kilobytes)
-        c.set('block.size', str(block.getSize()))
+            #add what versions are available
+            c.set('block.versions', Cfg.castStr(block.sortVersions(block.getTaggedVersions())))
 
-        #add VHDL units and Verilog units
-        vhdl_units = block.loadHDL(lang='vhdl', returnnames=True)
-        vlog_units = block.loadHDL(lang='vlog', returnnames=True)
+            #add the size of latest project (kilobytes)
+            c.set('block.size', str(block.getSize()))
 
-        c.set('block.vhdl-units', Cfg.castStr(vhdl_units))
-        c.set('block.vlog-units', Cfg.castStr(vlog_units))
+            #add VHDL units and Verilog units
+            vhdl_units = block.loadHDL(lang='vhdl', returnnames=True)
+            vlog_units = block.loadHDL(lang='vlog', returnnames=True)
 
-        #write metadata to marker file in vendor for this block
-        c.write(auto_indent=False)
+            c.set('block.vhdl-units', Cfg.castStr(vhdl_units))
+            c.set('block.vlog-units', Cfg.castStr(vlog_units))
 
-        #write changelog in vendor for this block (if exists)
-        if(block.getChangelog() != None):
-            #get the changelog name
-            _,cl_file = os.path.split(block.getChangelog())
-            #copy changelog into vendor
-            shutil.copyfile(block.getChangelog(), path+cl_file)
-            #stage changelog change
-            self._repo.add(block.L()+'/'+block.N()+'/'+cl_file)
+            #write metadata to marker file in vendor for this block
+            c.write(auto_indent=False)
 
-        #stage meta changes
-        self._repo.add(block.L()+'/'+block.N()+'/'+apt.MARKER)
+            #write changelog in vendor for this block (if exists)
+            if(block.getChangelog() != None):
+                #get the changelog name
+                _,cl_file = os.path.split(block.getChangelog())
+                #copy changelog into vendor
+                shutil.copyfile(block.getChangelog(), path+cl_file)
+                #stage changelog change
+                self._repo.add(block.L()+'/'+block.N()+'/'+cl_file)
 
-        self._repo.commit("Publishes "+block.getFull(inc_ver=True))
+            #stage meta changes
+            self._repo.add(block.L()+'/'+block.N()+'/'+apt.MARKER)
 
-        #synchronize changes with its remote
-        self._repo.push()
+            self._repo.commit("Publishes "+block.getFull(inc_ver=True))
 
-        #freeze files as read-only access
-        block.modWritePermissions(enable=False, path=path)
+            #synchronize changes with its remote
+            self._repo.push()
+
+            #freeze files as read-only access
+            block.modWritePermissions(enable=False, path=path)
 
         log.info("Success.")
         pass
@@ -233,30 +235,32 @@ class Vendor:
         Returns:
             None
         '''
-        #first remove any unsaved changes
-        self._repo.git('restore','--staged','.')
-        self._repo.git('restore','.')
-        
-        #try to sync with a remote
-        if((self._url != '' or self._url != None) and try_set):
-            self.setRemoteURL(self._url, exists_ok=True)
-            pass
-
-        #pull from remote location
-        if(self._repo.remoteExists()):
-            log.info("Refreshing vendor "+self.getName()+"...")
-            #check status from remote
-            up2date, connected = self._repo.isLatest()
-            if(connected == False):
-                return
-            if(up2date == False):
-                log.info('Pulling new updates...')
-                self._repo.pull()
-                log.info("success")
-            else:
-                log.info("Already up-to-date.")
-        elif(quiet == False):
-            log.info("Vendor "+self.getName()+" is local and does not require refresh.")
+        #keep other legohdl processes from refreshing the same vendor at once
+        with Lock(self.getVendorDir()):
+            #first remove any unsaved changes
+            self._repo.git('restore','--staged','.')
+            self._repo.git('restore','.')
+
+            #try to sync with a remote
+            if((self._url != '' or self._url != None) and try_set):
+                self.setRemoteURL(self._url, exists_ok=True)
+                pass
+
+            #pull from remote location
+            if(self._repo.remoteExists()):
+                log.info("Refreshing vendor "+self.getName()+"...")
+                #check status from remote
+                up2date, connected = self._repo.isLatest()
+                if(connected == False):
+                    return
+                if(up2date == False):
+                    log.info('Pulling new updates...')
+                    self._repo.pull()
+                    log.info("success")
+                else:
+                    log.info("Already up-to-date.")
+            elif(quiet == False):
+                log.info("Vendor "+self.getName()+" is local and does not require refresh.")
         pass
 
 
@@ -37,6 +37,11 @@ class Verilog(Language):
             "`resetall", "`timescale", "`undef"]
 
         self._join_dots = False
+        self._keywords = ['module', 'endmodule']
+
+        #a file without a block is only tokenized on demand (see Language.preload)
+        if(block == None):
+            return
 
         self.spinCode()
 
@@ -60,51 +65,64 @@ class Verilog(Language):
         if(hasattr(self, "_designs")):
             return self._designs
 
+        #reuse the designs identified on a previous run
+        if(self.replayCache()):
+            return self._designs
+
         #get the list of statements
         c_statements = self.spinCode()
 
         self._designs = []
         #looking for design units in each statement
-        for cseg in c_statements:
+        for i,cseg in enumerate(c_statements):
             #print(cseg)
             if(cseg[0] == 'module'):
                 #log.info("Identified module "+cseg[1])
                 self._designs += [Unit(cseg[1], self.getPath(), Unit.Design.ENTITY, self)]
                 dsgn_unit = self._designs[-1]
-                self.getInterface(dsgn_unit, c_statements[c_statements.index(cseg):])
+                #only pass the statements up to the module's 'endmodule'
+                self.getInterface(dsgn_unit, c_statements[i:self.findStatement('endmodule', i)+1])
+                self.recordUnit(dsgn_unit)
                 pass
+
+        #store the results for the next run
+        self.saveCache()
         return self._designs
 
 
-    def decode(self, u, recursive=True):
+    def _decode(self, u, recursive):
         '''
-        Decipher and collect data on a unit's lower-level entities.
+        Decipher and collect data on a unit's lower-level entities. Yields each
+        lower-level unit found to possibly decode before continuing (see 
+        Language.decode).
 
         Parameters:
             u (Unit): the unit file who's interface to update
             recursive (bool): determine if to tunnel through entities
         Returns:
-            None
+            (generator): yields lower-level units (Unit) to decode
         '''
         #get the code statements
         csegs = self.spinCode()
         skips = ['reg', 'wire', 'module', 'always', 'case', 'while', \
             'repeat']
 
-        in_module = False
         in_case = False
 
         #do not decode unit again if already decoded
         if(u.isChecked()):
             return
 
-        for cseg in csegs:
+        #jump directly to the module's declaration
+        start = len(csegs)
+        for m in self.getIndex('module'):
+            if(csegs[m][0] == 'module' and csegs[m][1] == u.E()):
+                start = m
+                break
+
+        for k in range(start, len(csegs)):
+            cseg = csegs[k]
             #print(cseg)
-            #determine when entering module
-            if(cseg[0] == 'module' and cseg[1] == u.E()):
-                in_module = True
-            elif(in_module == False):
-                continue
 
             #check for exit case - finding 'endmodule'
             if(cseg[0] == 'endmodule'):
@@ -161,8 +179,7 @@ class Verilog(Language):
                     #add as a requirement
                     u.addReq(comp_unit)
                     #enter decoding for the lower-level unit
-                    if(comp_unit.isChecked() == False and recursive):
-                        comp_unit.getLanguageFile().decode(comp_unit, recursive)
+                    yield comp_unit
                 pass
 
         pass
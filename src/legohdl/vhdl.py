@@ -11,7 +11,7 @@
 
 from .language import Language
 from .unit import Unit
-from .map import Map
+from .map import Map, FastMap
 
 
 class Vhdl(Language):
@@ -34,6 +34,12 @@ class Vhdl(Language):
         self._comment = '--'
         self._atomics = ['begin', 'is']
         self._join_dots = True
+        self._keywords = ['entity', 'architecture', 'package', 'configuration', \
+            'component', 'end']
+
+        #a file without a block is only tokenized on demand (see Language.preload)
+        if(block == None):
+            return
 
         self.spinCode()
 
@@ -57,6 +63,10 @@ class Vhdl(Language):
         if(hasattr(self, "_designs")):
             return self._designs
 
+        #reuse the designs identified on a previous run
+        if(self.replayCache()):
+            return self._designs
+
         #get the list of statements
         c_statements = self.spinCode()
 
@@ -66,7 +76,7 @@ class Vhdl(Language):
         pkgs = []
 
         #looking for design units in each statement
-        for cseg in c_statements:
+        for i,cseg in enumerate(c_statements):
             #collect library calls as going forward
             if(cseg[0].lower() == 'library'):
                 #print(cseg[1])
@@ -82,9 +92,11 @@ class Vhdl(Language):
                 #print("Identified entity: "+cseg[1])
                 self._designs += [Unit(cseg[1], self.getPath(), Unit.Design.ENTITY, self)]
                 dsgn_unit = self._designs[-1]
-                self.getInterface(dsgn_unit, c_statements[c_statements.index(cseg):])
+                #only pass the statements up to the entity's first 'end'
+                self.getInterface(dsgn_unit, c_statements[i:self.findStatement('end', i)+1])
                 #link visible libraries and packages
                 dsgn_unit.linkLibs(libs, pkgs)
+                self.recordUnit(dsgn_unit, libs, pkgs)
                 #reset package spaces
                 pkgs = []
                 pass
@@ -95,6 +107,7 @@ class Vhdl(Language):
                 dsgn_unit = self._designs[-1]
                 #link visible libraries and packages
                 dsgn_unit.linkLibs(libs, pkgs)
+                self.recordUnit(dsgn_unit, libs, pkgs)
                 #reset package spaces
                 pkgs = []
                 pass
@@ -107,6 +120,7 @@ class Vhdl(Language):
                 dsgn_unit.setConfig(cseg[1])
                 #decode the configuration and assign it the entity
                 self._getConfigurations(dsgn_unit, cseg[1])
+                self.recordEvent('config', entity_name, cseg[1])
                 pass
             #link an architecture
             elif(cseg[0].lower() == 'architecture'):
@@ -114,21 +128,25 @@ class Vhdl(Language):
                 #get who owns this architecture
                 dsgn_entity = cseg[3]
                 Unit.Jar[self.getOwner().M()][self.getOwner().L()][self.getOwner().N()][dsgn_entity].linkArch(cseg[1])
+                self.recordEvent('arch', dsgn_entity, cseg[1])
                 pass
 
+        #store the results for the next run
+        self.saveCache()
         return self._designs
 
 
-    def decode(self, u, recursive=True):
+    def _decode(self, u, recursive):
         '''
         Decipher and collect data on a unit's instantiated lower-level entities.
-        Does not decode package designs.
+        Does not decode package designs. Yields each lower-level unit found to
+        possibly decode before continuing (see Language.decode).
 
         Parameters:
             u (Unit): the unit file who's interface to update
             recursive (bool): determine if to tunnel through entities
         Returns:
-            None
+            (generator): yields lower-level units (Unit) to decode
         '''
         #do not decode unit again if already decoded
         if(u.isChecked()):
@@ -139,7 +157,6 @@ class Vhdl(Language):
         #mapping of identifiers to find and replace with value
         configurations = Map()
 
-        in_arch = False
         in_begin = False
         arch_name = ''
         #get all code statements
@@ -148,14 +165,15 @@ class Vhdl(Language):
         #make sure the design unit is an entity to read architectures
         if(u.getDesign() == Unit.Design.PACKAGE):
             #check if package file uses an instance of a generic package
-            on_track = False
-            for cseg in csegs:
-                if(cseg[0].lower() == 'package' and cseg[1] == u.E()):
-                    on_track = True
-                elif(cseg[0] == 'is' and on_track):
-                    on_track = True
-                elif(cseg[0] == 'new' and on_track):
-                    inherits = cseg[1]
+            for p in self.getIndex('package'):
+                if(csegs[p][1] != u.E()):
+                    continue
+                #step over the 'is' keyword following the package name
+                j = p+1
+                while(j < len(csegs) and csegs[j][0] == 'is'):
+                    j += 1
+                if(j < len(csegs) and csegs[j][0] == 'new'):
+                    inherits = csegs[j][1]
                     #split into library and 
                     parts = inherits.split('.')
                     inherit_lib = 'work'
@@ -165,8 +183,6 @@ class Vhdl(Language):
                     u.linkLibs([inherit_lib], [inherit_pkg])
                     #done adding inherited package as dependency
                     break
-                else:
-                    on_track = False
                 pass
 
         #collect all visible component declarations
@@ -174,8 +190,7 @@ class Vhdl(Language):
             #print("Importing "+pkg.getTitle())
             comps += pkg.getLanguageFile().getComponents(pkg)
             #also further decode this package
-            if(pkg.isChecked() == False and recursive):
-                pkg.getLanguageFile().decode(pkg, recursive)
+            yield pkg
             pass
         
         #only decode entity units
@@ -183,130 +198,173 @@ class Vhdl(Language):
             u.setChecked(True)
             return
 
-        for cseg in csegs:
-            #determine when to enter the architecture
-            if(cseg[0].lower() == 'architecture' and cseg[3].lower() == u.E().lower()):
-                in_arch = True
-                #store arch_name for exit case later
-                arch_name = cseg[1].lower() 
-                #reset configurations (get configurations frome entity's configuration unit)
-                configurations = u.getConfig(arch=arch_name)
-            elif(in_arch == False):
+        #jump directly to each of the entity's architectures
+        k = 0
+        for a in self.getArchitectureIndex(u.E()):
+            if(a < k):
                 continue
-            #inside architecture declaration section
-            elif(in_begin == False):
-                #detect in-line architecture configurations
-                if(cseg[0].lower() == 'for'):
-                    #find first ':'
-                    if(cseg.count(':') == 0):
-                        continue
-                    #find what instances should be used for this configuration
-                    inst_name = cseg[1]                    
-
-                    i = cseg.index(':')
-                    #store what identifier should be found in the architecture
-                    search_for = cseg[i+1]
-                    #print(inst_name)
-                    #find what identifier is to replace and configure an instance
-                    for j in range(i+1, len(cseg)):
-                        if(cseg[j].lower() == 'use'):
-                            #skip over 'entity' is that was the following keyword
-                            replace_with = cseg[j+1+int(cseg[j+1].lower() == 'entity')]
-                            break
-                    #check if this component name has aleady been added to the Map
-                    if(search_for.lower() not in configurations.keys()):
-                        configurations[search_for] = Map()
-                    #add configuration
-                    configurations[search_for][inst_name] = replace_with
+            k = a
+            while k < len(csegs):
+                cseg = csegs[k]
+                k += 1
+                #determine when to enter the architecture
+                if(cseg[0].lower() == 'architecture' and cseg[3].lower() == u.E().lower()):
+                    #store arch_name for exit case later
+                    arch_name = cseg[1].lower() 
+                    #reset configurations (get configurations frome entity's configuration unit)
+                    configurations = u.getConfig(arch=arch_name)
+                #inside architecture declaration section
+                elif(in_begin == False):
+                    #detect in-line architecture configurations
+                    if(cseg[0].lower() == 'for'):
+                        #find first ':'
+                        if(cseg.count(':') == 0):
+                            continue
+                        #find what instances should be used for this configuration
+                        inst_name = cseg[1]                    
+
+                        i = cseg.index(':')
+                        #store what identifier should be found in the architecture
+                        search_for = cseg[i+1]
+                        #print(inst_name)
+                        #find what identifier is to replace and configure an instance
+                        for j in range(i+1, len(cseg)):
+                            if(cseg[j].lower() == 'use'):
+                                #skip over 'entity' is that was the following keyword
+                                replace_with = cseg[j+1+int(cseg[j+1].lower() == 'entity')]
+                                break
+                        #check if this component name has aleady been added to the Map
+                        if(search_for.lower() not in configurations.keys()):
+                            configurations[search_for] = Map()
+                        #add configuration
+                        configurations[search_for][inst_name] = replace_with
+                        pass
                     pass
-                pass
-
-            #track scope stack to determine when maybe within the architecture implementation
-            if(cseg[0].lower() == 'begin'):
-                in_begin = True
-
-            #exit case - finding 'end' with architecture or its name (optional, can also just be 'end')
-            if(in_begin and cseg[0].lower() == 'end'):
-                if((len(cseg) > 1 and (cseg[1].lower() == 'architecture' or cseg[1].lower() == arch_name)) or
-                    (len(cseg) == 1)):
-                    u.setChecked(True)
-                    in_arch = False
-                    in_begin = False
-                    #use continue to go through all architectures
-                    continue
 
-            #find component declarations
-            if(cseg[0].lower() == 'component'):
-                #log.info("Declared component: "+cseg[1])
-                comps += [cseg[1].lower()]
-
-            #find instantiations    
-            if(in_begin):
-                while cseg.count(':'):
-                    sp_i = cseg.index(':')
-                    comp_name = cseg[sp_i+1]
-                    inst_name = cseg[sp_i-1]
-                    #is it an entity style?
-                    entity_style = (comp_name.lower() == 'entity')
-                    if(entity_style):
-                        comp_name = cseg[sp_i+2]
-                    #move through the code segment
-                    cseg = cseg[sp_i+1:]
-
-                    #check if this component name is to be replaced by configuration
-                    if(comp_name.lower() in configurations.keys()):
-                        #swap with configuration this component has specific instance name
-                        if(inst_name.lower() in configurations[comp_name].keys()):
-                            comp_name = configurations[comp_name][inst_name]
-                            entity_style = True
-                        #swap with configuration this component to be configured for 'all'
-                        elif('all' in configurations[comp_name].keys()):
-                            comp_name = configurations[comp_name]['all']
-                            entity_style = True
-                        pass
+                #track scope stack to determine when maybe within the architecture implementation
+                if(cseg[0].lower() == 'begin'):
+                    in_begin = True
+
+                #exit case - finding 'end' with architecture or its name (optional, can also just be 'end')
+                if(in_begin and cseg[0].lower() == 'end'):
+                    if((len(cseg) > 1 and (cseg[1].lower() == 'architecture' or cseg[1].lower() == arch_name)) or
+                        (len(cseg) == 1)):
+                        u.setChecked(True)
+                        in_begin = False
+                        #go on to the entity's next architecture
+                        break
 
-                    #default not reference a library
-                    lib = None
-                    #determine if a library is attached to this entity name
-                    comp_parts = comp_name.split('.')
-                    
-                    #print(comp_parts)
-                    if(len(comp_parts) == 2):
-                        #must have first piece be a library name
+                #find component declarations
+                if(cseg[0].lower() == 'component'):
+                    #log.info("Declared component: "+cseg[1])
+                    comps += [cseg[1].lower()]
+
+                #find instantiations    
+                if(in_begin):
+                    while cseg.count(':'):
+                        sp_i = cseg.index(':')
+                        comp_name = cseg[sp_i+1]
+                        inst_name = cseg[sp_i-1]
+                        #is it an entity style?
+                        entity_style = (comp_name.lower() == 'entity')
                         if(entity_style):
-                            #reference self library if it's 'work'
-                            if(comp_parts[0].lower() == 'work'):
-                                lib = self.getOwner().L()
-                            #try to find the external library name
-                            elif(comp_parts[0].lower() in u.getLibs(lower_case=True)):
-                                lib = comp_parts[0]
-                    #the last piece is the entity name
-                    comp_name = comp_parts[-1]
-                    #ensure the component name has its component declaration visible
-                    if(entity_style == False):
-                        if(comp_name.lower() not in comps):
-                            #log.error("COMPONENT DECLARATION NOT FOUND: "+comp_name)
-                            continue
+                            comp_name = cseg[sp_i+2]
+                        #move through the code segment
+                        cseg = cseg[sp_i+1:]
+
+                        #check if this component name is to be replaced by configuration
+                        if(comp_name.lower() in configurations.keys()):
+                            #swap with configuration this component has specific instance name
+                            if(inst_name.lower() in configurations[comp_name].keys()):
+                                comp_name = configurations[comp_name][inst_name]
+                                entity_style = True
+                            #swap with configuration this component to be configured for 'all'
+                            elif('all' in configurations[comp_name].keys()):
+                                comp_name = configurations[comp_name]['all']
+                                entity_style = True
+                            pass
+
+                        #default not reference a library
+                        lib = None
+                        #determine if a library is attached to this entity name
+                        comp_parts = comp_name.split('.')
+                    
+                        #print(comp_parts)
+                        if(len(comp_parts) == 2):
+                            #must have first piece be a library name
+                            if(entity_style):
+                                #reference self library if it's 'work'
+                                if(comp_parts[0].lower() == 'work'):
+                                    lib = self.getOwner().L()
+                                #try to find the external library name
+                                elif(comp_parts[0].lower() in u.getLibs(lower_case=True)):
+                                    lib = comp_parts[0]
+                        #the last piece is the entity name
+                        comp_name = comp_parts[-1]
+                        #ensure the component name has its component declaration visible
+                        if(entity_style == False):
+                            if(comp_name.lower() not in comps):
+                                #log.error("COMPONENT DECLARATION NOT FOUND: "+comp_name)
+                                continue
+
+                        #gather instantiated ports and generics
+                        p_list, g_list = self.collectInstanceMaps(cseg)
+                        #try to locate the unit with the given information
+                        comp_unit = Unit.ICR(comp_name, lang=u.getLang(), lib=lib, ports=p_list, gens=g_list)
+                        #add the unit as a requirement and decode it if exists
+                        if(comp_unit != None):
+                            u.addReq(comp_unit)
+                            yield comp_unit
+                            pass
 
-                    #gather instantiated ports and generics
-                    p_list, g_list = self.collectInstanceMaps(cseg)
-                    #try to locate the unit with the given information
-                    comp_unit = Unit.ICR(comp_name, lang=u.getLang(), lib=lib, ports=p_list, gens=g_list)
-                    #add the unit as a requirement and decode it if exists
-                    if(comp_unit != None):
-                        u.addReq(comp_unit)
-                        if(comp_unit.isChecked() == False and recursive):
-                            comp_unit.getLanguageFile().decode(comp_unit, recursive)
                         pass
-
                     pass
-                pass
 
+                pass
             pass
 
         pass
 
 
+    def getArchitectureIndex(self, entity):
+        '''
+        Returns the offsets of every architecture statement in the code stream
+        that belongs to `entity` (case-insensitive).
+
+        Dynamically creates attr _arch_index so the architectures are only 
+        grouped by entity once.
+
+        Parameters:
+            entity (str): the entity name
+        Returns:
+            ([int]): ascending offsets into the code stream
+        '''
+        if(hasattr(self, "_arch_index") == False):
+            self._arch_index = FastMap()
+            csegs = self.spinCode()
+            for a in self.getIndex('architecture'):
+                if(len(csegs[a]) > 3):
+                    self._arch_index.setdefault(csegs[a][3], []).append(a)
+                pass
+        return self._arch_index.get(entity, [])
+
+
+    def dropStream(self):
+        '''
+        Releases this file's code stream and its statement indices from memory.
+        All are created again on their next use.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        super().dropStream()
+        if(hasattr(self, "_arch_index")):
+            delattr(self, "_arch_index")
+        pass
+
+
     def _collectConnections(self, entity, tokens, is_port=True):
         '''
         Analyze VHDL code to gather data on ports and generics.
@@ -430,14 +488,17 @@ class Vhdl(Language):
         #print(entity)
         
         csegs = self.spinCode()
-        in_config = False
         arch = None
 
-        for cseg in csegs:
-            if(cseg[0].lower() == 'configuration' and cseg[1] == cfg_name):
-                in_config = True
-            elif(in_config == False):
-                continue
+        #jump directly to the configuration's declaration
+        start = len(csegs)
+        for c in self.getIndex('configuration'):
+            if(csegs[c][1] == cfg_name):
+                start = c
+                break
+
+        for k in range(start, len(csegs)):
+            cseg = csegs[k]
             #determine when to exit the configuration code
             if(len(cseg) > 1 and cseg[0].lower() == 'end' and (cseg[1].lower() == 'configuration' or \
                 cseg[1].lower() == cfg_name.lower())):
@@ -482,22 +543,26 @@ class Vhdl(Language):
         in_pkg = False
         #iterate through the code stream, identifying keywords as they come
         comps = []
-        for cseg in csegs:
-            #determine when entering package declaration
-            if(cseg[0].lower() == 'package' and cseg[1] == pkg.E()):
-                in_pkg = True
-            elif(in_pkg == False):
+        #jump directly to each declaration of the package
+        k = 0
+        for p in self.getIndex('package'):
+            if(p < k or csegs[p][1] != pkg.E()):
                 continue
-            #exit status - finding 'end' with 'package' or package's identifier
-            if(cseg[0].lower() == 'end'):
-                if(len(cseg) > 1 and (cseg[1].lower() == pkg.E().lower() or cseg[1].lower() == 'package')):
-                    in_pkg = False
-                elif(len(cseg) == 1):
-                    in_pkg = False
-            #add all component names as lower case for evaluation purposes
-            if(cseg[0].lower() == 'component'):
-                comps += [cseg[1].lower()]
-            pass
+            k = p
+            in_pkg = True
+            while(in_pkg and k < len(csegs)):
+                cseg = csegs[k]
+                k += 1
+                #exit status - finding 'end' with 'package' or package's identifier
+                if(cseg[0].lower() == 'end'):
+                    if(len(cseg) > 1 and (cseg[1].lower() == pkg.E().lower() or cseg[1].lower() == 'package')):
+                        in_pkg = False
+                    elif(len(cseg) == 1):
+                        in_pkg = False
+                #add all component names as lower case for evaluation purposes
+                if(cseg[0].lower() == 'component'):
+                    comps += [cseg[1].lower()]
+                pass
         #print("Components from this package:",comps)
         return comps
 
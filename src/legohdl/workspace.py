@@ -8,16 +8,19 @@
 #   "organization".
 # ------------------------------------------------------------------------------
 
-import os, shutil, glob
+import os, shutil, json, time, io, pickle, gc
 import logging as log
 from datetime import datetime
 
 from .vendor import Vendor
 from .apparatus import Apparatus as apt
 from .cfg import Cfg, Section, Key
-from .map import Map
+from .map import Map, FastMap
+from .graph import Graph
 from .git import Git
 from .block import Block
+from .language import Language
+from .unit import Unit
 
 
 class Workspace:
@@ -34,6 +37,13 @@ class Workspace:
     MIN_RATE = -1
     MAX_RATE = 1440
 
+    INDEX_FILE = "blocks.json"
+    INDEX_VERSION = 1
+
+    SNAPSHOT_FILE = "snapshot.pkl"
+    #increment when the pickled model changes to drop stale snapshots
+    SNAPSHOT_VERSION = 1
+
 
     def __init__(self, name, path, vendors=[], ask=True):
         '''
@@ -294,30 +304,36 @@ class Workspace:
             return self._visible_blocks
 
         self._visible_blocks = []
+        #blocks to identify designs from (in order)
+        loading = []
 
         #read the setting for multi-develop
         mult_dev = apt.getMultiDevelop()
 
+        #find marker files at every level using the workspace's block index
+        found = self.findBlockMarkers()
+
+        #reuse the entire model from the last run if nothing it was built from changed
+        if(self.loadSnapshot(found, id_dsgns)):
+            return self._visible_blocks
+
         #1. Search for downloaded blocks
 
-        #glob on the local workspace path
         #print("Local Blocks on:",self.getPath())
-        marker_files = glob.glob(self.getPath()+"**/*/"+apt.MARKER, recursive=True)
+        marker_files = found[0]
         #iterate through all found downloads
         for mf in marker_files:
             b = Block(mf, self, Block.Level.DNLD)
             #if the user is within a current block, load the HDL from its DNLD level (not INSTL)
             if(mult_dev == True or Block.getCurrent(bypass=True) == b):
                 self._visible_blocks += [b]
-                if(id_dsgns):
-                    b.loadHDL()
+                loading += [b]
             pass
 
         #2. Search for installed blocks
 
-        #glob on the workspace cache path
         #print("Cache Blocks on:",self.getCachePath())
-        marker_files = glob.glob(self.getCachePath()+"**/*/"+apt.MARKER, recursive=True)
+        marker_files = found[1]
         #iterate through all found installations
         for mf in marker_files:
             #the block must also have a valid git repository at its root
@@ -331,17 +347,15 @@ class Workspace:
                 #not in multi-develop mode
                 if(dnld_b == None or (mult_dev == False and Block.getCurrent(bypass=True) != dnld_b)):
                     self._visible_blocks += [b]
-                    if(id_dsgns):
-                        b.loadHDL()
+                    loading += [b]
             pass
 
         #3. Search for available blocks
             
-        #glob on each vendor path
         marker_files = []
         #find all marker files in each of the workspace's vendors
-        for vndr in self.getVendors():
-            marker_files += glob.glob(vndr.getVendorDir()+"**/*/"+apt.MARKER, recursive=True)
+        for vndr_markers in found[2:]:
+            marker_files += vndr_markers
         #iterate through all found availables
         for mf in marker_files:
             b = Block(mf, self, Block.Level.AVAIL)
@@ -356,15 +370,714 @@ class Workspace:
                 continue
             for spec_block in vis_block.getInstalls().values():
                 spec_vers_blocks += [spec_block]
-                if(id_dsgns):
-                    spec_block.loadHDL()
+                loading += [spec_block]
                 pass
             pass
         self._visible_blocks += spec_vers_blocks
 
+        if(id_dsgns):
+            #tokenize every block's files together before identifying designs
+            Block.preloadHDL(loading)
+            for b in loading:
+                b.loadHDL()
+            pass
+
+        self.captureSnapshot(found, id_dsgns)
+        #skip decoding units again that are unaffected by what changed
+        self.reuseTraces()
         return self._visible_blocks
 
 
+    def unloadBlocks(self):
+        '''
+        Forgets the loaded model of blocks and units so the next call to
+        loadBlocks() builds it again.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        if(hasattr(self, "_visible_blocks")):
+            delattr(self, "_visible_blocks")
+        self._snapshot = None
+        Block.Inventory = FastMap()
+        Block.Hierarchy = Graph()
+        Block.setCurrent(None)
+        Unit.resetJar()
+        Unit.Hierarchy = Graph()
+        pass
+
+
+    def isModelCurrent(self):
+        '''
+        Checks if the loaded model of blocks is still built from the same files
+        and settings by comparing them against the captured snapshot (see 
+        captureSnapshot). A model without a snapshot is never current.
+
+        Parameters:
+            None
+        Returns:
+            (bool): true if nothing the model was built from changed
+        '''
+        if(hasattr(self, "_snapshot") == False or self._snapshot == None):
+            return False
+        return self._snapshot['key'] == self.getSnapshotKey(self.findBlockMarkers()) and \
+            self.isManifestCurrent(self._snapshot['manifest'])
+
+
+    def findBlockMarkers(self):
+        '''
+        Returns the marker files found at every level: the workspace path, the
+        workspace cache, and each of the workspace's vendors (see findMarkers).
+
+        Parameters:
+            None
+        Returns:
+            ([[str]]): list of marker file paths for each searched root
+        '''
+        vndr_dirs = [vndr.getVendorDir() for vndr in self.getVendors()]
+        return self.findMarkers([self.getPath(), self.getCachePath()] + vndr_dirs)
+
+
+    def findMarkers(self, roots):
+        '''
+        Finds all block marker files below each root directory.
+
+        Uses the workspace's block index, which records every known directory 
+        with its modification time, its subdirectories, and if it holds a marker
+        file. A directory is only listed again if its modification time changed,
+        so unchanged trees are revalidated with a single stat per directory.
+
+        Hidden directories and directories within a found block are not searched.
+
+        Parameters:
+            roots ([str]): directories to search
+        Returns:
+            ([[str]]): list of marker file paths for each root
+        '''
+        index = self.loadBlockIndex()
+        fresh = dict()
+        #directories changed this recently may change again within the same mtime
+        racy = int(time.time()*10**9) - 2*(10**9)
+
+        def getEntry(d):
+            '''Returns the up-to-date [mtime, subdirs, has marker] entry for directory d.'''
+            if(d in fresh.keys()):
+                return fresh[d]
+            try:
+                mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                return None
+            entry = index.get(d)
+            if(entry == None or entry[0] != mtime):
+                files,subdirs = apt.scanDir(d)
+                entry = [mtime, subdirs, (apt.MARKER in files)]
+                if(mtime >= racy):
+                    entry[0] = None
+            fresh[d] = entry
+            return entry
+
+        found = []
+        for root in roots:
+            markers = []
+            if(getEntry(root) == None):
+                found += [markers]
+                continue
+            #walk depth-first, reporting the markers of a directory's children together
+            stack = [root]
+            while len(stack):
+                d = stack.pop()
+                children = []
+                for name in getEntry(d)[1]:
+                    child = d+name+'/'
+                    c_entry = getEntry(child)
+                    if(c_entry == None):
+                        continue
+                    #do not search within a block for more blocks
+                    if(c_entry[2]):
+                        markers += [child+apt.MARKER]
+                    else:
+                        children += [child]
+                stack += reversed(children)
+                pass
+            found += [markers]
+            pass
+
+        #save the index if any directory was added, removed, or changed
+        if(fresh != index):
+            self.saveBlockIndex(fresh)
+        return found
+
+
+    def loadBlockIndex(self):
+        '''
+        Reads the workspace's block index from its hidden directory.
+
+        Parameters:
+            None
+        Returns:
+            (dict): directory paths mapped to their [mtime, subdirs, has marker] entry
+        '''
+        #treat unreadable or outdated indexes as empty
+        try:
+            with open(self.getDir()+self.INDEX_FILE, 'r') as f:
+                data = json.load(f)
+            if(data['version'] != self.INDEX_VERSION):
+                return dict()
+            return data['dirs']
+        except (OSError, ValueError, KeyError, TypeError):
+            return dict()
+
+
+    def saveBlockIndex(self, dirs):
+        '''
+        Writes the workspace's block index to its hidden directory. Silently 
+        skips if the index cannot be written.
+
+        Parameters:
+            dirs (dict): directory paths mapped to their [mtime, subdirs, has marker] entry
+        Returns:
+            None
+        '''
+        index_file = self.getDir()+self.INDEX_FILE
+        data = {'version' : self.INDEX_VERSION, 'dirs' : dirs}
+        try:
+            #write to a temporary file first so readers never see a partial index
+            tmp_file = index_file+'.'+str(os.getpid())
+            with open(tmp_file, 'w') as f:
+                f.write(json.dumps(data))
+            os.replace(tmp_file, index_file)
+        except OSError:
+            pass
+        pass
+
+
+    def getSnapshotKey(self, found):
+        '''
+        Returns the settings and marker files a workspace snapshot depends on 
+        besides the files listed in its manifest.
+
+        Parameters:
+            found ([[str]]): list of marker file paths for each searched root
+        Returns:
+            (dict): values that must all be equal to reuse a snapshot
+        '''
+        #only a block rooted at the working directory becomes the current block
+        current = None
+        cwd = os.getcwd()
+        for mf in [mf for markers in found for mf in markers]:
+            root = apt.fs(os.path.dirname(mf))
+            if(apt.isEqualPath(root, cwd)):
+                current = root
+                break
+        return {
+            'path' : self.getPath(),
+            'found' : found,
+            'current' : current,
+            'multi-develop' : apt.getMultiDevelop(),
+            'mixed-language' : apt.getMixedLanguage(),
+            'build-dir' : apt.getBuildDirectory(),
+            'cache' : Language.CACHE_VERSION
+        }
+
+
+    def captureSnapshot(self, found, id_dsgns):
+        '''
+        Pickles the freshly loaded model of blocks (and their units if designs 
+        were identified) before anything else changes it. The model is only 
+        written by saveSnapshot() along with the recorded decodes.
+
+        Along with the model is a manifest of the modification times of every
+        Block.cfg file, searched source directory, and HDL file it was built 
+        from. A file that changed too recently to tell apart another change 
+        within the same modification time is listed without one, so it always
+        counts as changed (see getChangedFiles).
+
+        Dynamically creates attr _snapshot.
+
+        Parameters:
+            found ([[str]]): list of marker file paths for each searched root
+            id_dsgns (bool): determine if the blocks' designs were identified
+        Returns:
+            None
+        '''
+        self._snapshot = None
+        #gather every block, including specific versions
+        blocks = []
+        for lib in [l for m in Block.Inventory.values() for l in m.values()]:
+            for b in [b for lvls in lib.values() for b in lvls]:
+                if(b == None):
+                    continue
+                blocks += [b]
+                if(b.getLvl() == Block.Level.INSTL):
+                    blocks += list(b.getInstalls().values())
+                pass
+            pass
+
+        paths = []
+        for b in blocks:
+            paths += [b.getMetaFile()]
+            #new specific versions appear as folders next to the installation
+            if(b.getLvl() == Block.Level.INSTL):
+                paths += [os.path.dirname(b.getPath()[:-1])]
+            if(hasattr(b, "_hdl_files")):
+                paths += b._hdl_dirs + [hdl.getPath() for hdl in b._hdl_files]
+            pass
+
+        manifest = []
+        #files changed this recently may change again within the same mtime
+        racy = int(time.time()*10**9) - 2*(10**9)
+        try:
+            for p in paths:
+                st = os.stat(p)
+                mtime = st.st_mtime_ns if(st.st_mtime_ns <= racy) else None
+                manifest += [(p, mtime, st.st_size)]
+        except OSError:
+            return
+
+        model = {
+            'inventory' : Block.Inventory,
+            'hierarchy' : Block.Hierarchy,
+            'current' : Block.getCurrent(bypass=True),
+            'visible' : self._visible_blocks,
+            'units' : None
+        }
+        if(id_dsgns):
+            model['jar'], model['bottle'], model['shelf'] = Unit.Jar, Unit.Bottle, Unit.Shelf
+            model['units'] = [u for l in Unit.Jar.values() for n in l.values() \
+                for e in n.values() for u in e.values()]
+
+        buf = io.BytesIO()
+        pickler = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+        #blocks refer back to this workspace object
+        pickler.persistent_id = lambda obj: 'ws' if(obj is self) else None
+        try:
+            pickler.dump(model)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        self._snapshot = {
+            'key' : self.getSnapshotKey(found),
+            'manifest' : manifest,
+            'model' : buf.getvalue(),
+            'units' : model['units'],
+            'configs' : self.getConfigs(model['units']),
+            #decodes are only recorded for the captured units while this container is in use
+            'traces' : Unit.Traces,
+            'saved' : -1
+        }
+        pass
+
+
+    def loadSnapshot(self, found, id_dsgns):
+        '''
+        Restores the model of blocks (and their units) from the workspace's 
+        snapshot with a single read, if every file in its manifest and the 
+        settings it depends on are unchanged. Also restores the recorded 
+        decodes of units so they are replayed instead of decoded (see 
+        Language.trace).
+
+        Only restores into empty registries. The current block's safety checks
+        are performed again since its repository may have changed.
+
+        Dynamically creates attrs _visible_blocks and _snapshot on success. 
+        Otherwise, dynamically creates attr _stale to hold the recorded decodes
+        for reuseTraces().
+
+        Parameters:
+            found ([[str]]): list of marker file paths for each searched root
+            id_dsgns (bool): determine if the blocks' designs must be identified
+        Returns:
+            (bool): true if the model was restored
+        '''
+        self._stale = None
+        if(len(Block.Inventory) or len(Unit.Jar)):
+            return False
+        key = self.getSnapshotKey(found)
+        #treat unreadable, outdated, or stale snapshots as a miss
+        try:
+            with open(self.getDir()+self.SNAPSHOT_FILE, 'rb') as f:
+                snap = pickle.load(f)
+            if(snap['version'] != self.SNAPSHOT_VERSION):
+                return False
+            #the recorded decodes can still be checked one by one
+            if(snap['key']['mixed-language'] == key['mixed-language'] and \
+                snap['key']['cache'] == key['cache']):
+                self._stale = snap['traces']
+            if(snap['key'] != key or (id_dsgns and snap['designs'] == False)):
+                return False
+            if(self.isManifestCurrent(snap['manifest']) == False):
+                return False
+            model = self.unpickleModel(snap['model'])
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, \
+            ImportError, KeyError, IndexError, TypeError, ValueError):
+            return False
+
+        self._stale = None
+        Block.Inventory = model['inventory']
+        Block.Hierarchy = model['hierarchy']
+        Block.setCurrent(model['current'])
+        self._visible_blocks = model['visible']
+        units = model['units']
+        if(units != None):
+            Unit.Jar, Unit.Bottle, Unit.Shelf = model['jar'], model['bottle'], model['shelf']
+            Unit.clearChoices()
+            Unit.clearTraces()
+            self.unpackTraces(snap['traces'], units)
+        else:
+            #keep the recorded decodes for a later run that identifies designs
+            self._stale = snap['traces']
+
+        if(Block.getCurrent(bypass=True) != None):
+            Block.getCurrent().secureMeta()
+
+        self._snapshot = {
+            'key' : snap['key'],
+            'manifest' : snap['manifest'],
+            'model' : snap['model'],
+            'units' : units,
+            'configs' : self.getConfigs(units),
+            'traces' : Unit.Traces,
+            'saved' : len(Unit.Traces)
+        }
+        return True
+
+
+    def unpickleModel(self, data):
+        '''
+        Returns the model of blocks (and their units) pickled by captureSnapshot().
+
+        Parameters:
+            data (bytes): the pickled model
+        Returns:
+            (dict): the model's class containers and visible blocks
+        '''
+        unpickler = pickle.Unpickler(io.BytesIO(data))
+        unpickler.persistent_load = lambda pid: self
+        #only new objects are created; skip collecting garbage between them
+        gc.disable()
+        try:
+            model = unpickler.load()
+        finally:
+            gc.enable()
+        return model
+
+
+    def refreshModel(self):
+        '''
+        Brings the loaded model up to date when only HDL files (or the folders
+        holding them) changed since it was captured (see captureSnapshot). The
+        captured model is restored and only the blocks holding changed files 
+        identify their designs again, so only the changed files are analyzed 
+        while the others are read from the parse cache. The recorded decodes 
+        are kept for units unaffected by the changes (see unpackTraces).
+
+        The model must be loaded again if anything else it was built from 
+        changed, such as the settings or a Block.cfg file.
+
+        Parameters:
+            None
+        Returns:
+            (bool): true if the model was brought up to date
+        '''
+        if(hasattr(self, "_snapshot") == False or self._snapshot == None):
+            return False
+        snap = self._snapshot
+        if(snap['units'] == None):
+            return False
+        found = self.findBlockMarkers()
+        if(snap['key'] != self.getSnapshotKey(found)):
+            return False
+        changed = self.getChangedFiles(snap['manifest'])
+        if(len(changed) == 0):
+            return True
+        #keep the recorded decodes to check against the changes
+        entries = self.packTraces() if(snap['traces'] is Unit.Traces) else []
+        try:
+            model = self.unpickleModel(snap['model'])
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError, \
+            KeyError, IndexError, TypeError, ValueError):
+            return False
+
+        #find the blocks holding the changed files and searched directories
+        owners = dict()
+        for b in model['visible']:
+            if(hasattr(b, "_hdl_files") == False):
+                continue
+            for p in [hdl.getPath() for hdl in b._hdl_files] + b._hdl_dirs:
+                owners.setdefault(p, []).append(b)
+            pass
+        stale = []
+        for p in changed:
+            if(p not in owners.keys()):
+                return False
+            stale += [b for b in owners[p] if(b not in stale)]
+            pass
+
+        Block.Inventory = model['inventory']
+        Block.Hierarchy = model['hierarchy']
+        Block.setCurrent(model['current'])
+        self._visible_blocks = model['visible']
+        Unit.resetJar()
+        Unit.Hierarchy = Graph()
+        #search for the files of the stale blocks again in case any were added or removed
+        for b in stale:
+            delattr(b, "_units")
+            delattr(b, "_hdl_paths")
+        Block.preloadHDL(stale)
+        #store every unit again in the order they were loaded to keep the order of candidates
+        for b in self._visible_blocks:
+            if(b in stale):
+                b.loadHDL()
+                continue
+            if(hasattr(b, "_units") == False):
+                continue
+            for hdl in b._hdl_files:
+                for u in hdl.identifyDesigns():
+                    u.addToJar()
+            b._units = Unit.Jar[b.M()][b.L()][b.N()] if(Unit.jarExists(b.M(), b.L(), b.N())) else Map()
+            pass
+
+        if(Block.getCurrent(bypass=True) != None):
+            Block.getCurrent().secureMeta()
+
+        self.captureSnapshot(found, True)
+        if(self._snapshot != None):
+            self.unpackTraces(entries, self._snapshot['units'], check=True)
+        return True
+
+
+    def isManifestCurrent(self, manifest):
+        '''
+        Checks if every file in a snapshot's manifest still has the same 
+        modification time and size.
+
+        Parameters:
+            manifest ([(str, int, int)]): paths with their mtimes and sizes
+        Returns:
+            (bool): true if no file changed
+        '''
+        try:
+            for p,mtime,size in manifest:
+                st = os.stat(p)
+                if(st.st_mtime_ns != mtime or st.st_size != size):
+                    return False
+        except OSError:
+            return False
+        return True
+
+
+    def getChangedFiles(self, manifest):
+        '''
+        Returns every file in a snapshot's manifest that no longer has the same
+        modification time and size, was removed, or was listed without a 
+        modification time.
+
+        Parameters:
+            manifest ([(str, int, int)]): paths with their mtimes and sizes
+        Returns:
+            ([str]): paths of the changed files
+        '''
+        changed = []
+        for p,mtime,size in manifest:
+            try:
+                st = os.stat(p)
+            except OSError:
+                changed += [p]
+                continue
+            if(st.st_mtime_ns != mtime or st.st_size != size):
+                changed += [p]
+            pass
+        return changed
+
+
+    def reuseTraces(self):
+        '''
+        Restores the recorded decodes of a stale snapshot for the units of the 
+        freshly captured model that are unaffected by what changed. A unit's 
+        decode is only reused if its file, its configurations, and the 
+        candidates for every design it looked up are all unchanged (see 
+        getTraceDeps), so only the edited units are decoded again.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        if(hasattr(self, "_stale") == False or self._stale == None):
+            return
+        if(self._snapshot == None or self._snapshot['units'] == None):
+            return
+        self.unpackTraces(self._stale, self._snapshot['units'], check=True)
+        self._stale = None
+        pass
+
+
+    def getConfigs(self, units):
+        '''
+        Returns the configurations of every unit that has them. Configurations
+        change how a unit is decoded, so they are read before decoding adds to
+        them.
+
+        Parameters:
+            units ([Unit]): every unit in the model (or None)
+        Returns:
+            (dict): units mapped to their configurations (str)
+        '''
+        configs = dict()
+        for u in (units or []):
+            if(hasattr(u, "_config_modes")):
+                configs[u] = repr(u._config_modes)
+            pass
+        return configs
+
+
+    def getUnitKey(self, u):
+        '''Returns the identifiers (tuple) of unit `u` that stay the same across runs.'''
+        return (u.getFile(), u.M(), u.L(), u.N(), u.E())
+
+
+    def getTraceDeps(self, u, ops, stats, memo):
+        '''
+        Returns everything a unit's recorded decode depends on besides its own
+        code: the unit's configurations and the candidates for every design it
+        looked up. A candidate's file is only included when the choice between
+        candidates depends on its interface, or when it is a package declaring
+        components. A decode depending on a file listed without a modification
+        time cannot be checked (see captureSnapshot).
+
+        Parameters:
+            u (Unit): the decoded unit
+            ops ([(str, )]): the recorded operations of the decode
+            stats (dict): file paths mapped to their (mtime, size) from the manifest
+            memo (dict): candidates already computed for each lookup
+        Returns:
+            (tuple): the unit's file stats, configurations, and lookups with their candidates, or None
+        '''
+        lookups = []
+        for op,arg in ops:
+            if(op != 'i' or arg in lookups):
+                continue
+            if(arg not in memo.keys()):
+                cands = Unit.getCandidates(arg[0], arg[1], arg[2])
+                memo[arg] = [(self.getUnitKey(c), stats.get(c.getFile()) \
+                    if(len(cands) > 1 or c.isPkg()) else None) for c in cands]
+            lookups += [(arg, memo[arg])]
+            pass
+        stat = stats.get(u.getFile())
+        #files changed too recently may change again without a new modification time
+        if(stat == None or stat[0] == None):
+            return None
+        for _,cands in lookups:
+            for _,cstat in cands:
+                if(cstat != None and cstat[0] == None):
+                    return None
+            pass
+        return (stat, self._snapshot['configs'].get(u), lookups)
+
+
+    def packTraces(self):
+        '''
+        Returns every recorded decode (Unit.Traces) with its units swapped for 
+        their keys, along with what the decode depends on (see getTraceDeps). 
+        Decodes whose dependencies cannot be checked are left out.
+
+        Parameters:
+            None
+        Returns:
+            ([(tuple, [], tuple)]): unit key, operations, and dependencies of each decode
+        '''
+        stats = {p : (mtime, size) for p,mtime,size in self._snapshot['manifest']}
+        memo = dict()
+        entries = []
+        for u,ops in Unit.Traces.items():
+            deps = self.getTraceDeps(u, ops, stats, memo)
+            if(deps == None):
+                continue
+            keyed = [(op, self.getUnitKey(arg)) if(op == 'r' or op == 'y') \
+                else (op, arg) for op,arg in ops]
+            entries += [(self.getUnitKey(u), keyed, deps)]
+        return entries
+
+
+    def unpackTraces(self, entries, units, check=False):
+        '''
+        Restores recorded decodes into Unit.Traces for the given units. Decodes
+        involving units that no longer exist are skipped.
+
+        Parameters:
+            entries ([(tuple, [], tuple)]): decodes written by packTraces()
+            units ([Unit]): every unit in the model
+            check (bool): determine if to skip decodes whose dependencies changed
+        Returns:
+            None
+        '''
+        index = {self.getUnitKey(u) : u for u in units}
+        if(check):
+            stats = {p : (mtime, size) for p,mtime,size in self._snapshot['manifest']}
+            memo = dict()
+        for ukey,keyed,deps in entries:
+            u = index.get(ukey)
+            if(u == None):
+                continue
+            try:
+                ops = [(op, index[arg]) if(op == 'r' or op == 'y') \
+                    else (op, arg) for op,arg in keyed]
+            except KeyError:
+                continue
+            if(check and self.getTraceDeps(u, ops, stats, memo) != deps):
+                continue
+            Unit.Traces[u] = ops
+        pass
+
+
+    def saveSnapshot(self):
+        '''
+        Writes the model captured or restored by loadBlocks() to the workspace's
+        snapshot along with every decode recorded for its units. Skips writing
+        if nothing new was recorded since the snapshot was restored. Silently 
+        skips if the snapshot cannot be written.
+
+        Parameters:
+            None
+        Returns:
+            None
+        '''
+        if(hasattr(self, "_snapshot") == False or self._snapshot == None):
+            return
+        snap = self._snapshot
+        #carry over decodes from a stale snapshot until designs are identified again
+        traces = self._stale if(self._stale != None) else []
+        #recorded decodes went stale if a unit was created after the capture
+        if(snap['units'] != None and snap['traces'] is Unit.Traces):
+            if(len(Unit.Traces) == snap['saved']):
+                return
+            traces = self.packTraces()
+        elif(snap['saved'] > -1):
+            return
+
+        data = {
+            'version' : self.SNAPSHOT_VERSION,
+            'key' : snap['key'],
+            'manifest' : snap['manifest'],
+            'designs' : (snap['units'] != None),
+            'model' : snap['model'],
+            'traces' : traces
+        }
+        snap_file = self.getDir()+self.SNAPSHOT_FILE
+        try:
+            #write to a temporary file first so readers never see a partial snapshot
+            tmp_file = snap_file+'.'+str(os.getpid())
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, snap_file)
+        except OSError:
+            return
+        snap['saved'] = len(Unit.Traces)
+        pass
+
+
     def shortcut(self, title, req_entity=False, visibility=True, ref_current=True):
         '''
         Returns the Block from a shortened title. If title is empty and 
@@ -535,6 +1248,7 @@ class Workspace:
             for u in us.values():
                 u.getLanguageFile().decode(u, recursive=False)
         log.info("done.")
+        log.debug("Instance resolutions: {hits} reused, {misses} resolved, {choices} remembered.".format(**Unit.getChoiceStats()))
         pass
 
 
@@ -664,6 +1378,8 @@ class Workspace:
 
         #store each entity's print line in map (key = <unit>:<block-id>) to ensure uniqueness
         catalog = Map()
+        #blocks whose units are listed (in order)
+        listing = []
         for bk in Block.getAllBlocks():
             #for lvl in Block.Inventory[bk.M()][bk.L()][bk.N()]:
             block_title = bk.getFull(inc_ver=False)
@@ -680,7 +1396,12 @@ class Workspace:
                 #skip this block if only displaying usable units and multi-develop off
                 elif(usable):
                     continue
-            
+            listing += [(bk, block_title)]
+            pass
+
+        #analyze every listed block's files together before identifying designs
+        Block.preloadHDL([bk for bk,_ in listing])
+        for bk,block_title in listing:
             units = bk.loadHDL(returnnames=False).values()
 
             for u in units:
@@ -979,6 +1700,11 @@ class Workspace:
         return self.getDir()+"cache/"
 
 
+    def getParseCachePath(self):
+        '''Returns the hidden directory where analyzed HDL file data is kept (str).'''
+        return self.getDir()+"parse/"
+
+
     def getName(self):
         '''Returns the workspace's identifier (str).'''
         return self._name
@@ -0,0 +1,44 @@
+// File: test2.v
+// Author: Chase Ruskin
+// Description:
+//  Includes verilog code to test against legoHDL functions. Code may be
+//  purposely written poorly to test the verilog analysis in legoHDL.
+`timescale 1ns / 1ps
+`define WIDTH 8
+
+/* a multi-line comment
+   module fake(input a);
+ */
+module adder #(parameter N = `WIDTH, parameter [3:0] M=4'b0) (
+    input wire[N-1:0] a, b, /* inline */ input cin,
+    output reg [N-1:0] sum,
+    output cout
+);
+    wire [N:0] full;
+    assign full = a + b + cin; assign cout = full[N];
+
+    always @(*) begin
+        if(a == b) sum <= 0; else sum <= full[N-1:0];
+    end
+endmodule
+
+module top(input clk, input rst, output [7:0] q);
+    reg [7:0] x, y;
+    genvar i;
+    generate
+        for(i = 0; i < 2; i = i + 1) begin : gen_add
+            adder #(.N(8)) u_add (.a(x), .b(y), .cin(1'b0), .sum(q), .cout());
+        end
+    endgenerate
+
+    case(x)
+        0: adder #(8) u0 (x, y, 1'b0, q, );
+        default: ;
+    endcase
+
+    adder u1 (
+        .a(x),
+        .b(y), .cin(rst),
+        .sum(), .cout()
+    ); // trailing comment
+endmodule
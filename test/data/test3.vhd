@@ -0,0 +1,53 @@
+--------------------------------------------------------------------------------
+-- File: test3.vhd
+-- Description:
+--  Exercises configurations, component declarations, instantiations, strings,
+--  and multi-line comments for the VHDL tokenizer.
+--------------------------------------------------------------------------------
+library ieee; use ieee.std_logic_1164.all; use ieee.numeric_std.all;
+library work;
+use work.genericPKG.all;
+
+/* vhdl-2008 style
+   block comment */ entity counter is
+    generic(
+        N     : positive := 8;
+        RESET : std_logic_vector(3 downto 0) := "0000";
+        NAME  : string := "cnt:a=b"
+    );
+    port(
+        clk, rst : in  std_logic;
+        en       : in  std_logic := '1';
+        q        : out unsigned(N-1 downto 0);
+        flag     : buffer std_logic
+    );
+end entity counter;
+
+architecture behave of counter is
+    signal count : unsigned ( N - 1 downto 0 ) := (others => '0');
+    component adder is generic(W : natural := 4); port(a, b : in std_logic; s : out std_logic); end component adder;
+    for u_add0 : adder use entity work.adder_impl;
+begin
+    process(clk) begin
+        if rising_edge(clk) then
+            if rst = '1' then count <= (others => '0');
+            elsif en = '1' and count /= 10 and count >= 2 then
+                count <= count + 1;
+            end if;
+        end if;
+    end process;
+
+    u_add0 : adder generic map(W => 8) port map(a => clk, b => rst, s => flag);
+    u_add1 : entity work.adder_impl port map(clk, rst, open);
+    u_dot : entity work . adder_impl port map ( a=>clk , b=>rst , s=>open ) ;
+    q <= count;
+end architecture behave;
+
+configuration counter_cfg of counter is
+    for behave
+        for u_add1 : adder use entity work.adder_impl; end for;
+    end for;
+end configuration counter_cfg;
+
+entity tb is end entity;
+architecture sim of tb is begin end architecture sim
@@ -0,0 +1,354 @@
+# ------------------------------------------------------------------------------
+# Project: legohdl
+# Script: benchmark.py
+# Author: Chase Ruskin
+# Description:
+#   Times core data structures of legoHDL on access patterns taken from HDL
+#   analysis. Run from the repository root with 'src/' on the python path.
+# ------------------------------------------------------------------------------
+
+import os, sys, shutil, subprocess, tempfile, timeit, tracemalloc
+
+from legohdl.map import Map, FastMap
+from legohdl.unit import Unit
+from legohdl.language import Language
+from legohdl.vhdl import Vhdl
+
+
+# ------------------------------------------------------------------------------
+# -- BENCHMARK LAUNCH PAD
+# ------------------------------------------------------------------------------
+def main():
+    Benchmark("map: unit jar lookups").compare(Map, FastMap, benchJar)
+    Benchmark("map: graph adjacency lists").compare(Map, FastMap, benchGraph)
+    Benchmark("memory: synthetic workspace units").measure(benchUnits)
+    Benchmark("memory: all code streams kept").measure(lambda: benchStreams(0))
+    Benchmark("memory: code streams bounded").measure(lambda: benchStreams(20000))
+    home,block,clean = benchHome()
+    for args in STARTUP_ARGS:
+        Benchmark("startup: "+' '.join(args)).startup(home, block, args)
+    clean()
+    pass
+
+
+def benchJar(map_cls, blocks=200, units=25):
+    '''
+    Fills a 4-level unit jar and then resolves every unit by its mixed-case
+    vendor, library, block, and entity names, checking each level exists
+    first (Vhdl.decode and Unit.__init__).
+    '''
+    names = [('uf-ECE', 'Lib'+str(b%10), 'Block'+str(b), 'Entity_'+str(u)) \
+        for b in range(blocks) for u in range(units)]
+    jar = map_cls()
+    for M,L,N,E in names:
+        if(M.lower() not in jar.keys()):
+            jar[M] = map_cls()
+        if(L.lower() not in jar[M].keys()):
+            jar[M][L] = map_cls()
+        if(N.lower() not in jar[M][L].keys()):
+            jar[M][L][N] = map_cls()
+        jar[M][L][N][E] = E
+
+    def run():
+        for M,L,N,E in names:
+            if(E.lower() in jar[M][L][N].keys()):
+                jar[M][L][N][E]
+        pass
+
+    return run
+
+
+def benchGraph(map_cls, vertices=5000, fan_out=4):
+    '''
+    Builds adjacency lists keyed by objects and then visits every vertex's
+    neighbors and their reverse neighbors (Graph.addEdge and
+    Graph.topologicalSort).
+    '''
+    nodes = [object() for _ in range(vertices)]
+    adj = map_cls()
+    rev_adj = map_cls()
+    for i,v in enumerate(nodes):
+        adj[v] = [nodes[(i*7+j) % vertices] for j in range(1, fan_out+1)]
+        rev_adj[v] = []
+    for v in nodes:
+        for n in adj[v]:
+            rev_adj[n].append(v)
+
+    def run():
+        for v in adj.keys():
+            for n in adj[v]:
+                if(n in rev_adj.keys()):
+                    len(rev_adj[n])
+        pass
+
+    return run
+
+
+def benchStreams(limit):
+    '''
+    Identifies and decodes every entity of the synthetic workspace while at
+    most 'limit' tokens of code are kept in memory (Language.StreamLimit).
+    '''
+    build,clean = benchUnits()
+
+    def run():
+        Unit.resetJar()
+        Language.StreamLimit = limit
+        hdl_files = [Vhdl(f, block) for f,block in build.files]
+        for hdl in hdl_files:
+            for u in hdl.identifyDesigns():
+                hdl.decode(u)
+        Language.StreamLimit = 0
+        return hdl_files
+
+    return run,clean
+
+
+class SyntheticBlock:
+    '''
+    Stands in for a Block owning the synthetic HDL files. Provides only the
+    identifiers a Unit reads from its block and has no workspace (no parse
+    cache is used).
+    '''
+
+    def __init__(self, i):
+        self._i = i
+
+    def M(self):
+        return 'vendor'
+
+    def L(self):
+        return 'lib'+str(self._i%10)
+
+    def N(self):
+        return 'block'+str(self._i)
+
+    def V(self):
+        return '1.0.'+str(self._i%3)
+
+    def getWorkspace(self):
+        return None
+
+    pass
+
+
+def benchUnits(blocks=100, entities=20, ports=16):
+    '''
+    Writes a synthetic workspace of VHDL files with a shared about-comment
+    and identifies every entity and its interface (Block.loadHDL).
+    '''
+    path = tempfile.mkdtemp()
+    about = '-- '+'x'*70+'\n'
+    about = about*10
+    files = []
+    for b in range(blocks):
+        code = about
+        for e in range(entities):
+            code = code+'entity entity_'+str(e)+' is generic ( N : positive := 8; M : natural ); port (\n'
+            for p in range(ports):
+                code = code+'  port_'+str(p)+' : in std_logic_vector(N-1 downto 0);\n'
+            code = code+'  q : out std_logic);\nend entity;\n'
+        files += [(os.path.join(path, 'file'+str(b)+'.vhd'), SyntheticBlock(b))]
+        with open(files[-1][0], 'w') as f:
+            f.write(code)
+
+    def run():
+        Unit.resetJar()
+        hdl_files = [Vhdl(f, block) for f,block in files]
+        #keep only what a loaded block keeps after identifying its designs
+        for hdl in hdl_files:
+            delattr(hdl, '_code_stream')
+        return hdl_files
+
+    def clean():
+        Unit.resetJar()
+        shutil.rmtree(path)
+
+    #share the written files with other workloads
+    run.files = files
+    return run,clean
+
+
+#commands to time from a fresh process (run from within the synthetic block)
+STARTUP_ARGS = [['--version'], ['help'], ['list', '-plugin'], ['list'], \
+    ['info', 'lib.blk'], ['get', 'top', '-inst']]
+
+#times importing, initializing, and running a command in a fresh process
+STARTUP_SCRIPT = '''
+import sys, time, atexit
+start = time.perf_counter()
+import legohdl.legohdl as cli
+marks = [time.perf_counter()]
+run = cli.legoHDL.runCommand
+def runCommand(self):
+    marks.append(time.perf_counter())
+    run(self)
+cli.legoHDL.runCommand = runCommand
+def report():
+    marks.append(time.perf_counter())
+    if(len(marks) < 3):
+        marks.insert(1, marks[-1])
+    print('startup:', marks[0]-start, marks[1]-marks[0], marks[2]-marks[1], file=sys.stderr)
+atexit.register(report)
+sys.argv = ['legohdl'] + sys.argv[1:]
+cli.main()
+'''
+
+
+def benchHome(vendors=4):
+    '''
+    Creates a home directory with legohdl settings for a workspace holding a
+    single block, and with vendors linked to the workspace (legoHDL.__init__).
+    Returns the home directory, the block's path, and the clean up function.
+    '''
+    home = tempfile.mkdtemp()
+    os.makedirs(os.path.join(home, '.legohdl'))
+    ws_path = os.path.join(home, 'ws').replace('\\', '/')+'/'
+    os.makedirs(ws_path)
+    #the first call writes the default settings
+    legohdl(home, home, ['help'])
+    cfg_file = os.path.join(home, '.legohdl', 'legohdl.cfg')
+    with open(cfg_file, 'r') as f:
+        cfg = f.read()
+    cfg = cfg.replace('active-workspace = \n', 'active-workspace = bench\n', 1)
+    cfg = cfg.replace('[workspace]\n', '[workspace]\n    [.bench]\n        path = '+ws_path+'\n', 1)
+    with open(cfg_file, 'w') as f:
+        f.write(cfg)
+    for v in range(vendors):
+        legohdl(home, home, ['config', '-vendor.vendor'+str(v)+'='])
+        legohdl(home, home, ['config', '-workspace.bench.vendors+=vendor'+str(v)])
+    legohdl(home, home, ['new', 'lib.blk'])
+    block = ws_path+'lib/blk/'
+    with open(block+'top.vhd', 'w') as f:
+        f.write('entity top is port ( a : in bit; b : out bit ); end entity;\n')
+
+    def clean():
+        shutil.rmtree(home, ignore_errors=True)
+
+    return home,block,clean
+
+
+def legohdl(home, cwd, args, script=None):
+    '''
+    Runs legohdl with the arguments 'args' in a fresh process using the 
+    settings found in 'home', and returns the process's standard error.
+    '''
+    env = dict(os.environ)
+    env['HOME'] = home
+    env['PYTHONPATH'] = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+    code = ['-c', script] if(script != None) else ['-m', 'legohdl.legohdl']
+    proc = subprocess.run([sys.executable] + code + args, cwd=cwd, env=env, \
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return proc.stderr.decode()
+
+
+# ------------------------------------------------------------------------------
+# -- BENCHMARK CLASS
+# ------------------------------------------------------------------------------
+class Benchmark:
+    '''
+    The Benchmark class. Times the same workload against interchangeable
+    implementations and prints the results.
+    '''
+
+    #number of timed runs to take the best of
+    REPEAT = 25
+
+
+    def __init__(self, name):
+        '''
+        Creates a benchmark object.
+
+        Parameters:
+            name (str): the workload being timed
+        Returns:
+            None
+        '''
+        self._name = name
+        pass
+
+
+    def time(self, run):
+        '''Returns the best time (float) in seconds out of REPEAT calls to 'run'.'''
+        return min(timeit.repeat(run, number=1, repeat=self.REPEAT))
+
+
+    def compare(self, base, challenger, setup):
+        '''
+        Times the workload from 'setup' for both implementations and prints
+        the speedup of the challenger over the base.
+
+        Parameters:
+            base (type): the original implementation
+            challenger (type): the implementation being compared
+            setup (funct): creates the workload to time given an implementation
+        Returns:
+            None
+        '''
+        t_base = self.time(setup(base))
+        t_chlg = self.time(setup(challenger))
+        print('{:<32}'.format(self._name), \
+            '{:<8}'.format(base.__name__), '{:>8.2f} ms'.format(t_base*1000), ' | ', \
+            '{:<8}'.format(challenger.__name__), '{:>8.2f} ms'.format(t_chlg*1000), ' | ', \
+            '{:>5.2f}x'.format(t_base/t_chlg))
+        pass
+
+
+    def measure(self, setup):
+        '''
+        Traces the memory allocated by the workload from 'setup' that is still
+        alive once it returns, and prints the total and per-unit usage.
+
+        Parameters:
+            setup (funct): creates the workload and its clean up function
+        Returns:
+            None
+        '''
+        run,clean = setup()
+        tracemalloc.start()
+        result = run()
+        current,_ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        units = sum([len(dsgns) for lib in Unit.Bottle.values() for dsgns in lib.values()])
+        del result
+        clean()
+        print('{:<32}'.format(self._name), \
+            '{:>8} units'.format(units), ' | ', \
+            '{:>8.2f} MB'.format(current/(1 << 20)), ' | ', \
+            '{:>8.0f} bytes/unit'.format(current/max(units, 1)))
+        pass
+
+
+    def startup(self, home, block, args, repeat=5):
+        '''
+        Runs legohdl with the arguments 'args' from within 'block' in a fresh
+        process, and prints the best times spent importing legohdl, 
+        initializing before the command, and running the command.
+
+        Parameters:
+            home (str): the home directory holding the legohdl settings
+            block (str): path to the block to run the command from
+            args ([str]): the command-line arguments
+            repeat (int): number of processes to take the best of
+        Returns:
+            None
+        '''
+        best = None
+        for _ in range(repeat):
+            err = legohdl(home, block, args, script=STARTUP_SCRIPT)
+            times = [float(t) for t in err[err.rfind('startup:'):].split()[1:4]]
+            best = times if(best == None or sum(times) < sum(best)) else best
+        print('{:<32}'.format(self._name), \
+            'import {:>6.1f} ms'.format(best[0]*1000), ' | ', \
+            'init {:>6.1f} ms'.format(best[1]*1000), ' | ', \
+            'run {:>6.1f} ms'.format(best[2]*1000))
+        pass
+
+    pass
+
+
+# ------------------------------------------------------------------------------
+# -- ENTRY POINT
+# ------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,20 @@
 #   Runs tests to verify certain functions within legoHDL.
 # ------------------------------------------------------------------------------
 
-import os, shutil, time, sys
+import os, shutil, time, sys, json, io, subprocess, threading
 from datetime import datetime
 from enum import Enum
 
 from legohdl.apparatus import Apparatus as apt
 from legohdl.workspace import Workspace
 from legohdl.block import Block
+from legohdl.language import Language
 from legohdl.vhdl import Vhdl
+from legohdl.verilog import Verilog
 from legohdl.unit import Unit
+from legohdl.graph import Graph
+from legohdl.git import Git
+from legohdl.lock import Lock
 
 
 # ------------------------------------------------------------------------------
@@ -80,6 +85,33 @@ def main():
     t.unit(t.run(apt.isEqualPath, p1, p2), \
         exp=False)
 
+    #verify a command filling the error pipe does not block its captured output
+    noisy = "import sys; sys.stderr.write('x'*100000); print('done')"
+    t.unit(t.run(apt.execute, sys.executable, '-c', noisy, returnoutput=True), \
+        exp=('done', 'x'*100000))
+
+    #verify the same command does not block while its output is streamed
+    echo = (sys.stdout, sys.stderr)
+    sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+    try:
+        out = apt.execute(sys.executable, '-c', noisy, returnoutput=True, stream=True)
+        streamed = (sys.stdout.getvalue().strip(), len(sys.stderr.getvalue()))
+    finally:
+        sys.stdout, sys.stderr = echo
+    t.unit(t.run(lambda: (out, streamed)), \
+        exp=(('done', 'x'*100000), ('done', 100000)))
+
+    #verify a command running past its timeout is stopped with a 'fatal:' line
+    t.unit(t.run(apt.capture, [sys.executable, '-c', 'import time; time.sleep(30)'], timeout=0.5)[1], \
+        exp='fatal: stopped after 0.5 seconds')
+
+    #verify each temporary directory is private and removed on its own
+    tmp1, tmp2 = apt.makeTmpDir(), apt.makeTmpDir()
+    apt.cleanTmpDir(tmp1)
+    t.unit(t.run(lambda: (tmp1 != tmp2, os.path.exists(tmp1), os.path.isdir(tmp2))), \
+        exp=(True, False, True))
+    apt.cleanTmpDir(tmp2)
+
     #--- block.py ---
     t.writeSection("BLOCK.PY")
     b1 = Block(ws_path+'Block1/', ws)
@@ -102,6 +134,10 @@ def main():
     t.unit(t.run(b1.N), \
         exp='Block1')
 
+    #verify the block index finds the new block's marker
+    t.unit(t.run(ws.findMarkers, [ws.getPath()]), \
+        exp=[[ws.getPath()+'Block1/'+apt.MARKER]])
+
     #--- vhdl.py ---
     t.writeSection("VHDL.PY")
     vhdl1 = Vhdl("./test/data/test1.vhd", block=b1)
@@ -130,6 +166,318 @@ def main():
     t.unit(t.run(t.isEqual, sub_req, base_pkg), \
         exp=True)
 
+    #verify the statement index locates every architecture declaration
+    archs = [i for i,cseg in enumerate(vhdl1.spinCode()) if(cseg[0].lower() == 'architecture')]
+    t.unit(t.run(vhdl1.getIndex, 'architecture'), \
+        exp=archs)
+
+    #verify the parse cache restores the same code stream and designs without
+    #tokenizing the file again
+    Unit.resetJar()
+    spins = []
+    strip = Vhdl._stripComments
+    Vhdl._stripComments = lambda hdl: spins.append(hdl.getPath()) or strip(hdl)
+    try:
+        vhdl2 = Vhdl("./test/data/test1.vhd", block=b1)
+    finally:
+        Vhdl._stripComments = strip
+    t.unit(t.run(lambda: spins), \
+        exp=[])
+
+    t.unit(t.run(vhdl2.spinCode), \
+        exp=vhdl1.spinCode())
+
+    names1 = [u.E() for u in vhdl1.identifyDesigns()]
+    names2 = [u.E() for u in vhdl2.identifyDesigns()]
+    t.unit(t.run(t.isEqual, names1, names2), \
+        exp=True)
+
+    #verify a file modified within the racy window is not cached until it settles
+    Unit.resetJar()
+    racy_path = ws_path+'racy.vhd'
+    shutil.copyfile("./test/data/test3.vhd", racy_path)
+    racy = Vhdl(racy_path, block=b1)
+    t.unit(t.run(Language.readCache, racy.getCacheFile(), racy_path), \
+        exp=None)
+
+    Unit.resetJar()
+    past = time.time()-60
+    os.utime(racy_path, (past, past))
+    racy = Vhdl(racy_path, block=b1)
+    t.unit(t.run(lambda: Language.readCache(racy.getCacheFile(), racy_path) != None), \
+        exp=True)
+
+    #verify the tokenizer splits each file into the expected statements
+    with open("./test/data/streams.json", 'r') as f:
+        streams = json.load(f)
+    for name in sorted(streams.keys()):
+        Unit.resetJar()
+        if(name.endswith('.v')):
+            hdl = Verilog("./test/data/"+name, block=b1)
+        else:
+            hdl = Vhdl("./test/data/"+name, block=b1)
+        t.unit(t.run(hdl.spinCode), \
+            exp=streams[name])
+
+    #verify a decoded file drops its code stream and reads it again when bounded
+    Unit.resetJar()
+    Language.StreamLimit = 1
+    vhdl3 = Vhdl("./test/data/test1.vhd", block=b1)
+    for u in vhdl3.identifyDesigns():
+        vhdl3.decode(u, recursive=False)
+    t.unit(t.run(hasattr, vhdl3, '_code_stream'), \
+        exp=False)
+
+    t.unit(t.run(vhdl3.spinCode), \
+        exp=vhdl1.spinCode())
+    Language.StreamLimit = 0
+
+    #verify files tokenized by worker processes have the expected statements
+    files = [(Verilog, "./test/data/test2.v", None), (Vhdl, "./test/data/test3.vhd", None)]
+    Language.preload(files, 2)
+    for _,path,_ in files:
+        entry = Language._Preloaded.pop(apt.fs(path), {'stream' : None, 'events' : None})
+        t.unit(t.run(t.isEqual, entry['stream'], streams[os.path.basename(path)]), \
+            exp=True)
+
+        #verify the workers identify the same designs as the files analyzed in order
+        cached = Language.readCache(Language.locateCache(ws, path), path)
+        t.unit(t.run(t.isEqual, json.loads(json.dumps(entry['events'])), cached['events']), \
+            exp=True)
+
+    #verify bounded preloads leave worker results in the parse cache rather than in memory
+    Language.StreamLimit = 1
+    bounded = []
+    for name in ['test2.v', 'test3.vhd']:
+        shutil.copyfile("./test/data/"+name, ws_path+'bounded_'+name)
+        os.utime(ws_path+'bounded_'+name, (past, past))
+        bounded += [(Verilog if(name.endswith('.v')) else Vhdl, ws_path+'bounded_'+name, ws)]
+    Language.preload(bounded, 2)
+    t.unit(t.run(lambda: (len(Language._Preloaded), [Language.readCache(Language.locateCache(ws, p), p) != None for _,p,_ in bounded])), \
+        exp=(0, [True, True]))
+
+    #verify the least recently used stream is dropped to fit within the limit
+    Unit.resetJar()
+    Language.StreamLimit = sum([len(cseg) for cseg in vhdl1.spinCode()])
+    lru1 = Vhdl("./test/data/test1.vhd", block=b1)
+    Unit.resetJar()
+    lru2 = Verilog("./test/data/test2.v", block=b1)
+    t.unit(t.run(lambda: (hasattr(lru1, '_code_stream'), hasattr(lru2, '_code_stream'))), \
+        exp=(False, True))
+    lru2.dropStream()
+    Language.StreamLimit = 0
+
+
+    #--- graph.py ---
+    t.writeSection("GRAPH.PY")
+    g = Graph()
+    for a,b in [('top','alu'), ('alu','adder'), ('adder','top'), ('adder','gate')]:
+        g.addEdge(a, b)
+    t.unit(t.run(g.findCycle), \
+        exp=['top', 'alu', 'adder', 'top'])
+
+    g.removeEdge('adder', 'top')
+    t.unit(t.run(g.findCycle), \
+        exp=[])
+
+
+    #--- git.py ---
+    t.writeSection("GIT.PY")
+    repo_path = apt.fs(os.path.abspath(ws_path+'repo/'))
+    os.makedirs(repo_path)
+
+    def gitCmd(*args):
+        return subprocess.run(['git', '-C', repo_path, '-c', 'user.name=t', '-c', 'user.email=t'] + list(args), \
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+
+    def gitRefs():
+        out = gitCmd('for-each-ref', '--format=%(refname) %(objectname)', 'refs/heads/', 'refs/tags/')
+        return dict([line.split(' ') for line in out.splitlines()])
+
+    def ageRepo():
+        #move every modification time out of the racy window so the read is reused
+        past = time.time()-60
+        for root,_,files in os.walk(repo_path+'.git/'):
+            for f in [root]+[os.path.join(root, f) for f in files]:
+                os.utime(f, (past, past))
+
+    gitCmd('init', '-q')
+    gitCmd('commit', '-q', '--allow-empty', '-m', 'a')
+    gitCmd('tag', 'v1.0.0-legohdl')
+    gitCmd('pack-refs', '--all')
+    #the loose ref of the branch now overrides its packed ref
+    gitCmd('commit', '-q', '--allow-empty', '-m', 'b')
+    gitCmd('branch', 'feature/x')
+
+    #verify packed and loose refs are read like git lists them
+    t.unit(t.run(lambda: Git.readRepo(repo_path)['refs']), \
+        exp=gitRefs())
+
+    t.unit(t.run(lambda: Git.readRepo(repo_path)['head']), \
+        exp=gitCmd('symbolic-ref', 'HEAD').strip())
+
+    #verify tags are listed in the same order as git
+    gitCmd('tag', 'v1.10.0-legohdl')
+    gitCmd('tag', 'v1.2.0-legohdl')
+    t.unit(t.run(Git(repo_path).getTags), \
+        exp=gitCmd('tag', '-l').split())
+
+    #verify a new branch in an existing folder of refs is seen by a reused read
+    ageRepo()
+    Git.readRepo(repo_path)
+    gitCmd('branch', 'feature/y')
+    t.unit(t.run(lambda: Git.readRepo(repo_path)['refs']), \
+        exp=gitRefs())
+
+    #verify a detached HEAD has no branch checked out
+    gitCmd('checkout', '-q', '--detach')
+    t.unit(t.run(lambda: Git.readRepo(repo_path)['head']), \
+        exp=None)
+
+    #verify only the first url of each remote is kept
+    gitCmd('remote', 'add', 'origin', '/a')
+    gitCmd('remote', 'add', 'backup', '/b')
+    gitCmd('config', '--add', 'remote.origin.url', '/c')
+    t.unit(t.run(lambda: Git.readRepo(repo_path)['remotes']), \
+        exp={'origin' : '/a', 'backup' : '/b'})
+
+    #verify quoted values and includes are left to git
+    cfg_path = ws_path+'config'
+    remotes = {}
+    with open(cfg_path, 'w') as f:
+        f.write('[remote "origin"]\n\turl = /a ; comment\n[remote "backup"]\n\turl = /b # comment\n')
+    t.unit(t.run(Git.readRepoConfig, cfg_path, remotes), \
+        exp=True)
+
+    t.unit(t.run(lambda: remotes), \
+        exp={'origin' : '/a', 'backup' : '/b'})
+
+    with open(cfg_path, 'w') as f:
+        f.write('[remote "origin"]\n\turl = "/a"\n')
+    t.unit(t.run(Git.readRepoConfig, cfg_path, {}), \
+        exp=False)
+
+    gitCmd('config', 'include.path', 'other')
+    t.unit(t.run(Git.readRepo, repo_path), \
+        exp=None)
+
+
+    #--- lock.py ---
+    t.writeSection("LOCK.PY")
+    lock_path = ws_path+'locked/'
+
+    #verify another thread waits on the lock while it is held
+    order = []
+    def takeLock():
+        with Lock(lock_path):
+            order.append('thread')
+    with Lock(lock_path):
+        other = threading.Thread(target=takeLock)
+        other.start()
+        time.sleep(0.2)
+        order.append('main')
+    other.join()
+    t.unit(t.run(lambda: order), \
+        exp=['main', 'thread'])
+
+    #verify the thread holding the lock can take it again and still holds it
+    #after, so another process waits until it is fully released
+    waiter = "import sys\nfrom legohdl.lock import Lock\nwith Lock(sys.argv[1]): print('locked')"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    with Lock(lock_path):
+        with Lock(lock_path):
+            pass
+        proc = subprocess.Popen([sys.executable, '-c', waiter, lock_path], env=env, \
+            stdout=subprocess.PIPE, universal_newlines=True)
+        time.sleep(1)
+        blocked = (proc.poll() == None)
+    out = proc.communicate(timeout=10)[0].strip()
+    t.unit(t.run(lambda: (blocked, out)), \
+        exp=(True, 'locked'))
+
+
+    #--- workspace.py ---
+    t.writeSection("WORKSPACE.PY")
+    with open(ws_path+'settled.vhd', 'w') as f:
+        f.write('entity settled is end entity;\n')
+    st = os.stat(ws_path+'settled.vhd')
+    manifest = [(ws_path+'settled.vhd', st.st_mtime_ns, st.st_size), \
+        (ws_path+'settled.vhd', None, st.st_size), (ws_path+'missing.vhd', st.st_mtime_ns, 0)]
+    #verify only files listed without a modification time or that changed count as changed
+    t.unit(t.run(ws.getChangedFiles, manifest), \
+        exp=[ws_path+'settled.vhd', ws_path+'missing.vhd'])
+
+    t.unit(t.run(ws.isManifestCurrent, manifest[:1]), \
+        exp=True)
+
+
+    #--- stress tests ---
+    t.writeSection("STRESS")
+    #generate a 5,000-level deep chain of entities
+    depth = 5000
+    with open(ws_path+'chain.vhd', 'w') as f:
+        for i in range(depth):
+            f.write('entity chain'+str(i)+' is end entity;\n')
+            f.write('architecture rtl of chain'+str(i)+' is\nbegin\n')
+            if(i+1 < depth):
+                f.write('u0 : entity work.chain'+str(i+1)+';\n')
+            f.write('end architecture;\n')
+        pass
+    Unit.resetHierarchy()
+    Unit.resetJar()
+    chain = Vhdl(ws_path+'chain.vhd', block=b1)
+    top = chain.identifyDesigns()[0]
+    t.unit(t.run(chain.decode, top), \
+        exp=None)
+
+    t.unit(t.run(Unit.Hierarchy.getVertices).__len__(), \
+        exp=depth)
+
+    t.unit(t.run(Unit.Hierarchy.output, top).count('\n'), \
+        exp=depth+1)
+
+    t.unit(t.run(Unit.Hierarchy.output, top, depth=2).count('\n'), \
+        exp=1+3)
+
+    #verify the decode records its lookup, edge, lower-level unit, and completion
+    t.unit(t.run(lambda: [op for op,_ in Unit.Traces[top]]), \
+        exp=['i', 'r', 'y', 'c'])
+
+    #verify decoding again replays the recorded decodes without reading any code
+    chain_txt = Unit.Hierarchy.output(top)
+    Unit.resetHierarchy()
+    chain.dropStream()
+    chain.decode(top)
+    t.unit(t.run(hasattr, chain, '_code_stream'), \
+        exp=False)
+
+    t.unit(t.run(Unit.Hierarchy.output, top), \
+        exp=chain_txt)
+
+    #generate a 100,000-unit wide tree of entities
+    width = 100000
+    with open(ws_path+'tree.vhd', 'w') as f:
+        f.write('entity root is end entity;\narchitecture rtl of root is\nbegin\n')
+        for i in range(width):
+            f.write('u'+str(i)+' : entity work.leaf'+str(i)+';\n')
+        f.write('end architecture;\n')
+        for i in range(width):
+            f.write('entity leaf'+str(i)+' is end entity;\n')
+            f.write('architecture rtl of leaf'+str(i)+' is\nbegin\nend architecture;\n')
+        pass
+    Unit.resetHierarchy()
+    Unit.resetJar()
+    tree = Vhdl(ws_path+'tree.vhd', block=b1)
+    top = tree.identifyDesigns()[0]
+    t.unit(t.run(tree.decode, top), \
+        exp=None)
+
+    t.unit(t.run(Unit.Hierarchy.getVertices).__len__(), \
+        exp=width+1)
+
+    t.unit(t.run(Unit.Hierarchy.output, top).count('\n'), \
+        exp=width+2)
+
 
     # end unit tests -----------------------------------------------------------
 